@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 from ase.build import graphene_nanoribbon
 from ase import Atoms
-from ase.io import write
 import numpy as np
 
 # --- 1. User-Configurable Parameters ---
@@ -43,15 +42,20 @@ cell[2, 2] += VAC
 stack.set_cell(cell, scale_atoms=False)
 stack.wrap()
 
-# --- 5. Write Out LAMMPS Data File ---
-write(
+# --- 5. Write Out LAMMPS Data File (批量格式化, 再读回校验) ---
+from lammps_data import write_data, read_data, validate
+
+cell_len = stack.get_cell().lengths()
+write_data(
     OUTPUT_FILENAME,
-    stack,
-    format='lammps-data',
-    atom_style='charge',
-    specorder=['C']
+    [(0.0, L) for L in cell_len],
+    stack.positions,
+    np.ones(len(stack), dtype=int),          # C = type 1
+    atom_style='charge'
 )
 print(f"✅ Wrote '{OUTPUT_FILENAME}', total atoms = {len(stack)}")
+bad = validate(read_data(OUTPUT_FILENAME), min_dist=0.9 * C_C_BOND)
+print("  • 读回校验: " + ("OK" if not bad else "; ".join(bad)))
 
 # --- 6. 简单诊断：z 范围 & 晶胞高度 ---
 zs = stack.positions[:, 2]
@@ -48,7 +48,7 @@ def load_temps(path):
 
 def main():
     ap = argparse.ArgumentParser(description="Plot graphene substrate temperature (c_Tsub) vs time (publication quality).")
-    ap.add_argument("--file", default="./1000_temp/temps.out", help="path to temps.out")
+    ap.add_argument("--file", required=True, help="path to temps.out (e.g. ./1000_temp/temps.out)")
     ap.add_argument("--dt-fs", type=float, default=0.1, help="LAMMPS timestep in femtoseconds (fs), default=0.1")
     ap.add_argument("--xlim", default='0:35', help="time range in ps, format 'min:max' (e.g., '5:40'). Leave blank for auto")
     ap.add_argument("--ylim", default='500:3000', help="temperature range in K, format 'min:max' (e.g., '1200:1600'). Leave blank for auto")
@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 # track_ids_plot.py
 # 读取 IDs 列表，从 start:end 帧跟踪它们的 z 和温度，出两张图（均值±std 或 逐原子）
+# 在场掩码用共享模块 presence 的打包位 (Track / pack)，需先 pip install -e ../3_all_out
 
 import argparse, csv, math
 import numpy as np
 import matplotlib.pyplot as plt
 from ase.io import iread
+from presence import Track, pack, scatter_ids, masked_mean
 
 def load_ids_from_csv(path):
     ids = []
@@ -21,6 +23,28 @@ def load_ids_from_csv(path):
                     continue
     return np.array(sorted(set(ids)), dtype=int)
 
+def locate_ids(track_ids, frame_ids):
+    """
+    本帧原子 → track_ids 列号 (presence.scatter_ids，searchsorted 向量化)。
+    返回 (列号, 本帧中被追踪的行掩码, 在场掩码)；空帧 → 全部缺席。
+    """
+    col = scatter_ids(track_ids, frame_ids)
+    ok = col >= 0
+    present = np.zeros(track_ids.shape, dtype=bool)
+    present[col[ok]] = True
+    return col[ok], ok, present
+
+def spread(values, col, ok, n):
+    """本帧逐原子值 → (n,) 追踪列，缺席为 NaN。"""
+    out = np.full(n, np.nan)
+    out[col] = np.asarray(values, dtype=float)[ok]
+    return out
+
+def frame_stats(A, P):
+    """(帧 × id) → 逐帧均值 / 标准差 (presence.masked_mean 按列，故转置)。"""
+    mean = masked_mean(A.T, P.T)
+    return mean, np.sqrt(masked_mean((A - mean[:, None]).T ** 2, P.T))
+
 def main():
     ap = argparse.ArgumentParser(description="Track detached atom IDs across frames and plot Z/T vs time.")
     ap.add_argument("--dump", required=True, help="LAMMPS dump file (text)")
@@ -56,6 +80,7 @@ def main():
     frames = []
     Z_list = []
     T_list = []
+    B_list = []     # 打包的在场位 (帧 × ⌈id/8⌉)：原子飞出 / 被删除的帧为 0
     idx0 = args.start_frame
     idx1 = args.end_frame
 
@@ -68,47 +93,37 @@ def main():
         if "id" not in atoms.arrays:
             raise SystemExit("dump 缺少 'id' 列，无法跟踪。")
         ids = atoms.arrays["id"].astype(int)
-        id2ind = {int(i): j for j, i in enumerate(ids)}
+        col, ok, present = locate_ids(track_ids, ids)
+        B_list.append(pack(present))
+        n = track_ids.size
 
         # 位置（z）
-        pos = atoms.positions
-        z = np.full(track_ids.shape, np.nan)
-        for k, a_id in enumerate(track_ids):
-            j = id2ind.get(int(a_id), None)
-            if j is not None:
-                z[k] = pos[j, 2]
-        Z_list.append(z)
+        Z_list.append(spread(atoms.positions[:, 2], col, ok, n))
 
         # 温度（优先用 v_MyTemp；没有时可选从 c_MyKE 估算）
-        T_arr = np.full(track_ids.shape, np.nan)
+        T_arr = np.full(n, np.nan)
         if "v_MyTemp" in atoms.arrays:
-            arr = atoms.arrays["v_MyTemp"]
-            for k, a_id in enumerate(track_ids):
-                j = id2ind.get(int(a_id), None)
-                if j is not None:
-                    T_arr[k] = float(arr[j])
+            T_arr = spread(atoms.arrays["v_MyTemp"], col, ok, n)
         elif args.estimate_T_from_KE and "c_MyKE" in atoms.arrays:
             # c_MyKE 是每原子的动能（kcal/mol），用 3 自由度近似：T = 2/3 KE / kB
             ke = atoms.arrays["c_MyKE"]
-            for k, a_id in enumerate(track_ids):
-                j = id2ind.get(int(a_id), None)
-                if j is not None:
-                    T_arr[k] = (2.0/3.0) * float(ke[j]) / args.kB_kcal
-        else:
-            # 找不到温度
-            pass
+            T_arr = spread((2.0/3.0) * ke / args.kB_kcal, col, ok, n)
         T_list.append(T_arr)
 
     frames = np.array(frames, dtype=int)
     time_ps = frames * args.dt_fs / 1000.0
-    Z = np.vstack(Z_list)  # shape: (n_frames, n_ids)
-    T = np.vstack(T_list)  # same shape (可能为 NaN)
-
-    # 统计（逐帧）
-    Z_mean = np.nanmean(Z, axis=1)
-    Z_std  = np.nanstd(Z, axis=1)
-    T_mean = np.nanmean(T, axis=1) if np.isfinite(T).any() else None
-    T_std  = np.nanstd(T, axis=1)  if np.isfinite(T).any() else None
+    trk = Track(track_ids, frames, time_ps, bits=np.vstack(B_list),
+                values={"z": np.vstack(Z_list), "T": np.vstack(T_list)})
+    Z, T = trk.values["z"], trk.values["T"]   # (n_frames, n_ids)，缺席 / 无温度为 NaN
+    P = trk.present
+    n_here = P.sum(axis=1)
+    if (n_here < P.shape[1]).any():
+        print(f"[INFO] 在场原子数 {n_here.min()}–{n_here.max()} / {P.shape[1]}；"
+              f"{int((~P.any(axis=0)).sum())} 个 id 从未出现")
+
+    # 统计（逐帧，只计在场原子；整帧缺席 → NaN）
+    Z_mean, Z_std = frame_stats(Z, P)
+    T_mean, T_std = frame_stats(T, P) if np.isfinite(T).any() else (None, None)
 
     # ---- 图 1：Z vs time ----
     fig1, ax1 = plt.subplots(figsize=(W, H), constrained_layout=True)
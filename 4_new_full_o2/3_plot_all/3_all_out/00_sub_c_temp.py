@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
 # plot_Tsub_pub.py — Publication-quality plot for c_Tsub vs time
-# Requirements: numpy, matplotlib
+# Requirements: numpy, pandas, matplotlib
+# Single: python 00_sub_c_temp.py --file ./1000_temp/temps.out
+# Batch:  python 00_sub_c_temp.py --root ../../../1_lammps_more_temp   (all *_temp/temps.out, one overlay)
 
-import numpy as np
+import os
+import numpy as np, pandas as pd
 import matplotlib.pyplot as plt
 import argparse
+from temps_log import load_temps, window_mask, window_stats, find_runs
+from smoothing import smooth
 
 def parse_span(span_str, unit="ps"):
     """Parse 'a:b' into (a, b) floats; allow None if omitted."""
@@ -29,71 +34,21 @@ def parse_excludes(ex_str):
         spans.append(parse_span(chunk))
     return spans
 
-def moving_average(y, win):
+def moving_average(y, win, method="mean"):
     if win is None or win < 2:
         return y
-    win = int(win)
-    if win > len(y):
-        win = len(y)
-    kernel = np.ones(win) / win
-    # 'same' keeps length; edges will be smoothed too
-    return np.convolve(y, kernel, mode="same")
-
-def load_temps(path):
-    # Format per line: TimeStep c_Tmobile c_Tsub c_Tbeam
-    data = np.loadtxt(path, comments="#")
-    steps = data[:, 0]
-    Tsub  = data[:, 2]
-    return steps, Tsub
-
-def main():
-    ap = argparse.ArgumentParser(description="Plot graphene substrate temperature (c_Tsub) vs time (publication quality).")
-    ap.add_argument("--file", default="./1000k_out/1000_temp/temps.out", help="path to temps.out")
-    ap.add_argument("--dt-fs", type=float, default=0.1, help="LAMMPS timestep in femtoseconds (fs), default=0.1")
-    ap.add_argument("--xlim", default='0:35', help="time range in ps, format 'min:max' (e.g., '5:40'). Leave blank for auto")
-    ap.add_argument("--ylim", default='500:3000', help="temperature range in K, format 'min:max' (e.g., '1200:1600'). Leave blank for auto")
-    ap.add_argument("--exclude", default=None, help="exclude time spans in ps, comma-separated 'a:b,c:d' (e.g., '0:5,42:50')")
-    ap.add_argument("--smooth", type=int, default=0, help="moving-average window size (points). 0/1 = no smoothing")
-    ap.add_argument("--marker-every", type=int, default=0, help="plot markers every N points (0=off)")
-    ap.add_argument("--figsize", default="6,3.2", help="figure size in inches 'W,H' (e.g., '6,3.2')")
-    ap.add_argument("--font", type=int, default=11, help="base font size")
-    ap.add_argument("--dpi", type=int, default=300, help="save DPI")
-    ap.add_argument("--out", default="Tsub_vs_time.png", help="output image filename")
-    args = ap.parse_args()
-    plt.show()
-
-    # Load
-    steps, Tsub = load_temps(args.file)
-    time_ps = steps * args.dt_fs / 1000.0
-
-    # Build inclusion mask (start from all True)
-    mask = np.ones_like(time_ps, dtype=bool)
-
-    # Apply x-range (view window)
-    xspan = parse_span(args.xlim) if args.xlim else (None, None)
-    if xspan is not None:
-        xmin, xmax = xspan
-        if xmin is not None:
-            mask &= (time_ps >= xmin)
-        if xmax is not None:
-            mask &= (time_ps <= xmax)
-
-    # Exclude spans
-    for span in parse_excludes(args.exclude):
-        a, b = span
-        if a is None or b is None:
-            continue
-        # remove a≤t≤b
-        mask &= ~((time_ps >= a) & (time_ps <= b))
-
-    t = time_ps[mask]
-    y = Tsub[mask]
-
-    # Optional smoothing (moving average)
-    y_smooth = moving_average(y, args.smooth)
-
-    # Figure / fonts
-    W, H = (float(x) for x in args.figsize.split(","))
+    # O(n) cumulative-sum window (or savgol / ema); edges average only the points
+    # actually inside the window instead of padding with zeros
+    return smooth(y, int(win), method)
+
+def load_run(path, col, dt_fs):
+    """temps.out -> (time_ps, y); column picked by header name, not position."""
+    data = load_temps(path)
+    if col not in data:
+        raise SystemExit(f"{path}: no column {col}, available: {list(data)}")
+    return data["TimeStep"] * dt_fs / 1000.0, data[col]
+
+def apply_style(args):
     plt.rcParams.update({
         "font.size": args.font,
         "axes.labelsize": args.font,
@@ -104,21 +59,10 @@ def main():
         "figure.dpi": args.dpi,
     })
 
-    fig, ax = plt.subplots(figsize=(W, H), constrained_layout=True)
-
-    # Plot raw
-    kw = {"linewidth": 1.7, "alpha": 0.9}
-    if args.marker_every and args.marker_every > 0:
-        kw.update({"marker": "o", "markersize": 2.8, "markevery": args.marker_every})
-    raw_line = ax.plot(t, y, label="c_Tsub (raw)", **kw)
-
-    # Plot smoothed (different linestyle; color will auto-cycle to distinguish)
-    if args.smooth and args.smooth > 1:
-        smooth_line = ax.plot(t, y_smooth, linestyle="--", linewidth=1.8, label=f"MA (win={int(args.smooth)})")
-
+def finish_axes(ax, args, title):
     ax.set_xlabel("Time (ps)")
-    ax.set_ylabel("Substrate temperature, c_Tsub (K)")
-    ax.set_title("Graphene substrate temperature vs time")
+    ax.set_ylabel(f"Substrate temperature, {args.col} (K)")
+    ax.set_title(title)
 
     # Y limits
     if args.ylim:
@@ -131,10 +75,84 @@ def main():
     ax.grid(True, linestyle="--", linewidth=0.6, alpha=0.5)
     for spine in ["top", "right"]:
         ax.spines[spine].set_visible(False)
-
     ax.legend(frameon=False)
-    fig.savefig(args.out, dpi=args.dpi)
-    print(f"Saved: {args.out}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Plot graphene substrate temperature (c_Tsub) vs time (publication quality).")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--file", default=None, help="path to temps.out (e.g. ./1000_temp/temps.out)")
+    src.add_argument("--root", default=None, help="batch mode: plot every temps.out found under this sweep directory (e.g. the *_temp/ dirs made by cp.sh)")
+    ap.add_argument("--col", default="c_Tsub", help="column to plot, by name from the temps.out header")
+    ap.add_argument("--dt-fs", type=float, default=0.1, help="LAMMPS timestep in femtoseconds (fs), default=0.1")
+    ap.add_argument("--xlim", default='0:35', help="time range in ps, format 'min:max' (e.g., '5:40'). Leave blank for auto")
+    ap.add_argument("--ylim", default='500:3000', help="temperature range in K, format 'min:max' (e.g., '1200:1600'). Leave blank for auto")
+    ap.add_argument("--exclude", default=None, help="exclude time spans in ps, comma-separated 'a:b,c:d' (e.g., '0:5,42:50')")
+    ap.add_argument("--smooth", type=int, default=0, help="moving-average window size (points). 0/1 = no smoothing")
+    ap.add_argument("--smooth-method", default="mean", choices=["mean", "savgol", "ema"], help="smoothing filter for --smooth (ema: window = span)")
+    ap.add_argument("--marker-every", type=int, default=0, help="plot markers every N points (0=off)")
+    ap.add_argument("--figsize", default="6,3.2", help="figure size in inches 'W,H' (e.g., '6,3.2')")
+    ap.add_argument("--font", type=int, default=11, help="base font size")
+    ap.add_argument("--dpi", type=int, default=300, help="save DPI")
+    ap.add_argument("--out", default="Tsub_vs_time.png", help="output image filename (batch mode: overlay figure)")
+    ap.add_argument("--stats-out", default="Tsub_stats.csv", help="windowed statistics per run (CSV)")
+    args = ap.parse_args()
+
+    if args.root:
+        runs = find_runs(args.root)
+        if not runs:
+            raise SystemExit(f"No temps.out found under {args.root}")
+    else:
+        runs = [(os.path.basename(os.path.dirname(os.path.abspath(args.file))), None, args.file)]
+
+    xspan    = parse_span(args.xlim) if args.xlim else None
+    excludes = parse_excludes(args.exclude)
+
+    W, H = (float(x) for x in args.figsize.split(","))
+    apply_style(args)
+    kw = {"linewidth": 1.7, "alpha": 0.9}
+    if args.marker_every and args.marker_every > 0:
+        kw.update({"marker": "o", "markersize": 2.8, "markevery": args.marker_every})
+
+    stats_rows = []
+    if len(runs) > 1:
+        fig_all, ax_all = plt.subplots(figsize=(W, H), constrained_layout=True)
+        colors = plt.cm.plasma(np.linspace(0.05, 0.9, len(runs)))
+
+    for r, (label, T_set, path) in enumerate(runs):
+        time_ps, Tsub = load_run(path, args.col, args.dt_fs)
+        mask = window_mask(time_ps, xspan, excludes)
+        t = time_ps[mask]
+        y = Tsub[mask]
+        stats_rows.append({"run": label, "T_set_K": T_set, "file": path,
+                           **window_stats(y)})
+
+        # Optional smoothing (moving average)
+        y_smooth = moving_average(y, args.smooth, args.smooth_method)
+        y_show   = y_smooth if args.smooth and args.smooth > 1 else y
+
+        if len(runs) > 1:
+            ax_all.plot(t, y_show, color=colors[r], label=label, **kw)
+            if T_set is not None:
+                ax_all.axhline(T_set, color=colors[r], lw=0.8, ls=":")
+
+        # per-run figure
+        fig, ax = plt.subplots(figsize=(W, H), constrained_layout=True)
+        ax.plot(t, y, label=f"{args.col} (raw)", **kw)
+        # Plot smoothed (different linestyle; color will auto-cycle to distinguish)
+        if args.smooth and args.smooth > 1:
+            ax.plot(t, y_smooth, linestyle="--", linewidth=1.8, label=f"{args.smooth_method} (win={int(args.smooth)})")
+        finish_axes(ax, args, "Graphene substrate temperature vs time")
+        out = args.out if len(runs) == 1 else f"{os.path.splitext(args.out)[0]}_{label.replace(os.sep, '_')}.png"
+        fig.savefig(out, dpi=args.dpi); plt.close(fig)
+        print(f"Saved: {out}")
+
+    if len(runs) > 1:
+        finish_axes(ax_all, args, f"Substrate temperature, {len(runs)} runs")
+        fig_all.savefig(args.out, dpi=args.dpi); plt.close(fig_all)
+        print(f"Saved: {args.out}")
+
+    pd.DataFrame(stats_rows).to_csv(args.stats_out, index=False)
+    print(f"Saved: {args.stats_out}")
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 # -------------------------------------------------------------
 # 逐帧收集指定 ID 的 z、温度、(可选应力)
-# 计算 t_escape / T_escape / t_peak / T_peak
+# 计算 t_escape / T_escape / t_peak / T_peak / 首末次出现
+# 缺席 (已删除 / 飞出) 的 (帧, id) 由在场位掩码标记，不做逐 id 字典查找
+# 有 6 个应力分量时，逐帧派生量 (P_hydro / σ_dev / σ_vm / 主应力 …) 在这里一次算好写成列
 # -------------------------------------------------------------
 
 # ===== USER CONFIG =====
@@ -10,16 +12,26 @@ IDS_CSV       = "escaped_ids.csv"                # 前一步生成
 START_FRAME   = 0
 END_FRAME     = 3000        # exclusive
 DT_FS         = 0.1         # fs per MD step
+DUMP_EVERY    = 100         # 每隔多少 MD 步写一帧; None = 用帧头 Timestep=
 TIME_ZERO_PS  = 15         # 把 START_FRAME 对应到 15 ps
+# ---- 抽稀 / 选帧 (经帧索引, 跳过的帧不解析) ----
+EVERY         = 1           # 每 EVERY 帧取 1 帧; 探索性粗扫可设 10
+TIME_WINDOW_PS = None       # (t_min, t_max) ps; None = 不限
+DENSE_JUMP_CSV = None       # 例 "jump_stats.csv": 在其 t_jump_ps 附近恢复逐帧
+DENSE_HALF_PS  = 0.5        # 加密窗口半宽 (ps)
 Z_THRESH_A    = 27.0
 TEMP_MIN, TEMP_MAX = 0, 100000
 OUT_TS_CSV    = "escape_timeseries.csv"
 OUT_SUM_CSV   = "escape_summary.csv"
+OUT_TRACK_NPZ = "escape_track.npz"    # (帧 × id) 数组 + 打包的在场位掩码 (05a 优先读它)
 # 如果想导出应力, 列出 extxyz 中的列名 (可留空 [])
 STRESS_COLS   = ["v_s_xx_gpa","v_s_yy_gpa","v_s_zz_gpa","v_s_xy_gpa","v_s_xz_gpa","v_s_yz_gpa"]
 # =======================
 
-import numpy as np, pandas as pd, ase.io, math, sys, csv
+import numpy as np, pandas as pd, sys
+from traj_index import load_index, select_frames, iter_xyz_frames
+from presence import Track, first_true, take_rows
+from stress_tensor import add_invariants
 
 # ---------- 读取待追踪 ID ----------
 try:
@@ -30,18 +42,19 @@ except ValueError as e:        # 文件只有一行 id 时 numpy 会返回标量
 if ids.size == 0:
     sys.exit(f"{IDS_CSV} 中没有任何 id")
 
-# --------- 结果容器 ---------
-rows_ts  = []    # time-series : 每帧 × 每 id
-rows_sum = []    # summary    : 每 id
+# --------- 帧索引 + 选帧 ---------
+fidx    = load_index(XYZ_PATH)
+time_ps = fidx.times_ps(DT_FS, DUMP_EVERY, TIME_ZERO_PS)     # 每帧实际时间 (ps)
+dense_t = (pd.read_csv(DENSE_JUMP_CSV)["t_jump_ps"].dropna().to_numpy()
+           if DENSE_JUMP_CSV else None)
+frames  = select_frames(time_ps, START_FRAME, END_FRAME, every=EVERY,
+                        t_window_ps=TIME_WINDOW_PS,
+                        dense_centers_ps=dense_t, dense_half_ps=DENSE_HALF_PS)
+print(f"[COLLECT] 读取 {len(frames)} / {fidx.n_frames} 帧 (EVERY={EVERY})")
 
-# 预先算好实际的时间 (ps)
-time_ps = (np.arange(START_FRAME, END_FRAME) * DT_FS * 100 / 1000.0) + TIME_ZERO_PS
-
-# --------- 逐帧读取 extxyz ---------
-for k, at in enumerate(
-        ase.io.iread(XYZ_PATH,
-                     index=slice(START_FRAME, END_FRAME),
-                     format="extxyz")):
+# --------- 逐帧读取 extxyz (只解析选中的帧) → (帧 × id) 数组 + 在场位掩码 ---------
+trk = Track(np.unique(ids), frames, time_ps[frames], ["z", "T"] + STRESS_COLS)
+for r, (_, at) in enumerate(iter_xyz_frames(XYZ_PATH, frames, idx=fidx)):
     pid = at.arrays["id"].astype(int)      # id:I:1
     z   = at.positions[:, 2]
 
@@ -52,58 +65,37 @@ for k, at in enumerate(
         T_arr = (2/3) * at.arrays["c_myke"] / 0.0019872041
     else:
         T_arr = np.full_like(z, np.nan)    # 都没有 → NaN
+    T_arr = np.where((T_arr < TEMP_MIN) | (T_arr > TEMP_MAX), np.nan, T_arr)
 
-    # id → index 映射
-    id2idx = {int(a): i for i, a in enumerate(pid)}
-
-    # ---- 写入 time-series 行 ----
-    for a_id in ids:
-        idx = id2idx.get(int(a_id))
-        if idx is None:
-            continue                       # 本帧里可能已删除
-        row = {
-            "id":       int(a_id),
-            "frame":    START_FRAME + k,
-            "time_ps":  time_ps[k],
-            "z":        float(z[idx]),
-            "T":        np.nan if
-                        (T_arr[idx] < TEMP_MIN or T_arr[idx] > TEMP_MAX)
-                        else float(T_arr[idx]),
-        }
-        # 应力列 (可选)
-        for sc in STRESS_COLS:
-            row[sc] = ( float(at.arrays[sc][idx])
-                        if sc in at.arrays else np.nan )
-        rows_ts.append(row)
+    # 本帧缺席的 id (已删除 / 飞出) 只是不置在场位，值保持 NaN；应力列缺失同样为 NaN
+    trk.set_frame(r, pid, {"z": z, "T": T_arr,
+                           **{sc: at.arrays[sc] for sc in STRESS_COLS if sc in at.arrays}})
+trk.save(OUT_TRACK_NPZ)
+print(f"[COLLECT] 追踪数组 + 在场掩码 →  {OUT_TRACK_NPZ}")
 
-# --------- 保存 time-series CSV ---------
-df_ts = pd.DataFrame(rows_ts)
+# --------- 保存 time-series CSV (只含在场的帧 × id) ---------
+df_ts = trk.to_long()
+if len(STRESS_COLS) == 6:
+    df_ts = add_invariants(df_ts, STRESS_COLS)
 df_ts.to_csv(OUT_TS_CSV, index=False)
 print(f"[COLLECT] time-series  →  {OUT_TS_CSV}")
 
-# --------- 计算 summary ---------
-for a_id, g in df_ts.groupby("id", sort=False):
-    # t_escape = 第一帧 z > Z_THRESH_A
-    esc_idx = np.where(g["z"] > Z_THRESH_A)[0]
-    if esc_idx.size:
-        ie  = esc_idx[0]
-        t_e = float(g.iloc[ie]["time_ps"])
-        T_e = float(g.iloc[ie]["T"])
-    else:
-        t_e = T_e = math.nan
-
-    # 峰值温度 (忽略 NaN)
-    if np.isfinite(g["T"]).any():
-        ip   = g["T"].idxmax()
-        T_p  = float(g.loc[ip, "T"])
-        t_p  = float(g.loc[ip, "time_ps"])
-    else:
-        T_p = t_p = math.nan
+# --------- 计算 summary (逐 id 向量化，只看在场的帧) ---------
+pres = trk.present
+t, z, T = trk.time_ps, trk.values["z"], trk.values["T"]
+first, last = trk.first_last()
 
-    rows_sum.append([int(a_id), t_e, T_e, t_p, T_p])
+# t_escape = 第一帧 z > Z_THRESH_A
+ie = first_true(pres & (z > Z_THRESH_A))
+# 峰值温度 (忽略 NaN，并列取最早)
+T_ok = pres & np.isfinite(T)
+ip = np.where(T_ok.any(axis=0), np.argmax(np.where(T_ok, T, -np.inf), axis=0), -1)
 
-pd.DataFrame(rows_sum,
-             columns=["id", "t_escape_ps", "T_escape_K",
-                      "t_peak_ps", "T_peak_K"]
-             ).to_csv(OUT_SUM_CSV, index=False)
+t_at = lambda rows: np.where(rows >= 0, t[np.maximum(rows, 0)], np.nan)
+seen = first >= 0                          # 从未出现的 id 不进 summary
+pd.DataFrame({"id": trk.ids, "t_escape_ps": t_at(ie), "T_escape_K": take_rows(T, ie),
+              "t_peak_ps": t_at(ip), "T_peak_K": take_rows(T, ip),
+              "t_first_ps": t_at(first), "t_last_ps": t_at(last),
+              "n_frames_present": pres.sum(axis=0)}
+             )[seen].to_csv(OUT_SUM_CSV, index=False)
 print(f"[COLLECT] summary      →  {OUT_SUM_CSV}")
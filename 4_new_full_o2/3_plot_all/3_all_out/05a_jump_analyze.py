@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 # -------------------------------------------------------------
 # 从 escape_timeseries.csv 识别跳点
-# 输出 jump_stats.csv :  温度 + 6 应力分量 + σ_eq(Dev) + P_hydro
+# 输出 jump_stats.csv :  温度 + 6 应力分量 + 窗口平均张量的派生量 (stress_tensor.py:
+#                        P_hydro / σ_dev / σ_vm / 带符号变体 / 主应力)
+# 输入优先用 02 的 escape_track.npz (帧 × id 数组 + 在场位掩码)，没有则由 timeseries 长表重建;
+# 基线 / 跳点 / 窗口平均都只看在场的 (帧, id)，在 (帧 × id) 数组上向量化
+# 两阶段: 粗扫在 timeseries 上定 t_jump；若给了 REFINE_DUMP，
+#         再经帧索引只读高频 dump 里各跳点窗口内的帧，重算局部均值
 # -------------------------------------------------------------
 
 # ===== USER CONFIG =====
 TS_CSV        = "escape_timeseries.csv"
+TRACK_NPZ     = "escape_track.npz"     # 02 的追踪数组 + 在场掩码; 不存在则读 TS_CSV
 
 TIME_START_PS = 15.0      # 分析窗口
 TIME_END_PS   = 45.0
@@ -21,77 +27,96 @@ DT_AVG_PS     = 0.05       # 跳点 ±Δt 求局部均值
 S_XX, S_YY, S_ZZ = "v_s_xx_gpa", "v_s_yy_gpa", "v_s_zz_gpa"
 S_XY, S_XZ, S_YZ = "v_s_xy_gpa", "v_s_xz_gpa", "v_s_yz_gpa"
 STRESS_COLS = [S_XX, S_YY, S_ZZ, S_XY, S_XZ, S_YZ]
-# =======================
 
-import numpy as np, pandas as pd, math, sys, os
+# ---- 第二阶段: 高频 dump 加密 (None = 只做粗扫) ----
+REFINE_DUMP   = None       # 例 "ablate.lammpstrj"; 需含 v_MyTemp / c_MyKE 和 / 或应力列:
+                           #   v_s_*_gpa，或 c_MyStress[1..6] (+ c_MyVoro[1] 或 REFINE_V_ATOM_A3)
+                           #   缺温度列时 T 保留粗扫值 (1900k/in.gra_o 的 ablate dump 即如此)
+REFINE_V_ATOM_A3 = None    # dump 只有 c_MyStress 时的每原子体积 (Å^3), 例 62.35*64.8/1500*3.35 ≈ 9.02
+REFINE_DT_FS  = 0.1        # 该 dump 的 MD 步长 (fs)
+REFINE_T0_PS  = 0.0        # dump 时间 + T0 → 与 timeseries 的 time_ps 对齐
+# =======================
 
-if not os.path.exists(TS_CSV):
-    sys.exit(f"[ERR] 找不到 {TS_CSV}")
+import numpy as np, pandas as pd, sys, os
+from stress_tensor import add_invariants, DERIVED_COLS
+from presence import Track, first_true, masked_mean
 
-df = pd.read_csv(TS_CSV)
+if os.path.exists(TRACK_NPZ):
+    trk = Track.load(TRACK_NPZ)
+elif os.path.exists(TS_CSV):
+    trk = Track.from_long(pd.read_csv(TS_CSV), ["z", "T"] + STRESS_COLS)
+else:
+    sys.exit(f"[ERR] 找不到 {TRACK_NPZ} / {TS_CSV}")
 
 # ---- 时间窗裁剪 ----
-df = df[df["time_ps"].between(TIME_START_PS, TIME_END_PS)]
-if df.empty:
+trk  = trk.rows((trk.time_ps >= TIME_START_PS) & (trk.time_ps <= TIME_END_PS))
+pres = trk.present
+if not pres.any():
     sys.exit("[ERR] 时间窗内无数据")
+t, ids = trk.time_ps, trk.ids
+z, T   = trk.values["z"], trk.values["T"]
 
 # ---------- (1) 全局平均 T (500–3000 K) ----------
-(df[df["T"].between(500, 3000)]
-   .groupby("time_ps", sort=True)["T"]
-   .mean()
-   .reset_index()
-   .to_csv("all_T.csv", index=False))
+T_g  = pres & (T >= 500) & (T <= 3000)
+n_g  = T_g.sum(axis=1)
+keep = n_g > 0
+pd.DataFrame({"time_ps": t[keep],
+              "T": np.where(T_g, T, 0.0).sum(axis=1)[keep] / n_g[keep]}
+             ).to_csv("all_T.csv", index=False)
 print("[OK] all_T.csv 已保存")
 
-# ---------- (2) 跳点检测 + 应力统计 ----------
-rows = []
-for aid, g in df.groupby("id", sort=False):
-    g = g.sort_values("time_ps").reset_index(drop=True)
-
-    # —— 基线 z0 ——
-    z0_mask = g["time_ps"] <= (TIME_START_PS + BASE_WIN_PS)
-    if not z0_mask.any(): continue
-    z0 = g.loc[z0_mask, "z"].mean()
-
-    # —— 首帧抬升 ≥ Z_ABS_TH ——
-    idx_jump = np.where((g["z"] - z0) >= Z_ABS_TH)[0]
-    if idx_jump.size == 0: continue
-    i_jump  = idx_jump[0]
-    t_jump  = g.loc[i_jump, "time_ps"]
-
-    # —— 跳点 ±Δt 窗口 ——
-    win = g["time_ps"].between(t_jump - DT_AVG_PS, t_jump + DT_AVG_PS)
-    wdf = g.loc[win]
-
-    # —— 平均温度 ——
-    T_local = wdf["T"].mask(~wdf["T"].between(T_MIN, T_MAX))
-    if T_local.notna().empty: continue
-    avg_T = T_local.mean()
-
-    # —— 平均 6 应力分量 (若列不存在则 NaN) ——
-    stress_avg = {col: wdf[col].mean() if col in wdf else math.nan
-                  for col in STRESS_COLS}
-
-    # —— 等效应力与体应力 ——
-    sxx, syy, szz = [stress_avg[c] for c in (S_XX,S_YY,S_ZZ)]
-    if not math.isnan(sxx):
-        P_hydro = (sxx + syy + szz) / 3.0
-        sigma_dev = 0.5*math.sqrt((sxx-syy)**2 + (syy-szz)**2 + (szz-sxx)**2)
-    else:
-        P_hydro = sigma_dev = math.nan
-
-    rows.append(
-        [aid, t_jump,
-         t_jump-DT_AVG_PS, t_jump+DT_AVG_PS,
-         avg_T,
-         stress_avg[S_XX], stress_avg[S_YY], stress_avg[S_ZZ],
-         stress_avg[S_XY], stress_avg[S_XZ], stress_avg[S_YZ],
-         sigma_dev, P_hydro]
-    )
-
-cols = ["id","t_jump_ps","win_start_ps","win_end_ps","avg_T_K",
-        S_XX,S_YY,S_ZZ,S_XY,S_XZ,S_YZ,
-        "sigma_dev_GPa","P_hydro_GPa"]
-
-pd.DataFrame(rows, columns=cols).to_csv("jump_stats.csv", index=False)
-print(f"[OK] jump_stats.csv 已保存  (n={len(rows)})")
+# ---------- (2) 跳点检测 + 应力统计 (逐 id 向量化) ----------
+# —— 基线 z0: 前 BASE_WIN_PS 内在场帧的平均 ——
+in_base = pres & (t <= TIME_START_PS + BASE_WIN_PS)[:, None]
+has0 = in_base.any(axis=0)
+z0   = masked_mean(z, in_base)
+z0_of = dict(zip(ids[has0].tolist(), z0[has0].tolist()))   # id → 基线 z0 (加密阶段细化 t_jump 用)
+
+# —— 首个在场帧抬升 ≥ Z_ABS_TH ——
+i_jump = first_true(pres & ((z - z0) >= Z_ABS_TH))
+hit    = has0 & (i_jump >= 0)
+t_jump = t[i_jump[hit]]
+
+# —— 跳点 ±Δt 窗口 (只含在场帧) ——
+win = pres[:, hit] & (t[:, None] >= t_jump - DT_AVG_PS) & (t[:, None] <= t_jump + DT_AVG_PS)
+
+# —— 平均温度 (合法区间外视为坏值) / 6 应力分量 (列不存在则 NaN) ——
+T_w   = T[:, hit]
+avg_T = masked_mean(T_w, win & (T_w >= T_MIN) & (T_w <= T_MAX))
+nan   = np.full(hit.sum(), np.nan)
+stress_avg = {col: masked_mean(trk.values[col][:, hit], win) if col in trk.values else nan
+              for col in STRESS_COLS}
+
+base = ["id","t_jump_ps","win_start_ps","win_end_ps","avg_T_K",
+        S_XX,S_YY,S_ZZ,S_XY,S_XZ,S_YZ]
+cols = base + DERIVED_COLS
+rows = pd.DataFrame({"id": ids[hit], "t_jump_ps": t_jump,
+                     "win_start_ps": t_jump - DT_AVG_PS, "win_end_ps": t_jump + DT_AVG_PS,
+                     "avg_T_K": avg_T, **stress_avg})[base]
+
+# —— 等效应力 / 体应力 / 主应力: 对窗口平均后的张量一次性计算 ——
+out = add_invariants(rows, STRESS_COLS)
+
+# ---------- (3) 加密: 只读高频 dump 中跳点窗口内的帧 ----------
+if REFINE_DUMP and not out.empty:
+    from jump_refine import refine_jump_windows
+    fine = refine_jump_windows(REFINE_DUMP, out[["id", "t_jump_ps"]],
+                               REFINE_DT_FS, DT_AVG_PS, STRESS_COLS,
+                               t0_ps=REFINE_T0_PS, t_range=(T_MIN, T_MAX),
+                               z0=z0_of, z_th=Z_ABS_TH, v_atom_a3=REFINE_V_ATOM_A3)
+    out = out.merge(fine, on="id", how="left")
+    out["avg_T_K_coarse"] = out["avg_T_K"]
+    out["avg_T_K"] = out["T_fine_K"].fillna(out["avg_T_K"])
+    for col in STRESS_COLS:                    # dump 没有的分量保留粗扫值
+        if col + "_y" in out:
+            out[col] = out.pop(col + "_y").fillna(out.pop(col + "_x"))
+    out = add_invariants(out, STRESS_COLS)
+    out = out.drop(columns="T_fine_K")
+    out = out[cols + [c for c in out.columns if c not in cols]]
+    done = (["T"] if fine["T_fine_K"].notna().any() else []) + \
+           [c for c in STRESS_COLS if c in fine and fine[c].notna().any()]
+    print(f"[OK] 加密: {int(out['n_frames_fine'].notna().sum())} 个跳点窗口, "
+          f"重算 {done or '无'} ← {REFINE_DUMP}")
+
+out.to_csv("jump_stats.csv", index=False)
+print(f"[OK] jump_stats.csv 已保存  (n={len(out)})")
@@ -1,54 +1,161 @@
 #!/usr/bin/env python3
 # -------------------------------------------------------------
-# 递归扫描 *_jump_stats.csv  ➜  all_jump_stats.csv
+# 递归扫描 **/[0-9]*jump_stats.{csv,parquet}  ➜  all_jump_stats.csv
 # 自动保留 6 个应力分量列（若缺失填 NaN）
+#   - 线程池并行读取；装了 pyarrow 时用 pyarrow 的 CSV / Parquet 读取器 (释放 GIL)，
+#     否则退回 pandas C 引擎
+#   - 按 DTYPES 统一列类型，各 run 的列集合不同也能对齐
+#   - 增量追加: <OUT_FILE>.manifest.json 记录已并入的源文件 (大小 + mtime)，
+#     新 run 只追加到 master 末尾；已有源文件被改动 / 出现新列时才整体重写
+#   - RUN_MANIFEST (sweep.py 的 sweep_manifest.csv): 源文件路径中含某运行目录名时
+#     补上该运行的 vin_kms / seed / box 列 (文件名里没有温度时也用它的 T_K)
 # -------------------------------------------------------------
 
 # ===== USER CONFIG =====
 ROOT_DIR     = "jump_csv"            # 待扫描根目录
-GLOB_PATTERN = "[0-9]*jump_stats.csv"     # 文件通配
+GLOB_PATTERNS = ["**/[0-9]*jump_stats.csv",          # 文件通配 (** = 递归子目录)
+                 "**/[0-9]*jump_stats.parquet"]
 OUT_FILE     = "jump_csv/all_jump_stats.csv"
+N_THREADS    = 8
+REBUILD      = False                 # True = 忽略 manifest，整体重写
 
 # 从文件名提取运行温度标签（500k / 1200K …）
 REGEX_TEMP   = r'(\d+)[Kk]'
+RUN_MANIFEST = None                  # 例 "../../6_out/006_2km_opt/sweep_manifest.csv"
+MANIFEST_COLS = ["vin_kms", "seed", "box"]
 
 # 想保留的应力列名（与 extxyz / timeseries 写入保持一致）
 STRESS_COLS  = [
     "v_s_xx_gpa", "v_s_yy_gpa", "v_s_zz_gpa",
     "v_s_xy_gpa", "v_s_xz_gpa", "v_s_yz_gpa"
 ]
+# 显式列类型；未列出的数值列一律 float64
+DTYPES = {"id": "Int64", "run_T_K": "Int64", "src": "string", "seed": "Int64", "box": "string"}
 # =======================
 
-import os, glob, re, pandas as pd
+import os, glob, re, json
+import numpy as np, pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 
-rows = []
-for path in glob.glob(os.path.join(ROOT_DIR, GLOB_PATTERN), recursive=True):
-    df = pd.read_csv(path)
+try:
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa_csv = None
+
+MANIFEST = OUT_FILE + ".manifest.json"
+RUNS = (pd.read_csv(RUN_MANIFEST).assign(key=lambda d: d["run_dir"].map(os.path.basename))
+        .set_index("key") if RUN_MANIFEST else None)
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def find_sources(root, patterns):
+    out = set()
+    for pat in patterns:
+        out.update(glob.glob(os.path.join(root, pat), recursive=True))
+    out.discard(os.path.normpath(OUT_FILE))
+    return sorted(out)
+
+
+def read_one(path):
+    """读单个 jump_stats，补 run_T_K / src / 应力列，统一类型。"""
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+    elif pa_csv is not None:
+        df = pa_csv.read_csv(path).to_pandas()
+    else:
+        df = pd.read_csv(path, engine="c")
     if df.empty:
-        continue
+        return df
 
     # ---- 解析文件名中的温度标签 ----
     m = re.search(REGEX_TEMP, os.path.basename(path))
-    df["run_T_K"] = int(m.group(1)) if m else None
+    df["run_T_K"] = int(m.group(1)) if m else pd.NA
     df["src"]     = os.path.relpath(path, ROOT_DIR)
 
+    # ---- 扫描清单: 路径中出现的运行目录 → 参数列 ----
+    if RUNS is not None:
+        hit = [p for p in reversed(os.path.normpath(path).split(os.sep)) if p in RUNS.index]
+        if hit:
+            run = RUNS.loc[hit[0]]
+            for c in MANIFEST_COLS:
+                df[c] = run[c]
+            if not m:
+                df["run_T_K"] = int(run["T_K"])
+
     # ---- 确保应力 6 列都存在 ----
     for col in STRESS_COLS:
         if col not in df.columns:
-            df[col] = pd.NA          # 用 <NA> 占位，方便 concat
+            df[col] = np.nan
+    return unify(df)
 
-    rows.append(df)
 
-# ---- 合并 & 输出 ----
-if rows:
-    master = pd.concat(rows, ignore_index=True)
+def unify(df):
+    for c in df.columns:
+        if c in DTYPES:
+            df[c] = df[c].astype(DTYPES[c])
+        elif pd.api.types.is_numeric_dtype(df[c]) or df[c].isna().all():
+            df[c] = df[c].astype("float64")
+    return df
 
-    # 按惯例把关键信息放前面（可选）
-    front_cols = ["id", "avg_T_K", "t_jump_ps"] + STRESS_COLS
-    front_cols = [c for c in front_cols if c in master.columns]
-    master = master[ front_cols + [c for c in master.columns if c not in front_cols] ]
 
-    master.to_csv(OUT_FILE, index=False)
-    print(f"[✓] 汇总完成 → {OUT_FILE}  (n={len(master)})")
-else:
+def order_columns(cols):
+    # 按惯例把关键信息放前面
+    front = [c for c in ["id", "avg_T_K", "t_jump_ps"] + STRESS_COLS if c in cols]
+    return front + [c for c in cols if c not in front]
+
+
+def load_manifest():
+    if REBUILD or not (os.path.exists(MANIFEST) and os.path.exists(OUT_FILE)):
+        return None
+    with open(MANIFEST) as f:
+        return json.load(f)
+
+
+# ---- 哪些源需要读 ----
+sources  = find_sources(ROOT_DIR, GLOB_PATTERNS)
+manifest = load_manifest()
+stamps   = {p: _stamp(p) for p in sources}
+if manifest is not None:
+    done = manifest["sources"]
+    stale = [p for p in done if p not in stamps or stamps[p] != done[p]]
+    if stale:
+        print(f"[INFO] {len(stale)} 个已并入的源文件被改动 / 删除 → 整体重写")
+        manifest = None
+todo = sources if manifest is None else [p for p in sources if p not in manifest["sources"]]
+
+with ThreadPoolExecutor(max_workers=N_THREADS) as ex:
+    parts = [df for df in ex.map(read_one, todo) if not df.empty]
+
+# ---- 合并 & 输出 ----
+if manifest is not None and not parts:
+    print(f"[✓] 无新文件，{OUT_FILE} 保持不变  (已并入 {len(manifest['sources'])} 个)")
+elif not parts:
     print("[!] 未找到匹配文件，或全部为空")
+else:
+    new = pd.concat(parts, ignore_index=True)
+    if manifest is not None and set(new.columns) <= set(manifest["columns"]):
+        cols = manifest["columns"]
+        new  = new.reindex(columns=cols)
+        new.to_csv(OUT_FILE, mode="a", header=False, index=False)
+        print(f"[✓] 追加 {len(todo)} 个文件 → {OUT_FILE}  (+{len(new)} 行)")
+        n_total = manifest["n_rows"] + len(new)
+    else:
+        if manifest is not None:                   # 出现新列 → 与旧数据一起重写
+            print("[INFO] 新文件带来新列 → 整体重写")
+            with ThreadPoolExecutor(max_workers=N_THREADS) as ex:
+                old = [df for df in ex.map(read_one, manifest["sources"]) if not df.empty]
+            new = pd.concat(old + [new], ignore_index=True)
+            todo = sources
+        cols = order_columns(list(new.columns))
+        new  = new[cols]
+        new.to_csv(OUT_FILE, index=False)
+        print(f"[✓] 汇总完成 → {OUT_FILE}  (n={len(new)})")
+        n_total = len(new)
+    done = {} if manifest is None else dict(manifest["sources"])
+    done.update({p: stamps[p] for p in todo})
+    with open(MANIFEST, "w") as f:
+        json.dump({"columns": cols, "n_rows": n_total, "sources": done}, f, indent=1)
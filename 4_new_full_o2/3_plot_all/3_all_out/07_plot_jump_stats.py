@@ -4,6 +4,7 @@
 #   B) 汇总直方图 : 正态拟合 + 三条参考线
 #                   (实红 = 样本均值, 实橙 = 样本P分位,
 #                    虚黑 = 正态P分位)
+#                   各量附 bootstrap 置信区间 (bootstrap.py) → ci_all_jump.csv
 # -------------------------------------------------------------
 
 # ===== USER CONFIG =====
@@ -15,11 +16,14 @@ ALL_FILE   = "jump_csv/all_jump_stats.csv"
 P_PERCENT  = 0.20      # 0.20 → 20 %    0.80 → 80 %
 BIN_SIZE_K = 100       # 直方图 bin 宽 (K)
 OUT_DIR    = "jump_csv/plots"
+N_BOOT     = 2000      # bootstrap 重抽样次数 (0 = 不算置信区间)
+CI_LEVEL   = 0.95
 # =======================
 
 import os, glob, numpy as np, pandas as pd
 import matplotlib.pyplot as plt, seaborn as sns
 from scipy.stats import norm
+from bootstrap import describe_ci
 
 os.makedirs(OUT_DIR, exist_ok=True)
 sns.set(style="whitegrid"); plt.rcParams["font.size"] = 11
@@ -61,6 +65,14 @@ if os.path.exists(ALL_FILE):
         mean_sample  = data.mean()
         perc_sample  = all_df["avg_T_K"].quantile(P_PERCENT)
 
+        # —— bootstrap 置信区间 ——
+        ci_txt = {}
+        if N_BOOT:
+            tab = describe_ci(data, P_PERCENT, B=N_BOOT, level=CI_LEVEL)
+            tab.to_csv(f"{OUT_DIR}/ci_all_jump.csv", index=False)
+            ci_txt = {r.stat: f" [{r.ci_lo:.1f}, {r.ci_hi:.1f}]" for r in tab.itertuples()}
+        q_key = f"q{P_PERCENT:g}"
+
         # —— 直方图 —— (密度归一化)
         plt.figure(figsize=(6,4))
         bins = np.arange(0, data.max()+BIN_SIZE_K, BIN_SIZE_K)
@@ -72,25 +84,25 @@ if os.path.exists(ALL_FILE):
         xs = np.linspace(0, data.max()*1.05, 400)
         plt.plot(xs, norm.pdf(xs, mu, sigma),
                  'k-', lw=2,
-                 label=f"Normal fit  μ={mu:.1f}, σ={sigma:.1f}")
+                 label=f"Normal fit  μ={mu:.1f}{ci_txt.get('norm_mu', '')}, σ={sigma:.1f}")
 
         # —— 样本均值 & 分位 ——
         plt.axvline(mean_sample,  color="red",   lw=1.6,
-                    label=f"mean {mean_sample:.1f} K")
+                    label=f"mean {mean_sample:.1f}{ci_txt.get('mean', '')} K")
         plt.axvline(perc_sample,  color="orange",lw=1.6,
-                    label=f"{int(P_PERCENT*100)} % ≤ {perc_sample:.1f} K")
+                    label=f"{int(P_PERCENT*100)} % ≤ {perc_sample:.1f}{ci_txt.get(q_key, '')} K")
 
         # —— 正态 P-percent 分位 (黑虚线) ——
         perc_norm = norm.ppf(P_PERCENT, mu, sigma)
         plt.axvline(perc_norm, color="black", ls="--", lw=1.6,
-                    label=f"Normal {int(P_PERCENT*100)} % = {perc_norm:.1f} K")
+                    label=f"Normal {int(P_PERCENT*100)} % = {perc_norm:.1f}{ci_txt.get('norm_' + q_key, '')} K")
 
         plt.xlabel("avg T near jump (K)")
         plt.ylabel("density")
         plt.legend(); plt.tight_layout()
         plt.savefig(f"{OUT_DIR}/hist_all_jump.png", dpi=300); plt.close()
         print(f"[✓] hist_all_jump.png  |  μ={mu:.1f} σ={sigma:.1f}  "
-              f"|  Norm-{int(P_PERCENT*100)} %={perc_norm:.1f} K")
+              f"|  Norm-{int(P_PERCENT*100)} %={perc_norm:.1f}{ci_txt.get('norm_' + q_key, '')} K")
     else:
         print("[!] all_jump_stats.csv 为空")
 else:
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -------------------------------------------------------------
-# 为后续作图准备数据：在跳点记录中追加等效应力指标
+# 为后续作图准备数据：确保跳点记录带有等效应力指标 (缺列才补算)
 # -------------------------------------------------------------
 
 # ===== USER CONFIG =====
@@ -13,7 +13,8 @@ S_XX_COL, S_YY_COL, S_ZZ_COL = "v_s_xx_gpa", "v_s_yy_gpa", "v_s_zz_gpa"
 TAU_XY_COL, TAU_YZ_COL, TAU_XZ_COL = "v_s_xy_gpa", "v_s_yz_gpa", "v_s_xz_gpa"
 # =======================
 
-import pandas as pd, numpy as np, os, sys
+import pandas as pd, os, sys
+from stress_tensor import add_invariants
 
 if not os.path.exists(IN_CSV):
     sys.exit(f"[ERR] 找不到 {IN_CSV}")
@@ -23,20 +24,13 @@ miss = [c for c in [S_XX_COL,S_YY_COL,S_ZZ_COL] if c not in df.columns]
 if miss:
     sys.exit(f"[ERR] 缺少应力列 {miss}")
 
-# ---- 体应力 & Deviatoric ----
-sxx, syy, szz = [df[c].astype(float) for c in (S_XX_COL,S_YY_COL,S_ZZ_COL)]
-
-df["P_hydro_GPa"]   = (sxx + syy + szz) / 3.0
-# 计算 P_hydro 之后紧跟着加
-df["sigma_dev_signed_GPa"] = np.sign(df["P_hydro_GPa"]) * df["sigma_dev_GPa"]
-
-df["sigma_dev_GPa"] = 0.5 * np.sqrt( (sxx-syy)**2 + (syy-szz)**2 + (szz-sxx)**2 )
-
-# ---- von Mises (若有剪切) ----
+# ---- 派生量 (P_hydro / σ_dev / σ_vm / 带符号变体 / 主应力) ----
+# 05a 已按窗口平均张量写好这些列；这里只给旧版 jump_stats 补缺的列，公式统一在 stress_tensor.py
 have_shear = all(c in df.columns for c in (TAU_XY_COL,TAU_YZ_COL,TAU_XZ_COL))
-if have_shear:
-    txy, tyz, txz = [df[c].astype(float) for c in (TAU_XY_COL,TAU_YZ_COL,TAU_XZ_COL)]
-    df["sigma_vm_GPa"] = np.sqrt(df["sigma_dev_GPa"]**2 + 3*(txy**2 + tyz**2 + txz**2))
+if not have_shear:
+    print("[!] 无剪切分量 → sigma_vm / 主应力为 NaN")
+df = add_invariants(df, [S_XX_COL,S_YY_COL,S_ZZ_COL,TAU_XY_COL,TAU_XZ_COL,TAU_YZ_COL],
+                    overwrite=False)
 
 df.to_csv(OUT_CSV, index=False)
 print(f"[✓] 写出 {OUT_CSV}  (n={len(df)})")
@@ -13,11 +13,16 @@ SIG_EQ_COL = "sigma_dev_signed_GPa"
 P_PERCENT     = 0.20                  # 20 %
 BIN_K         = 0.5                   # 直方图 bin 宽 (GPa)
 KDE_GRIDSIZE  = 100
+N_BOOT        = 2000                  # bootstrap 重抽样次数 (0 = 不算置信区间)
+CI_LEVEL      = 0.95
+KDE_CUT       = 3.0                   # 网格向数据范围外延伸几个带宽 (同 seaborn cut=3)
 # =======================
 
 import os, numpy as np, pandas as pd
 import matplotlib.pyplot as plt, seaborn as sns
 from scipy.stats import norm
+from kde_fast import kde2d_grid, bw_factor, hdr_levels
+from bootstrap import describe_ci
 
 os.makedirs(OUT_DIR, exist_ok=True)
 sns.set(style="whitegrid"); plt.rcParams["font.size"] = 11
@@ -44,6 +49,11 @@ if all(c in df.columns for c in ["v_s_xy_gpa","v_s_zz_gpa"]):
 sig = df[SIG_EQ_COL].values
 mu, sigma = norm.fit(sig)
 sig_min, sig_max = sig.min(), sig.max()
+ci_txt, q_key = {}, f"q{P_PERCENT:g}"
+if N_BOOT:
+    tab = describe_ci(sig, P_PERCENT, B=N_BOOT, level=CI_LEVEL)
+    tab.to_csv(f"{OUT_DIR}/ci_{SIG_EQ_COL}.csv", index=False)
+    ci_txt = {r.stat: f" [{r.ci_lo:.2f}, {r.ci_hi:.2f}]" for r in tab.itertuples()}
 bins = np.arange(np.floor(sig_min) - BIN_K, sig_max + BIN_K, BIN_K)
 
 plt.figure(figsize=(6,4))
@@ -51,26 +61,30 @@ plt.hist(sig, bins=bins, color="skyblue", edgecolor="k",
          alpha=.7, density=True, label="hist")
 xs = np.linspace(sig.min()*1.05, sig.max()*1.05, 400)
 plt.plot(xs, norm.pdf(xs, mu, sigma), 'k-', lw=2,
-         label=f"Normal μ={mu:.2f}, σ={sigma:.2f} GPa")
+         label=f"Normal μ={mu:.2f}{ci_txt.get('norm_mu', '')}, σ={sigma:.2f} GPa")
 perc = np.quantile(sig, P_PERCENT)
-plt.axvline(sig.mean(), color="red",   lw=1.6, label=f"mean {sig.mean():.2f}")
+plt.axvline(sig.mean(), color="red",   lw=1.6, label=f"mean {sig.mean():.2f}{ci_txt.get('mean', '')}")
 plt.axvline(perc,       color="orange",lw=1.6,
-            label=f"{int(P_PERCENT*100)} % ≤ {perc:.2f}")
+            label=f"{int(P_PERCENT*100)} % ≤ {perc:.2f}{ci_txt.get(q_key, '')}")
 plt.axvline(norm.ppf(P_PERCENT, mu, sigma), ls="--", color="black", lw=1.6,
-            label=f"N({P_PERCENT*100:.0f}%) {norm.ppf(P_PERCENT,mu,sigma):.2f}")
+            label=f"N({P_PERCENT*100:.0f}%) {norm.ppf(P_PERCENT,mu,sigma):.2f}{ci_txt.get('norm_' + q_key, '')}")
 plt.xlabel(f"{SIG_EQ_COL} (GPa)"); plt.ylabel("density")
 plt.legend(); plt.tight_layout()
 plt.savefig(f"{OUT_DIR}/hist_{SIG_EQ_COL}.png", dpi=300); plt.close()
 
-# ───────── 4. T-σeq 二维 KDE (修正 x= y=) ─────────
-plt.figure(figsize=(6,5))
-sns.kdeplot(
-    data=df, x="avg_T_K", y=SIG_EQ_COL,
-    cmap="rocket", fill=True, thresh=0.02, levels=100,
-    gridsize=KDE_GRIDSIZE
-)
-plt.xlabel("avg T near jump (K)")
-plt.ylabel(f"{SIG_EQ_COL} (GPa)")
-plt.tight_layout(); plt.savefig(f"{OUT_DIR}/kde_T_sigma.png", dpi=300); plt.close()
+# ───────── 4. T-σeq 二维 KDE (分箱 + FFT，等价 sns.kdeplot thresh=0.02, levels=100) ─────────
+if len(df) >= 3:
+    xs_, ys_ = df["avg_T_K"].to_numpy(float), df[SIG_EQ_COL].to_numpy(float)
+    f = bw_factor(len(xs_))
+    gx = np.linspace(xs_.min() - KDE_CUT*f*xs_.std(ddof=1), xs_.max() + KDE_CUT*f*xs_.std(ddof=1), KDE_GRIDSIZE)
+    gy = np.linspace(ys_.min() - KDE_CUT*f*ys_.std(ddof=1), ys_.max() + KDE_CUT*f*ys_.std(ddof=1), KDE_GRIDSIZE)
+    dens = kde2d_grid(xs_, ys_, gx, gy)
+    # seaborn 的 levels = 等值线以下的质量比例 (thresh … 1)
+    lev = np.unique(hdr_levels(dens, 1.0, 1 - np.linspace(0.02, 1, 100), normalize=True))
+    plt.figure(figsize=(6,5))
+    plt.contourf(gx, gy, dens, levels=np.unique(np.r_[lev, dens.max()]), cmap="rocket")
+    plt.xlabel("avg T near jump (K)")
+    plt.ylabel(f"{SIG_EQ_COL} (GPa)")
+    plt.tight_layout(); plt.savefig(f"{OUT_DIR}/kde_T_sigma.png", dpi=300); plt.close()
 
 print("[✓] 全部图像已输出到", OUT_DIR)
@@ -2,7 +2,8 @@
 # -------------------------------------------------------------
 #   生成 train_escape_map.csv  (T_K, sigma_GPa, escape)
 #   正样本: jump_stats.csv 里各 id 的 t_jump
-#   负样本: 每个 id 在 (t_jump-3 ps , t_jump) 内均匀挑 10 帧
+#   负样本: 每个 (run_T_K, id) 在 [t_jump-3 ps , t_jump) 内均匀挑 10 帧
+#           (全部时间序列拼成一张表，与跳点表连接一次后向量化抽取)
 # -------------------------------------------------------------
 
 # ===== USER CONFIG =====
@@ -10,34 +11,29 @@ JUMP_CSV        = "jump_csv/stress_jump_stats.csv"    # 正样本
 TS_CSV_PATTERN  = "escape_csv/*escape_timeseries*.csv"
 PRE_WINDOW_PS   = 3.0            # 跳点前多远作为负样本池
 NEG_POINTS_PER  = 10             # 每个 id 均匀取多少帧
+NEG_MODE        = "uniform"      # "uniform" (窗口内等间距) | "stratified" (等分时段内随机)
+SEED            = 0              # stratified 的随机种子
 T_RANGE         = (500, 3000)    # 过滤极端温度
 SIG_TARGET      = "sigma_dev_signed_GPa"
 OUT_TRAIN       = "train_escape_map.csv"
 REGEX_TEMP      = r'(\d+)[Kk]'   # 文件名里提 run_T_K
+EXTRA_COLS      = ["v_s_xx_gpa", "v_s_yy_gpa", "v_s_zz_gpa",    # 额外特征 (两边都有才带上)
+                   "v_s_xy_gpa", "v_s_xz_gpa", "v_s_yz_gpa"]
 # =======================
 
-import os, re, glob, math
+import os, re, glob
 import numpy as np, pandas as pd
+from stress_tensor import add_invariants
 
 # ---------- util: 确保有 sigma_dev_signed_GPa ----------
 def add_sigma_signed(df):
+    """02 / 05a 已写好派生列；旧文件缺列时按 stress_tensor.py 的统一公式补算。"""
     if SIG_TARGET in df.columns:
         return df
-    alt = [c for c in ["sigma_dev_GPa", "sigma_vm_GPa"] if c in df.columns]
-    if alt:                     # 直接复用单列
-        df[SIG_TARGET] = df[alt[0]]
-        return df
-
-    need = ["v_s_xx_gpa","v_s_yy_gpa","v_s_zz_gpa",
-            "v_s_xy_gpa","v_s_xz_gpa","v_s_yz_gpa"]
-    if all(c in df.columns for c in need):
-        sx, sy, sz = (df[c] for c in need[:3])
-        txy, txz, tyz = (df[c] for c in need[3:])
-        sigma_eq = np.sqrt(((sx - sy)**2 + (sy - sz)**2 + (sz - sx)**2 +
-                            6*(txy**2 + txz**2 + tyz**2))/2.0)
-        df[SIG_TARGET] = np.sign(sz) * sigma_eq
-        return df
-    raise KeyError(f"无法构造 {SIG_TARGET}")
+    df = add_invariants(df, overwrite=False)
+    if SIG_TARGET not in df.columns:
+        raise KeyError(f"无法构造 {SIG_TARGET} (缺少正应力分量)")
+    return df
 
 # ---------- 1) 读正样本 jump_stats ----------
 jump_df = pd.read_csv(JUMP_CSV)
@@ -48,47 +44,78 @@ jump_df = jump_df.rename(columns={"avg_T_K":"T_K",
 jump_df["escape"] = 1
 print(f"[INFO] 正样本 {len(jump_df)} 条")
 
-# 按 id -> t_jump 映射，便于后面查找窗口
-id2tjump = jump_df.set_index("id")["t_jump_ps"].to_dict()
+# 键 = (run_T_K, id)：不同温度 run 的原子 id 会重号
+KEYS = ["run_T_K", "id"] if "run_T_K" in jump_df.columns else ["id"]
+if KEYS == ["id"]:
+    print("[!] jump_df 无 run_T_K 列，只按 id 匹配 (多温度合并时 id 会冲突)")
+if jump_df.duplicated(KEYS).any():
+    print(f"[!] {KEYS} 有重复的跳点记录，只保留第一条")
+jumps = jump_df.drop_duplicates(KEYS)[KEYS + ["t_jump_ps"]]
+
+
+# ---------- util: 一次性抽负样本 ----------
+def sample_negatives(ts, jumps, keys, pre_ps, n_per, mode="uniform", seed=0):
+    """
+    ts 与 jumps 按 keys 连接一次 → 窗口 [t_jump-pre_ps, t_jump) 掩码 → 按 (keys, time) 排序，
+    每组的起点 / 行数由 ngroup 一次求出:
+      uniform    : 组内第 ⌊k(s-1)/(n-1)⌋ 行 (= np.linspace(0, s-1, n, dtype=int))
+      stratified : 窗口等分 n 段，每段随机取 1 行 (空段跳过)
+    """
+    d = ts.merge(jumps, on=keys, how="inner")
+    d = d[(d["time_ps"] >= d["t_jump_ps"] - pre_ps) & (d["time_ps"] < d["t_jump_ps"])]
+    if d.empty:
+        return d
+    d = d.sort_values(keys + ["time_ps"], kind="mergesort").reset_index(drop=True)
+    gid   = d.groupby(keys, sort=False).ngroup().to_numpy()
+    start = np.flatnonzero(np.r_[True, gid[1:] != gid[:-1]])
+    size  = np.diff(np.r_[start, len(d)])
+
+    if mode == "uniform":
+        k = np.arange(n_per)
+        rows = (start[:, None] + k[None, :] * (size[:, None] - 1) // max(n_per - 1, 1)).ravel()
+    elif mode == "stratified":
+        rng = np.random.default_rng(seed)
+        frac = (d["time_ps"] - (d["t_jump_ps"] - pre_ps)).to_numpy() / pre_ps
+        key  = gid * n_per + np.minimum((frac * n_per).astype(int), n_per - 1)
+        order = np.lexsort((rng.random(len(d)), key))
+        ks = key[order]
+        rows = np.sort(order[np.r_[True, ks[1:] != ks[:-1]]])
+    else:
+        raise ValueError(f"NEG_MODE 只能是 'uniform' 或 'stratified': {mode}")
+    return d.iloc[rows]
 
-# ---------- 2) 为每个 id 抽负样本 ----------
-neg_frames = []
-for ts_path in glob.glob(TS_CSV_PATTERN):
+
+# ---------- 2) 读全部时间序列，一次性抽负样本 ----------
+ts_frames = []
+for ts_path in sorted(glob.glob(TS_CSV_PATTERN)):
     ts = pd.read_csv(ts_path)
     if ts.empty:
         continue
-
     ts = add_sigma_signed(ts)
     ts = ts[ts["T"].between(*T_RANGE)]
 
     # Parse run_T_K from file name
     m = re.search(REGEX_TEMP, os.path.basename(ts_path))
-    runT = int(m.group(1)) if m else None
-    ts["run_T_K"] = runT
-
-    # 只保留 jump_df 中出现过的 id
-    ts = ts[ts["id"].isin(id2tjump)]
-    if ts.empty:
-        continue
-
-    # 对每个 id 生成局部负样本
-    for aid, g in ts.groupby("id"):
-        t_jump = id2tjump[aid]
-        win = g[g["time_ps"].between(t_jump-PRE_WINDOW_PS, t_jump, inclusive="left")]
-        if win.empty:
-            continue
-        # 均匀抽 NEG_POINTS_PER 个索引
-        idxs = np.linspace(0, len(win)-1, NEG_POINTS_PER, dtype=int)
-        sub = win.iloc[idxs][["id","T","run_T_K", SIG_TARGET]].copy()
-        neg_frames.append(sub)
+    ts["run_T_K"] = int(m.group(1)) if m else np.nan
+    cols = ["id", "time_ps", "T", "run_T_K", SIG_TARGET] + [c for c in EXTRA_COLS if c in ts.columns]
+    ts_frames.append(ts[cols])
 
-neg_df = (pd.concat(neg_frames, ignore_index=True)
+if not ts_frames:
+    raise SystemExit(f"[ERR] {TS_CSV_PATTERN} 没有可用的时间序列")
+ts_all = pd.concat(ts_frames, ignore_index=True)
+if KEYS[0] == "run_T_K":                      # 两边 dtype 对齐 (int / float) 再连接
+    ts_all["run_T_K"]  = ts_all["run_T_K"].astype(float)
+    jumps = jumps.assign(run_T_K=jumps["run_T_K"].astype(float))
+neg_df = (sample_negatives(ts_all, jumps, KEYS, PRE_WINDOW_PS, NEG_POINTS_PER, NEG_MODE, SEED)
+            .drop(columns="t_jump_ps")
             .rename(columns={"T":"T_K", SIG_TARGET:"sigma_GPa"}))
 neg_df["escape"] = 0
 print(f"[INFO] 负样本 {len(neg_df)} 条")
 
 # ---------- 3) 合并 & 导出 ----------
-out = pd.concat([jump_df[["id","T_K","run_T_K","sigma_GPa","escape"]],
-                 neg_df], ignore_index=True)
+extra = [c for c in EXTRA_COLS if c in jump_df.columns and c in neg_df.columns]
+out = pd.concat([jump_df[["id","T_K","run_T_K","sigma_GPa"] + extra + ["escape"]],
+                 neg_df[["id","T_K","run_T_K","sigma_GPa"] + extra + ["escape"]]],
+                ignore_index=True)
 out.to_csv(OUT_TRAIN, index=False)
 print(f"[✓] 训练集写出 → {OUT_TRAIN}  (total={len(out)})")
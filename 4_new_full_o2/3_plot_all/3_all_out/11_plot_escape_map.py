@@ -1,54 +1,52 @@
 #!/usr/bin/env python3
 # -------------------------------------------------------------
 #  (T , σ_dev_signed) → P_escape 的 2-D 判逃面
-#  支持 LogisticRegression 或 SVM-RBF
+#  支持 LogisticRegression / SVM-RBF / SGD / Nystroem 核近似 (见 escape_map.py)
+#  拟合好的模型按训练集哈希缓存；网格分块预测
 # -------------------------------------------------------------
 
 # ===== USER CONFIG =====
 TRAIN_CSV = "train_escape_map.csv"   # 由 10_prepare_escape_map_v2.py 生成
-MODEL_TYPE = "logit"                 # "logit" | "svm"
+MODEL_TYPE = "logit"                 # "logit" | "svm" | "sgd" | "nystroem" | "auto"
 GRID_T   = (500, 3000, 150)          # 温度网格  (min, max, N)
 GRID_S   = (-20,   25, 150)          # σ_dev 网格 (GPa)
 OUT_DIR  = "jump_csv/escape_map"     # 输出目录
+MODEL_PARAMS = {}                    # 超参数 (取 11a_cv_escape_map.py 的最优行)
+FEATURES = ["T_K", "sigma_GPa"]      # 前两列为画图两轴；其余特征在网格上固定为训练集中位数
+REFIT    = False                     # True = 忽略模型缓存重新拟合
+N_BOOT   = 2000                      # AUC 的 bootstrap 次数 (0 = 不算置信区间)
 # =======================
 
 import os, numpy as np, pandas as pd, matplotlib.pyplot as plt, seaborn as sns
-from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline      import make_pipeline
-from sklearn.linear_model  import LogisticRegression
-from sklearn.svm           import SVC
 from sklearn.metrics       import roc_auc_score
+from escape_map            import fit_cached, predict_proba_chunked, predict_grid
+from bootstrap             import boot_auc, ci
 
 os.makedirs(OUT_DIR, exist_ok=True)
 sns.set(style="whitegrid"); plt.rcParams["font.size"] = 11
 
 # ---------- 1. 读训练集 ----------
 df = (pd.read_csv(TRAIN_CSV)
-        .dropna(subset=["T_K", "sigma_GPa", "escape"]))   # 去掉 NaN
+        .dropna(subset=FEATURES + ["escape"]))            # 去掉 NaN
 print(f"[INFO] 样本量 = {len(df)}  (正 {df['escape'].sum()} / 负 {len(df)-df['escape'].sum()})")
 
-X = df[["T_K", "sigma_GPa"]].to_numpy()
+X = df[FEATURES].to_numpy()
 y = df["escape"].astype(int).to_numpy()
 
-# ---------- 2. 拟合模型 ----------
-if MODEL_TYPE == "logit":
-    model = make_pipeline(StandardScaler(),
-                          LogisticRegression(max_iter=1000))
-elif MODEL_TYPE == "svm":
-    model = make_pipeline(StandardScaler(),
-                          SVC(kernel="rbf", probability=True, gamma="scale"))
-else:
-    raise ValueError("MODEL_TYPE 只能是 'logit' 或 'svm'")
-model.fit(X, y)
-auc = roc_auc_score(y, model.predict_proba(X)[:, 1])
-print(f"[INFO] 训练 AUC = {auc:.3f}")
+# ---------- 2. 拟合模型 (有缓存则直接载入) ----------
+model, mtype, cached = fit_cached(X, y, TRAIN_CSV, MODEL_TYPE, FEATURES,
+                                  cache_dir=os.path.join(OUT_DIR, ".model_cache"),
+                                  rebuild=REFIT, params=MODEL_PARAMS)
+print(f"[INFO] 模型 = {mtype}" + ("  (缓存)" if cached else ""))
+p_train = predict_proba_chunked(model, X)
+auc = roc_auc_score(y, p_train)
+auc_ci = ci(boot_auc(y, p_train, B=N_BOOT)) if N_BOOT else (np.nan, np.nan)
+print(f"[INFO] 训练 AUC = {auc:.3f}  (95% CI [{auc_ci[0]:.3f}, {auc_ci[1]:.3f}], 样本内)")
 
-# ---------- 3. 网格预测 ----------
+# ---------- 3. 网格预测 (分块) ----------
 T_lin = np.linspace(*GRID_T)
 S_lin = np.linspace(*GRID_S)
-TT, SS = np.meshgrid(T_lin, S_lin)
-grid   = np.c_[TT.ravel(), SS.ravel()]
-PP     = model.predict_proba(grid)[:,1].reshape(TT.shape)
+TT, SS, PP = predict_grid(model, T_lin, S_lin, extra=np.median(X[:, 2:], axis=0))
 
 # ---------- 4. 画判逃面 ----------
 plt.figure(figsize=(7,5))
@@ -61,16 +59,16 @@ plt.contour(TT, SS, PP, levels=[0.5], colors="cyan",
             linewidths=2, linestyles="--")
 
 # 训练散点
-sns.scatterplot(data=df, x="T_K", y="sigma_GPa", hue="escape",
+sns.scatterplot(data=df, x=FEATURES[0], y=FEATURES[1], hue="escape",
                 palette={0:"#1f77b4", 1:"#ff7f0e"},
                 edgecolor="k", linewidth=.3, s=26, alpha=.6)
 
 plt.xlabel("Temperature (K)")
 plt.ylabel("signed σ_dev (GPa)")
-plt.title(f"Escape probability map  ({MODEL_TYPE},  AUC={auc:.3f})")
+plt.title(f"Escape probability map  ({mtype},  AUC={auc:.3f})")
 plt.legend(title="escape", loc="upper left")
 plt.tight_layout()
-out_png = f"{OUT_DIR}/escape_map_{MODEL_TYPE}.png"
+out_png = f"{OUT_DIR}/escape_map_{mtype}.png"
 plt.savefig(out_png, dpi=300)
 plt.close()
 print(f"[✓] 判逃面保存 → {out_png}")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------
+#  判逃面模型选择: 分组交叉验证 (组 = 原子 id)
+#   同一原子的正样本 (跳点) 与负样本 (跳点前几帧) 永远落在同一折，
+#   避免"见过这个原子"带来的虚高 AUC
+#   每个 (模型, 超参数, 特征组) 一行；各折 joblib 并行，结果按配置缓存
+#   输出 cv_results.csv (按 auc_mean 降序)，第一行即 11_plot_escape_map.py
+#   应填的 MODEL_TYPE / MODEL_PARAMS / FEATURES
+# -------------------------------------------------------------
+
+# ===== USER CONFIG =====
+TRAIN_CSV  = "train_escape_map.csv"          # 由 10_prepare_escape_map.py 生成
+GROUP_COLS = ["id"]                          # 分组列; 各温度 run 的 id 重号时可改 ["run_T_K", "id"]
+N_SPLITS   = 5
+N_JOBS     = -1                              # joblib 并行进程数 (-1 = 全部核)
+FEATURE_SETS = [
+    ["T_K", "sigma_GPa"],
+    ["T_K", "sigma_GPa", "run_T_K"],
+    ["T_K", "sigma_GPa", "v_s_zz_gpa", "v_s_xy_gpa"],
+]
+SEARCH = {                                   # 模型 → 超参数网格 (pipeline 步骤名__参数)
+    "logit":    [{"logisticregression__C": c} for c in (0.01, 0.1, 1, 10)],
+    "svm":      [{"svc__C": c, "svc__gamma": g} for c in (0.3, 1, 3, 10) for g in ("scale", 0.1, 1.0)],
+    "nystroem": [{"nystroem__gamma": g, "sgdclassifier__alpha": a}
+                 for g in (0.1, 0.5, 2.0) for a in (1e-5, 1e-4, 1e-3)],
+}
+OUT_DIR    = "jump_csv/escape_map"
+REFIT      = False                           # True = 忽略 CV 缓存重新计算
+# =======================
+
+import os, json, itertools
+import numpy as np, pandas as pd
+from escape_map import cv_score
+
+os.makedirs(OUT_DIR, exist_ok=True)
+cache_dir = os.path.join(OUT_DIR, ".model_cache")
+
+df = pd.read_csv(TRAIN_CSV)
+groups = df[GROUP_COLS].astype(str).agg("|".join, axis=1).to_numpy()
+print(f"[INFO] 样本 {len(df)}  组 {len(np.unique(groups))}  "
+      f"(正 {int(df['escape'].sum())} / 负 {int((df['escape'] == 0).sum())})")
+
+rows = []
+for feats, (mtype, grid) in itertools.product(FEATURE_SETS, SEARCH.items()):
+    miss = [c for c in feats if c not in df.columns]
+    if miss:
+        print(f"[!] 跳过特征组 {feats}: 缺列 {miss}")
+        continue
+    sub = df.dropna(subset=feats + ["escape"])
+    X, y = sub[feats].to_numpy(float), sub["escape"].astype(int).to_numpy()
+    g = groups[sub.index.to_numpy()]
+    for params in grid:
+        r = cv_score(X, y, g, mtype, params, n_splits=N_SPLITS, n_jobs=N_JOBS,
+                     train_csv=TRAIN_CSV, features=feats, cache_dir=cache_dir, rebuild=REFIT)
+        rows.append({"model": r["model"], "params": json.dumps(r["params"]),
+                     "features": ",".join(feats), "n": len(y), "n_splits": r["n_splits"],
+                     "auc_mean": r["auc_mean"], "auc_std": r["auc_std"],
+                     "log_loss": r["log_loss"], "brier": r["brier"]})
+        print(f"  {mtype:9s} {json.dumps(params):55s} {','.join(feats):35s} "
+              f"AUC={r['auc_mean']:.3f}±{r['auc_std']:.3f}")
+
+if not rows:
+    raise SystemExit("[ERR] 没有可评估的配置")
+res = pd.DataFrame(rows).sort_values(["auc_mean", "log_loss"], ascending=[False, True])
+out_csv = os.path.join(OUT_DIR, "cv_results.csv")
+res.to_csv(out_csv, index=False)
+best = res.iloc[0]
+print(f"[✓] {out_csv}  最优: {best['model']}  {best['params']}  [{best['features']}]  "
+      f"AUC={best['auc_mean']:.3f}")
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 # -------------------------------------------------------------
 #   逃逸成功点 → 2-D 核密度 → 累积概率等高线
+#   KDE 用分箱 + FFT (kde_fast.py)，带宽规则同 gaussian_kde，耗时与样本数无关
 # -------------------------------------------------------------
 
 # ===== USER CONFIG =====
@@ -10,13 +11,13 @@ Y_COL        = "v_s_zz_gpa"     # 纵轴列名    (应力可换成 v_s_zz_gpa 
 LEVELS_CDF   = (0.3, 0.5, 0.8)            # 累积概率等高线 (0<C<1)
 GRID_T       = (500, 3000, 200)           # (min, max, N)  – 温度轴网格
 GRID_S       = (-30,   30, 200)           # (min, max, N)  – 应力轴网格
-BANDWIDTH    = None                       # KDE bandwidth; None=Scott
+BANDWIDTH    = None                       # KDE bandwidth; None=Scott ('silverman' 或数值 factor)
 OUT_PNG      = "escape_isoContours_z.png"
 OUT_TXT      = "isoContour_ranges_z.txt"
 # =======================
 
 import numpy as np, pandas as pd, matplotlib.pyplot as plt, seaborn as sns, os
-from scipy.stats import gaussian_kde
+from kde_fast import kde2d_grid, hdr_levels
 
 # ---------- 1. 读取正样本 ----------
 df = pd.read_csv(JUMP_CSV, usecols=[X_COL, Y_COL]).dropna()
@@ -25,23 +26,14 @@ Y = df[Y_COL].to_numpy()
 print(f"[INFO] 正样本点数 = {len(df)}")
 
 # ---------- 2. KDE ----------
-kde = gaussian_kde([X, Y], bw_method=BANDWIDTH)
-
 T_lin = np.linspace(*GRID_T)
 S_lin = np.linspace(*GRID_S)
 TT, SS = np.meshgrid(T_lin, S_lin)
-coords = np.vstack([TT.ravel(), SS.ravel()])
-PDF = kde(coords).reshape(TT.shape)           # 概率密度 f(T,σ)
+PDF = kde2d_grid(X, Y, T_lin, S_lin, bw_method=BANDWIDTH)   # 概率密度 f(T,σ)
 
 # ---------- 3. 由 PDF → CDF 等高线阈值 ----------
-pdf_flat  = PDF.ravel()
-idx_sort  = np.argsort(pdf_flat)[::-1]        # 降序（大→小）
-pdf_sort  = pdf_flat[idx_sort]
-area      = (T_lin[1]-T_lin[0]) * (S_lin[1]-S_lin[0])
-cdf_sort  = np.cumsum(pdf_sort) * area
-
-thr_raw = [pdf_sort[np.searchsorted(cdf_sort, p)]
-           for p in LEVELS_CDF]
+area    = (T_lin[1]-T_lin[0]) * (S_lin[1]-S_lin[0])
+thr_raw = list(hdr_levels(PDF, area, LEVELS_CDF))
 
 # 升序 + 同步百分比
 thr, LEVELS_CDF = zip(*sorted(zip(thr_raw, LEVELS_CDF)))
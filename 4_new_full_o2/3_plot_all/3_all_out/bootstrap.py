@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------
+# 向量化 bootstrap (07 / 09 / 11 共用)
+#   重抽样下标一次生成 (B × n) 数组，统计量按行计算，没有 Python 级循环
+#   B × n 太大时按 MAX_CELLS 分批，结果与一次算完相同 (同一随机流)
+#   boot_mean / boot_quantile / boot_normfit / boot_auc → 每个重抽样一个值
+#   ci            : 百分位置信区间
+#   describe_ci   : 均值 / P 分位 / 正态拟合 μ σ / 正态 P 分位 的点估计 + CI 表
+# -------------------------------------------------------------
+
+import numpy as np, pandas as pd
+from scipy.stats import norm, rankdata
+
+N_BOOT    = 2000
+CI_LEVEL  = 0.95
+SEED      = 0
+MAX_CELLS = 20_000_000      # 每批 B×n 上限 (≈160 MB 的 int64 下标)
+
+
+def resample_idx(n, B=N_BOOT, seed=SEED, max_cells=MAX_CELLS):
+    """逐批 yield (b, n) 下标数组，总行数 = B。"""
+    rng = np.random.default_rng(seed)
+    step = max(1, int(max_cells // max(n, 1)))
+    for a in range(0, B, step):
+        yield rng.integers(0, n, size=(min(step, B - a), n))
+
+
+def _apply(fn, n, B, seed):
+    return np.concatenate([fn(idx) for idx in resample_idx(n, B, seed)])
+
+
+def boot_mean(x, B=N_BOOT, seed=SEED):
+    x = np.asarray(x, float)
+    return _apply(lambda idx: x[idx].mean(1), len(x), B, seed)
+
+
+def boot_quantile(x, q, B=N_BOOT, seed=SEED):
+    """q 标量 → (B,)；q 序列 → (B, len(q))。插值方式同 pandas quantile (linear)。"""
+    x = np.asarray(x, float)
+    return _apply(lambda idx: np.quantile(x[idx], q, axis=1).T, len(x), B, seed)
+
+
+def boot_normfit(x, B=N_BOOT, seed=SEED):
+    """每个重抽样的 norm.fit (最大似然: μ = 均值, σ = ddof=0 标准差) → (B, 2)。"""
+    x = np.asarray(x, float)
+    return _apply(lambda idx: np.c_[x[idx].mean(1), x[idx].std(1)], len(x), B, seed)
+
+
+def auc_rows(y, s):
+    """
+    每行一组 (y, s) 的 ROC AUC (Mann–Whitney，秩取平均处理并列)。
+    y (b, n) ∈ {0,1}，s (b, n)；某行只有一类时为 NaN。
+    """
+    r  = rankdata(s, axis=1)
+    n1 = y.sum(1)
+    n0 = y.shape[1] - n1
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return ((r * y).sum(1) - n1 * (n1 + 1) / 2.0) / (n1 * n0)
+
+
+def boot_auc(y, score, B=N_BOOT, seed=SEED):
+    y, score = np.asarray(y, int), np.asarray(score, float)
+    return _apply(lambda idx: auc_rows(y[idx], score[idx]), len(y), B, seed)
+
+
+def ci(samples, level=CI_LEVEL):
+    """百分位区间 (忽略 NaN)；samples 为 (B, …) 时逐列给出。"""
+    a = (1.0 - level) / 2.0
+    lo, hi = np.nanquantile(samples, [a, 1.0 - a], axis=0)
+    return lo, hi
+
+
+def describe_ci(x, p=0.2, B=N_BOOT, level=CI_LEVEL, seed=SEED):
+    """均值 / P 分位 / 正态 μ σ / 正态 P 分位 的 点估计 + [lo, hi]，返回 DataFrame。"""
+    x  = np.asarray(x, float)
+    x  = x[np.isfinite(x)]
+    mu, sd = norm.fit(x)
+    point = {"mean": x.mean(), f"q{p:g}": np.quantile(x, p),
+             "norm_mu": mu, "norm_sigma": sd, f"norm_q{p:g}": norm.ppf(p, mu, sd)}
+
+    def per_resample(idx):
+        xs = x[idx]
+        m, s = xs.mean(1), xs.std(1)
+        return np.c_[m, np.quantile(xs, p, axis=1), m, s, m + s * norm.ppf(p)]
+
+    lo, hi = ci(_apply(per_resample, len(x), B, seed), level)
+    return pd.DataFrame({"stat": list(point), "value": list(point.values()),
+                         "ci_lo": lo, "ci_hi": hi, "n": len(x), "B": B, "level": level})
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------
+# 逃逸原子分类 (邻居 + 团簇, 周期 KD-tree)
+#   z 阈值只能说明"在表面上方"，这里再看它和谁成键:
+#     C        : 孤立碳原子
+#     CO / CO2 : 含 1 个 C 的分子
+#     fragment : 已脱离表面的多碳碎片 (片层碎块)
+#     attached : 仍经键连到表面附近原子 (被掀起的片层, 不算真正逃逸)
+#     other    : 其它组成 (如 CO3)
+#   KD-tree 只建在"表面以上 + 缓冲带"的子集上；x/y 周期, z 非周期
+# 输出: escape_class.csv  (每帧 × 每个表面以上的 C 一行)
+# -------------------------------------------------------------
+
+# ===== USER CONFIG =====
+DUMP_PATH    = "trajectory.T_1000_v7.8.lammpstrj"
+DT_FS        = 0.1          # fs per MD step
+EVERY        = 10           # 每 EVERY 帧分类 1 帧 (经帧索引, 跳过的帧不解析)
+CARBON_TYPE  = 1
+OXYGEN_TYPE  = 2
+Z_THRESH_A   = 27.0         # 表面以上判据: z > Z_THRESH_A (None = 用 z_top + D_THRESH_A)
+D_THRESH_A   = 5.0          # 仅 Z_THRESH_A=None 时用: z > z_top + D_THRESH_A
+SKIN_A       = 2.5          # 阈值下方的缓冲带: 用来判断是否仍连着表面
+R_CC_A       = 1.9          # C–C 成键截断 (与 in.gra_o 的 coord/atom cutoff 一致)
+R_CO_A       = 1.8          # C–O 成键截断
+R_OO_A       = 1.6          # O–O 成键截断 (O2)
+OUT_CSV      = "escape_class.csv"
+# =======================
+
+import sys
+import numpy as np, pandas as pd
+from scipy.spatial import cKDTree
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+LABELS = np.array(["C", "CO", "CO2", "fragment", "attached", "other"])
+
+
+def robust_top_surface_z(z_c, core_width=5.0, hist_bins=120):
+    """片层上表面 z_top: 直方图众数附近核心区的 95% 分位 (同 find_out_c.py)。"""
+    counts, edges = np.histogram(z_c, bins=hist_bins)
+    b = np.argmax(counts)
+    z_mode = 0.5 * (edges[b] + edges[b+1])
+    core = z_c[np.abs(z_c - z_mode) <= core_width]
+    if core.size < 10:
+        return float(np.percentile(z_c, 75.0))
+    return float(np.percentile(core, 95.0))
+
+
+def bonded_pairs(pos, types, box, r_cut):
+    """
+    pos (n,3) / types (n,) / box (3,2) → 成键对 (i, j) 数组 (m,2)。
+    r_cut: {(t1,t2): 截断}，按类型对过滤；树只在传入的子集上建。
+    """
+    r_max = max(r_cut.values())
+    lo = box[:, 0].copy()
+    L  = (box[:, 1] - box[:, 0]).astype(float)
+    lo[2] = pos[:, 2].min() if len(pos) else 0.0
+    L[2]  = np.ptp(pos[:, 2]) + 2*r_max + 1.0 if len(pos) else 1.0   # z 留足余量 → 不会环绕
+    p = np.mod(pos - lo, L)
+    p = np.where(p >= L, p - L, p)                     # 浮点舍入可能正好落在 L 上
+    pairs = cKDTree(p, boxsize=L).query_pairs(r_max, output_type="ndarray")
+    if not len(pairs):
+        return pairs
+
+    d = p[pairs[:, 0]] - p[pairs[:, 1]]
+    d -= L * np.round(d / L)                           # 最小镜像
+    r = np.sqrt((d*d).sum(1))
+    t1, t2 = types[pairs[:, 0]], types[pairs[:, 1]]
+    lim = np.zeros(len(pairs))
+    for (a, b), rc in r_cut.items():
+        lim[((t1 == a) & (t2 == b)) | ((t1 == b) & (t2 == a))] = rc
+    return pairs[r <= lim]
+
+
+def classify_frame(ids, types, pos, box, z_cut, r_cut, skin,
+                   c_type=CARBON_TYPE, o_type=OXYGEN_TYPE):
+    """
+    单帧分类。只在 z > z_cut − skin 的原子上建树；
+    返回 DataFrame: 每个 z > z_cut 的 C 一行 (id, z, n_CC, n_CO, cluster_nC, cluster_nO, label)。
+    """
+    sel = np.nonzero(pos[:, 2] > z_cut - skin)[0]
+    cols = ["id", "z", "n_CC", "n_CO", "cluster_nC", "cluster_nO", "label"]
+    if sel.size == 0:
+        return pd.DataFrame(columns=cols)
+    ids, types, pos = ids[sel], types[sel], pos[sel]
+    n = len(sel)
+    isC, isO = types == c_type, types == o_type
+
+    pairs = bonded_pairs(pos, types, box, r_cut)
+    i, j = (pairs[:, 0], pairs[:, 1]) if len(pairs) else (np.empty(0, int),) * 2
+
+    # —— 邻居计数 (双向) ——
+    both = np.r_[i, j]; other = np.r_[j, i]
+    n_CC = np.bincount(both, weights=isC[other], minlength=n).astype(int)
+    n_CO = np.bincount(both, weights=isO[other], minlength=n).astype(int)
+
+    # —— 连通团簇 ——
+    g = coo_matrix((np.ones(len(i)), (i, j)), shape=(n, n))
+    n_cl, lab = connected_components(g, directed=False)
+    cl_nC  = np.bincount(lab, weights=isC, minlength=n_cl).astype(int)
+    cl_nO  = np.bincount(lab, weights=isO, minlength=n_cl).astype(int)
+    cl_low = np.bincount(lab, weights=pos[:, 2] <= z_cut, minlength=n_cl) > 0
+
+    # —— 团簇 → 标签 ——
+    code = np.full(n_cl, 5)                            # other
+    one_c = cl_nC == 1
+    code[one_c & (cl_nO == 0)] = 0                     # C
+    code[one_c & (cl_nO == 1)] = 1                     # CO
+    code[one_c & (cl_nO == 2)] = 2                     # CO2
+    code[cl_nC >= 2] = 3                               # fragment
+    code[cl_low] = 4                                   # attached (连着缓冲带)
+
+    m = isC & (pos[:, 2] > z_cut)
+    return pd.DataFrame({
+        "id": ids[m].astype(int), "z": pos[m, 2],
+        "n_CC": n_CC[m], "n_CO": n_CO[m],
+        "cluster_nC": cl_nC[lab[m]], "cluster_nO": cl_nO[lab[m]],
+        "label": LABELS[code[lab[m]]],
+    }, columns=cols)
+
+
+def main():
+    from traj_index import load_index, select_frames, iter_dump_frames
+
+    r_cut = {(CARBON_TYPE, CARBON_TYPE): R_CC_A,
+             (CARBON_TYPE, OXYGEN_TYPE): R_CO_A,
+             (OXYGEN_TYPE, OXYGEN_TYPE): R_OO_A}
+    idx    = load_index(DUMP_PATH)
+    times  = idx.times_ps(DT_FS)
+    frames = select_frames(times, every=EVERY)
+    print(f"[INFO] 分类 {len(frames)} / {idx.n_frames} 帧")
+
+    parts = []
+    for k, step, df in iter_dump_frames(DUMP_PATH, frames, ["id", "type", "x", "y", "z"], idx):
+        pos   = df[["x", "y", "z"]].to_numpy(float)
+        types = df["type"].to_numpy(int)
+        if Z_THRESH_A is not None:
+            z_cut = Z_THRESH_A
+        else:
+            z_cut = robust_top_surface_z(pos[types == CARBON_TYPE, 2]) + D_THRESH_A
+        res = classify_frame(df["id"].to_numpy(int), types, pos, idx.box[k],
+                             z_cut, r_cut, SKIN_A)
+        parts.append(res.assign(frame=k, time_ps=times[k]))
+
+    if not parts:
+        sys.exit("[ERR] 没有可分类的帧")
+    out = pd.concat(parts, ignore_index=True)
+    out = out[["frame", "time_ps"] + [c for c in out.columns if c not in ("frame", "time_ps")]]
+    out.to_csv(OUT_CSV, index=False)
+
+    last = out[out["frame"] == out["frame"].max()]["label"].value_counts()
+    print(f"[OK] {OUT_CSV}  (rows={len(out)})  末帧: " +
+          ", ".join(f"{k}={v}" for k, v in last.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------
+# 判逃面引擎 (11_plot_escape_map.py 用)
+#   build_model : logit / svm (精确 SVC, 小样本) / sgd (线性, log-loss) /
+#                 nystroem (RBF 核近似 + SGD, 大样本) / auto (按样本量选)
+#   fit_cached  : 以 训练集 CSV 的哈希 + 模型参数 为键缓存拟合好的模型，
+#                 只改画图参数重画时不重新拟合
+#   predict_grid: 分块 predict_proba，网格再细内存也有上限
+#   cv_score    : 分组 K 折 (组 = 原子 id，同一原子的正负样本不跨折)，
+#                 各折 joblib 并行，结果按配置缓存为 JSON
+# -------------------------------------------------------------
+
+import os, hashlib, json
+import numpy as np
+import joblib
+from joblib import Parallel, delayed
+from sklearn.base          import clone
+from sklearn.model_selection import GroupKFold
+from sklearn.metrics       import roc_auc_score, log_loss, brier_score_loss
+from sklearn.preprocessing import StandardScaler
+from sklearn.pipeline      import make_pipeline
+from sklearn.linear_model  import LogisticRegression, SGDClassifier
+from sklearn.svm           import SVC
+from sklearn.kernel_approximation import Nystroem
+
+MODEL_TYPES  = ("logit", "svm", "sgd", "nystroem", "auto")
+SVM_MAX_N    = 5000          # auto: 样本数超过此值时 svm → nystroem
+N_COMPONENTS = 300           # Nystroem 特征维数
+CHUNK_ROWS   = 200_000       # 分块预测每块行数
+CACHE_DIR    = ".model_cache"   # 与 11 / 11a 同名，.gitignore 已忽略
+
+
+def file_hash(path, block=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for b in iter(lambda: f.read(block), b""):
+            h.update(b)
+    return h.hexdigest()
+
+
+def resolve_type(model_type, n):
+    if model_type not in MODEL_TYPES:
+        raise ValueError(f"MODEL_TYPE 只能是 {MODEL_TYPES} 之一")
+    if model_type == "auto":
+        return "svm" if n <= SVM_MAX_N else "nystroem"
+    return model_type
+
+
+def build_model(model_type, n_features, n_components=N_COMPONENTS, random_state=0, params=None):
+    """
+    返回未拟合的 pipeline；全部支持 predict_proba。
+    n_features: 特征列数 (X.shape[1])，nystroem 的 gamma = 1/n_features。
+    params: 超参数，按 pipeline 步骤名给出，如 {"svc__C": 10, "logisticregression__C": 0.1}。
+    """
+    model = _build(model_type, n_features, n_components, random_state)
+    if params:
+        model.set_params(**params)
+    return model
+
+
+def _build(model_type, n_features, n_components, random_state):
+    if model_type == "logit":
+        clf = LogisticRegression(max_iter=1000)
+        return make_pipeline(StandardScaler(), clf)
+    if model_type == "svm":
+        clf = SVC(kernel="rbf", probability=True, gamma="scale", random_state=random_state)
+        return make_pipeline(StandardScaler(), clf)
+    sgd = SGDClassifier(loss="log_loss", alpha=1e-4, max_iter=50, tol=1e-4,
+                        random_state=random_state)
+    if model_type == "sgd":
+        return make_pipeline(StandardScaler(), sgd)
+    if model_type == "nystroem":
+        # StandardScaler 后 gamma = 1/n_features，与 SVC(gamma="scale") 量级一致
+        return make_pipeline(StandardScaler(),
+                             Nystroem(kernel="rbf", gamma=1.0 / n_features, n_components=n_components,
+                                      random_state=random_state),
+                             StandardScaler(), sgd)
+    raise ValueError(f"未知模型: {model_type}")
+
+
+def _config_key(**cfg):
+    return hashlib.sha1(json.dumps(cfg, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def fit_cached(X, y, train_csv, model_type, features, cache_dir=CACHE_DIR,
+               rebuild=False, **kw):
+    """
+    键 = 训练集 CSV 的 sha1 + 模型类型 + 特征列 + 额外参数 (含 params)；命中则直接载入。
+    返回 (model, 实际模型类型, 是否来自缓存)。
+    """
+    mtype = resolve_type(model_type, len(y))
+    key = _config_key(csv=file_hash(train_csv), model=mtype, features=list(features),
+                      n_features=X.shape[1], **kw)
+    path = os.path.join(cache_dir, f"{mtype}_{key}.joblib")
+    if not rebuild and os.path.exists(path):
+        return joblib.load(path), mtype, True
+
+    model = build_model(mtype, X.shape[1], **kw).fit(X, y)
+    os.makedirs(cache_dir, exist_ok=True)
+    joblib.dump(model, path)
+    return model, mtype, False
+
+
+def predict_proba_chunked(model, X, chunk=CHUNK_ROWS):
+    """P(y=1)，每次只喂 chunk 行。"""
+    X = np.asarray(X, dtype=float)
+    out = np.empty(len(X))
+    for a in range(0, len(X), chunk):
+        out[a:a+chunk] = model.predict_proba(X[a:a+chunk])[:, 1]
+    return out
+
+
+def predict_grid(model, x_lin, y_lin, chunk=CHUNK_ROWS, extra=None):
+    """
+    在 meshgrid(x_lin, y_lin) 上分块求 P；返回 (XX, YY, PP)，形状 (len(y), len(x))。
+    extra: 其余特征的固定取值 (如训练集中位数)，按特征顺序接在两轴之后。
+    """
+    XX, YY = np.meshgrid(x_lin, y_lin)
+    PP = np.empty(XX.size)
+    xr, yr = XX.ravel(), YY.ravel()
+    extra = np.atleast_1d(np.asarray([] if extra is None else extra, dtype=float))
+    for a in range(0, XX.size, chunk):
+        Xc = np.c_[xr[a:a+chunk], yr[a:a+chunk]]
+        if extra.size:
+            Xc = np.c_[Xc, np.broadcast_to(extra, (len(Xc), extra.size))]
+        PP[a:a+chunk] = model.predict_proba(Xc)[:, 1]
+    return XX, YY, PP.reshape(XX.shape)
+
+
+def _fold_scores(model, X, y, tr, te):
+    m = clone(model).fit(X[tr], y[tr])
+    p = predict_proba_chunked(m, X[te])
+    auc = roc_auc_score(y[te], p) if len(np.unique(y[te])) == 2 else np.nan
+    return {"auc": auc, "log_loss": log_loss(y[te], p, labels=[0, 1]),
+            "brier": brier_score_loss(y[te], p), "n_test": int(len(te))}
+
+
+def cv_score(X, y, groups, model_type, params=None, n_splits=5, n_jobs=-1,
+             train_csv=None, features=(), cache_dir=CACHE_DIR, rebuild=False):
+    """
+    分组 K 折交叉验证 → {model, params, auc_mean, auc_std, log_loss, brier, folds: [...]}。
+    train_csv 给出时按 (CSV 哈希, 模型, 参数, 特征, 折数) 缓存到 cache_dir/cv_<key>.json。
+    """
+    mtype = resolve_type(model_type, len(y))
+    path = None
+    if train_csv is not None:
+        key = _config_key(csv=file_hash(train_csv), model=mtype, params=params or {},
+                          features=list(features), n_features=np.shape(X)[1],
+                          n_splits=n_splits)
+        path = os.path.join(cache_dir, f"cv_{key}.json")
+        if not rebuild and os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+
+    n_splits = min(n_splits, len(np.unique(groups)))
+    model = build_model(mtype, np.shape(X)[1], params=params)
+    folds = Parallel(n_jobs=n_jobs)(
+        delayed(_fold_scores)(model, X, y, tr, te)
+        for tr, te in GroupKFold(n_splits=n_splits).split(X, y, groups))
+    auc = np.array([f["auc"] for f in folds], dtype=float)
+    w   = np.array([f["n_test"] for f in folds], dtype=float)
+    res = {"model": mtype, "params": params or {}, "features": list(features),
+           "n_splits": n_splits,
+           "auc_mean": float(np.nanmean(auc)), "auc_std": float(np.nanstd(auc)),
+           "log_loss": float(np.average([f["log_loss"] for f in folds], weights=w)),
+           "brier":    float(np.average([f["brier"] for f in folds], weights=w)),
+           "folds": folds}
+    if path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(res, f, indent=1, default=float)
+    return res
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------
+# 碎片 / 分子追踪 → 物种时间序列 (不依赖 fix reaxff/species)
+#   每帧: KD-tree 成键对 → 团簇标记 → 小团簇按组成命名 (CO, CO2, O2 ...)
+#   跨帧: 以"成员 id 集合"为键链接；上一帧不存在的集合 = 新生成的分子
+#   增量: 只保留上一帧的键表，逐帧 update()，万帧以上也不占内存
+# 输出: fragment_counts.csv  (time_ps, Timestep, 各物种个数, CO_CO2_total)
+#       fragment_events.csv  (uid, species, t_form_ps, Timestep, n_atoms)
+#       fragment_rates.csv   (各 bin 内 CO / CO2 生成速率, 1/ps)
+# species_counts() 的列与 stress.py 的 parse_species 对齐，可直接进 time_bin_aggregate
+# -------------------------------------------------------------
+
+# ===== USER CONFIG =====
+DUMP_PATH     = "trajectory.T_1000_v7.8.lammpstrj"
+DT_FS         = 0.1         # fs per MD step
+EVERY         = 1           # 每 EVERY 帧处理 1 帧 (步长内生成又解离的分子会漏计)
+TYPE_NAMES    = {1: "C", 2: "O"}
+R_CC_A, R_CO_A, R_OO_A = 1.9, 1.8, 1.6     # 成键截断 (同 escape_classify.py)
+MAX_ATOMS     = 8           # 只把 ≤ MAX_ATOMS 个原子的团簇当作分子 (片层本体不计)
+Z_MIN_A       = None        # 只看 z > Z_MIN_A 的原子 (气相); None = 全部
+RATE_BIN_PS   = 1.0         # 生成速率的时间 bin (ps)
+OUT_COUNTS    = "fragment_counts.csv"
+OUT_EVENTS    = "fragment_events.csv"
+OUT_RATES     = "fragment_rates.csv"
+# =======================
+
+import numpy as np, pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from escape_classify import bonded_pairs
+
+
+def formula(counts, order=("C", "O")):
+    """{'C':1,'O':2} → 'CO2' (个数为 1 省略，与 species.out 的写法一致)。"""
+    parts = []
+    for el in order:
+        n = counts.get(el, 0)
+        if n:
+            parts.append(el if n == 1 else f"{el}{n}")
+    return "".join(parts)
+
+
+class FragmentTracker:
+    """逐帧喂入原子数据，跨帧按成员 id 集合链接分子。"""
+
+    def __init__(self, r_cut, type_names=TYPE_NAMES, max_atoms=MAX_ATOMS, z_min=None):
+        self.r_cut      = r_cut
+        self.type_names = dict(type_names)
+        self.max_atoms  = max_atoms
+        self.z_min      = z_min
+        self._prev      = None            # 上一帧: 成员键 → uid
+        self._next_uid  = 0
+        self._rows      = []              # 每帧物种计数
+        self._events    = []              # 分子生成事件
+
+    def update(self, time_ps, step, ids, types, pos, box):
+        if self.z_min is not None:
+            m = pos[:, 2] > self.z_min
+            ids, types, pos = ids[m], types[m], pos[m]
+        n = len(ids)
+        pairs = bonded_pairs(pos, types, box, self.r_cut) if n else np.empty((0, 2), int)
+        graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+        n_cl, lab = connected_components(graph, directed=False)
+
+        # —— 小团簇的组成 ——
+        size  = np.bincount(lab, minlength=n_cl)
+        comp  = {el: np.bincount(lab, weights=types == t, minlength=n_cl).astype(int)
+                 for t, el in self.type_names.items()}
+        small = np.flatnonzero(size <= self.max_atoms)
+        names = np.array([formula({el: c[k] for el, c in comp.items()}) for k in small], dtype=object)
+
+        # —— 成员 id 键 (按 团簇, id 排序后切段) ——
+        m     = (size <= self.max_atoms)[lab]
+        order = np.lexsort((ids[m], lab[m]))
+        lab_s, id_s = lab[m][order], ids[m][order].astype(np.int64)
+        cuts  = np.flatnonzero(np.diff(lab_s)) + 1
+        keys  = [grp.tobytes() for grp in np.split(id_s, cuts)]   # 与 small 同序
+
+        cur = {}
+        for key, name, k in zip(keys, names, small):
+            uid = None if self._prev is None else self._prev.get(key)
+            if uid is None:
+                uid = self._next_uid; self._next_uid += 1
+                if self._prev is not None:                 # 首帧已有的分子不算生成
+                    self._events.append((uid, name, time_ps, step, int(size[k])))
+            cur[key] = uid
+        self._prev = cur
+
+        row = {"time_ps": time_ps, "Timestep": step}
+        row.update(pd.Series(names, dtype=object).value_counts().to_dict())
+        self._rows.append(row)
+
+    def species_counts(self):
+        df = pd.DataFrame(self._rows).fillna(0)
+        sp = [c for c in df.columns if c not in ("time_ps", "Timestep")]
+        df[sp] = df[sp].astype(int)
+        df["CO_CO2_total"] = sum(df[c] for c in ("CO", "CO2") if c in df)
+        return df
+
+    def formation_events(self):
+        return pd.DataFrame(self._events,
+                            columns=["uid", "species", "t_form_ps", "Timestep", "n_atoms"])
+
+    def formation_rates(self, bin_ps, species=("CO", "CO2")):
+        """按 bin 统计每种物种的生成事件数 / bin 宽 → 生成速率 (1/ps)。"""
+        ev = self.formation_events()
+        t  = pd.DataFrame(self._rows)["time_ps"]
+        edges = np.arange(t.min(), t.max() + bin_ps, bin_ps)
+        out = pd.DataFrame({"bin_start_ps": edges[:-1], "bin_end_ps": edges[1:]})
+        for sp in species:
+            cnt, _ = np.histogram(ev.loc[ev["species"] == sp, "t_form_ps"], bins=edges)
+            out[f"{sp}_form_per_ps"] = cnt / bin_ps
+        return out
+
+
+def track_dump(dump_path, dt_fs, every=1, r_cut=None, max_atoms=MAX_ATOMS,
+               z_min=None, type_names=TYPE_NAMES):
+    """经帧索引逐帧跑 FragmentTracker，返回 tracker。"""
+    from traj_index import load_index, select_frames, iter_dump_frames
+    if r_cut is None:
+        r_cut = {(1, 1): R_CC_A, (1, 2): R_CO_A, (2, 2): R_OO_A}
+    idx    = load_index(dump_path)
+    times  = idx.times_ps(dt_fs)
+    frames = select_frames(times, every=every)
+    trk    = FragmentTracker(r_cut, type_names, max_atoms, z_min)
+    for k, step, df in iter_dump_frames(dump_path, frames, ["id", "type", "x", "y", "z"], idx):
+        trk.update(times[k], step, df["id"].to_numpy(int), df["type"].to_numpy(int),
+                   df[["x", "y", "z"]].to_numpy(float), idx.box[k])
+    return trk
+
+
+def main():
+    trk = track_dump(DUMP_PATH, DT_FS, EVERY, max_atoms=MAX_ATOMS, z_min=Z_MIN_A)
+    counts, events = trk.species_counts(), trk.formation_events()
+    counts.to_csv(OUT_COUNTS, index=False)
+    events.to_csv(OUT_EVENTS, index=False)
+    trk.formation_rates(RATE_BIN_PS).to_csv(OUT_RATES, index=False)
+    print(f"[OK] {OUT_COUNTS} (frames={len(counts)}), {OUT_EVENTS} (events={len(events)}), {OUT_RATES}")
+    if not events.empty:
+        print("     生成: " + ", ".join(f"{k}={v}" for k, v in events["species"].value_counts().items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+HOPG stack + O2 gas → LAMMPS data file (atom_style charge), vectorized for ~10^6 atoms.
+Shared by the run directories' full_o2.py wrappers (they only set VAC / output name), or directly:
+    python hopg_builder.py [--vac 300] [-o hopg_with_O_final.data] [--seed N] [--no-validate]
+  - Graphene: rectangular 4-atom cell (a = √3·C_C along x, b = 3·C_C along y), AA stacked,
+    layer by layer from the bottom (ids 1..N_layer = bottom layer → `group fixed_layer` in in.gra_o)
+  - O2: random centres + isotropic orientations in a z slab at O2_DENSITY_G_CM3 (or O2_COUNT);
+    batches of candidates are rejected against graphene + accepted O via a periodic-xy KD-tree
+    (MIN_DIST), conflicts inside a batch drop the later molecule
+  - Velocities: Maxwell–Boltzmann at O2_T_K (centre-of-mass + 2 rotational DOF, bond length kept),
+    carbon at rest. NOTE: in.gra_o's `velocity oatoms create` overwrites them — comment it out to use these.
+  - Data file written / read back through lammps_data.py (bulk formatting, mmap reader)
+"""
+import time, argparse
+import numpy as np
+from scipy.spatial import cKDTree
+from lammps_data import write_data, read_data, validate
+
+# --- Defaults (override through build() / the command line) ---
+N_WIDTH_UNITS   = 25     # Rectangular cells along x (armchair edge, a = √3·C_C)
+N_LENGTH_UNITS  = 15     # Rectangular cells along y (zigzag edge, b = 3·C_C)
+C_C_BOND        = 1.44   # C–C bond length in Å
+NUM_LAYERS      = 5      # Number of graphene layers
+INTERLAYER_DZ   = 3.35   # Interlayer spacing in Å
+BOTTOM_OFFSET   = 10.0   # Target z-coordinate for the bottom layer
+VAC             = 260.0  # Vacuum thickness in Å (Lz = NUM_LAYERS·INTERLAYER_DZ + VAC)
+
+# O2 gas:
+O2_DENSITY_G_CM3 = 0.013   # Mass density in the gas slab (old FCC block, a=18 Å ≈ 0.013)
+O2_COUNT        = None     # Explicit number of molecules (overrides the density)
+O2_Z_MIN        = 62.0     # Gas slab bottom (Å); keep above wall_lo_o (z=60) in in.gra_o
+O2_Z_MAX        = None     # Gas slab top (Å); None = box top - MIN_DIST
+O2_BOND         = 1.21     # O=O bond length in Å
+MIN_DIST        = 2.5      # Minimum O–O (between molecules) and O–C distance in Å
+O2_T_K          = 300.0    # Maxwell–Boltzmann temperature; None = no Velocities section
+SEED            = 12345
+BATCH_FACTOR    = 1.3      # Candidates drawn per missing molecule and round
+MAX_ROUNDS      = 50
+
+MASSES          = {1: 12.011, 2: 15.999}   # C = type 1, O = type 2
+OUTPUT_FILENAME = "hopg_with_O_final.data"
+VALIDATE        = True     # Read the file back and check counts / box / overlaps
+
+KB_J   = 1.380649e-23
+AMU_KG = 1.66053906660e-27
+N_A    = 6.02214076e23
+
+
+def graphene_stack(nx, ny, cc, n_layers, dz, z0):
+    """(N, 3) AA-stacked positions, bottom layer first; returns (pos, (Lx, Ly))."""
+    a, b = np.sqrt(3.0) * cc, 3.0 * cc
+    basis = np.array([[0.0, 0.0], [a/2, cc/2], [a/2, 1.5*cc], [0.0, 2*cc]])
+    ix, iy = np.meshgrid(np.arange(nx), np.arange(ny), indexing="ij")
+    xy = (np.stack([ix * a, iy * b], axis=-1)[:, :, None, :] + basis).reshape(-1, 2)
+    layer = np.column_stack([xy, np.zeros(len(xy))])
+    pos = np.concatenate([layer + [0.0, 0.0, z0 + k * dz] for k in range(n_layers)])
+    return pos, (nx * a, ny * b)
+
+
+def _unit_vectors(n, rng):
+    u = rng.normal(size=(n, 3))
+    return u / np.linalg.norm(u, axis=1, keepdims=True)
+
+
+def place_o2(n_mol, lxy, lz, z_range, fixed, bond, dmin, rng,
+             batch=BATCH_FACTOR, max_rounds=MAX_ROUNDS):
+    """
+    Random O2 molecules in z_range with every O farther than dmin from `fixed` atoms and
+    from O of other molecules (x/y periodic). -> (atoms (n,2,3), unit axes (n,3))
+    """
+    Lx, Ly = lxy
+    size = np.array([Lx, Ly, lz + 2 * dmin + 1.0])          # z padded → never wraps
+    lo = np.array([0.0, 0.0, z_range[0] + bond / 2])
+    hi = np.array([Lx, Ly, z_range[1] - bond / 2])
+    sign = np.array([0.5, -0.5])[None, :, None] * bond
+
+    acc_at, acc_u = [], []
+    n_acc = 0
+    occupied = fixed
+    for _ in range(max_rounds):
+        need = n_mol - n_acc
+        if need <= 0:
+            break
+        m = int(need * batch) + 8
+        u = _unit_vectors(m, rng)
+        at = rng.uniform(lo, hi, (m, 3))[:, None, :] + sign * u[:, None, :]
+        at[..., :2] %= (Lx, Ly)
+
+        # against graphene + already accepted O
+        tree = cKDTree(occupied, boxsize=size)
+        d, _ = tree.query(at.reshape(-1, 3), distance_upper_bound=dmin)
+        ok = ~np.isfinite(d).reshape(m, 2).any(axis=1)
+        at, u = at[ok], u[ok]
+
+        # inside the batch: any inter-molecular pair closer than dmin drops the later molecule
+        pairs = cKDTree(at.reshape(-1, 3), boxsize=size).query_pairs(dmin, output_type="ndarray")
+        mol = pairs // 2
+        keep = np.ones(len(at), bool)
+        keep[mol[mol[:, 0] != mol[:, 1]].max(axis=1)] = False
+        at, u = at[keep][:need], u[keep][:need]
+
+        acc_at.append(at); acc_u.append(u)
+        n_acc += len(at)
+        occupied = np.concatenate([occupied, at.reshape(-1, 3)])
+    if n_acc < n_mol:
+        print(f"   ⚠ placed only {n_acc}/{n_mol} O2 after {max_rounds} rounds "
+              f"(lower the density or MIN_DIST)")
+    return np.concatenate(acc_at), np.concatenate(acc_u)
+
+
+def o2_velocities(u, T, m_o, rng):
+    """Maxwell–Boltzmann (Å/fs): COM N(0, √(kT/2m)) with zero net momentum + rotation ⟂ axis."""
+    n = len(u)
+    s_com = np.sqrt(KB_J * T / (2 * m_o * AMU_KG)) * 1e-5     # m/s → Å/fs
+    v_com = rng.normal(0.0, s_com, (n, 3))
+    v_com -= v_com.mean(axis=0)
+    # rotation: I = m·b²/2 → tangential atom speed per ⟂ component ~ N(0, √(kT/2m))
+    w = rng.normal(0.0, s_com, (n, 3))
+    w -= np.sum(w * u, axis=1, keepdims=True) * u
+    return np.stack([v_com + w, v_com - w], axis=1)           # (n, 2, 3)
+
+
+def build(vac=VAC, out=OUTPUT_FILENAME, nx=N_WIDTH_UNITS, ny=N_LENGTH_UNITS, n_layers=NUM_LAYERS,
+          density=O2_DENSITY_G_CM3, count=O2_COUNT, o2_t_k=O2_T_K, seed=SEED, check=VALIDATE):
+    """Build and write the data file; returns (Lx, Ly, Lz, n_layer)."""
+    t0 = time.perf_counter()
+    rng = np.random.default_rng(seed)
+
+    # --- 2. Graphene stack ---
+    print("1. Building graphene stack...")
+    c_pos, (Lx, Ly) = graphene_stack(nx, ny, C_C_BOND,
+                                     n_layers, INTERLAYER_DZ, BOTTOM_OFFSET)
+    Lz = n_layers * INTERLAYER_DZ + vac
+    n_layer = len(c_pos) // n_layers
+
+    # --- 3. O2 gas ---
+    z_hi = O2_Z_MAX if O2_Z_MAX is not None else Lz - MIN_DIST
+    vol_a3 = Lx * Ly * (z_hi - O2_Z_MIN)
+    n_mol = (count if count is not None
+             else int(round(density * vol_a3 * 1e-24 * N_A / (2 * MASSES[2]))))
+    print(f"2. Placing {n_mol} O2 in z = [{O2_Z_MIN:.1f}, {z_hi:.1f}] Å ...")
+    o_at, o_u = place_o2(n_mol, (Lx, Ly), Lz, (O2_Z_MIN, z_hi), c_pos, O2_BOND, MIN_DIST, rng)
+
+    # --- 4. Velocities ---
+    pos   = np.concatenate([c_pos, o_at.reshape(-1, 3)])
+    types = np.r_[np.ones(len(c_pos)), np.full(o_at.shape[0] * 2, 2.0)]
+    vel = None
+    if o2_t_k is not None:
+        print(f"3. Maxwell–Boltzmann velocities for O2 at {o2_t_k} K...")
+        vel = np.zeros_like(pos)
+        vel[len(c_pos):] = o2_velocities(o_u, o2_t_k, MASSES[2], rng).reshape(-1, 3)
+
+    # --- 5. Write ---
+    print("4. Writing LAMMPS data file...")
+    write_data(out, ((0.0, Lx), (0.0, Ly), (0.0, Lz)), pos, types,
+               q=np.zeros(len(pos)), vel=vel, masses=MASSES, title="LAMMPS data file (hopg_builder.py)")
+
+    # --- 6. Diagnostics ---
+    zs = pos[:, 2]
+    n_o2 = len(o_at)
+    rho = n_o2 * 2 * MASSES[2] / N_A / (vol_a3 * 1e-24)
+    print(f"\n✅ Wrote '{out}', total atoms = {len(pos)}  ({time.perf_counter() - t0:.1f} s)")
+    print(f"  • Atom Counts: C={len(c_pos)}, O={2 * n_o2}  (O2 = {n_o2}, ρ = {rho:.4f} g/cm³)")
+    print(f"  • bottom layer = ids 1..{n_layer}  (in.gra_o: group fixed_layer id <= {n_layer})")
+    print(f"  • box = {Lx:.6f} × {Ly:.6f} × {Lz:.3f} Å  (in.gra_o: region box)")
+    print(f"  • z_min = {zs.min():.3f} Å, z_max = {zs.max():.3f} Å")
+    if vel is not None and n_o2:
+        vo = vel[len(c_pos):]
+        ke = 0.5 * MASSES[2] * AMU_KG * np.sum((vo * 1e5) ** 2)
+        print(f"  • O2 kinetic T (5 DOF) = {2 * ke / (5 * n_o2 * KB_J):.1f} K")
+    if check:
+        bad = validate(read_data(out), min_dist=min(O2_BOND, C_C_BOND) * 0.9)
+        print("  • read-back check: " + ("OK" if not bad else "; ".join(bad)))
+    return Lx, Ly, Lz, n_layer
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="HOPG stack + O2 gas → LAMMPS data file")
+    ap.add_argument("--vac", type=float, default=VAC, help="vacuum thickness (Å)")
+    ap.add_argument("-o", "--out", default=OUTPUT_FILENAME)
+    ap.add_argument("--seed", type=int, default=SEED)
+    ap.add_argument("--no-validate", action="store_true")
+    a = ap.parse_args(argv)
+    build(vac=a.vac, out=a.out, seed=a.seed, check=not a.no_validate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------
+# 跳点窗口加密 (两阶段跳点分析的第二阶段)
+#   粗扫: 05a 在 escape_timeseries.csv (100 步一帧) 上找每个 id 的 t_jump
+#   加密: 经帧索引只读高频 dump (如 ablate.lammpstrj) 中
+#         落在 t_jump ± half 内的帧 → 局部 T / 应力均值 + 细化 t_jump
+# 整条高频轨迹既不解析也不落盘，只碰窗口内的帧
+# dump 只有原始 c_MyStress[1..6] (压强×体积, atm·Å^3) 时用 stress_tensor.virial_to_gpa 换算
+#   (与 in.gra_o 的 v_s_*_gpa 同一公式)；V 取 c_MyVoro[1] 列，没有则用给定常数体积
+# dump 里既没有温度来源也没有任何可用应力列 → 报错 (否则粗扫值会原样"通过")
+# -------------------------------------------------------------
+
+import numpy as np, pandas as pd
+from traj_index import load_index, select_frames, iter_dump_frames
+from stress_tensor import STRESS_COLS, VIRIAL_COLS as _RAW_COLS, virial_to_gpa
+
+KB_KCAL   = 0.0019872041                      # kcal/mol/K
+TEMP_COLS = ["v_MyTemp", "v_mytemp"]          # 首选每原子温度列
+KE_COLS   = ["c_MyKE", "c_myke"]              # 退而求其次: 由动能换算
+VORO_COL   = "c_MyVoro[1]"
+VIRIAL_COLS = dict(zip(STRESS_COLS, _RAW_COLS))          # GPa 列 → 原始 virial 列
+
+
+def _pick(cols, names):
+    return next((c for c in names if c in cols), None)
+
+
+def refine_jump_windows(dump_path, jumps, dt_fs, half_ps, value_cols=(),
+                        t0_ps=0.0, t_range=None, z0=None, z_th=None, idx=None,
+                        v_atom_a3=None):
+    """
+    jumps      : DataFrame, 至少含 id / t_jump_ps (粗扫结果, 每 id 一行)
+    value_cols : 在窗口内求平均的 dump 列 (应力分量等; dump 里没有的列自动忽略)
+    t0_ps      : dump 时间 (timestep×dt) + t0_ps → 与粗扫的 time_ps 对齐
+    t_range    : (T_min, T_max) 温度合法区间, 区间外视为坏值
+    z0, z_th   : 可选, {id: 基线 z} 与抬升阈值 → 在高频帧里细化 t_jump
+    v_atom_a3  : dump 只有 c_MyStress 且无 c_MyVoro[1] 时的每原子体积 (Å^3)
+    返回 DataFrame: id, n_frames_fine, T_fine_K, <value_cols>, [t_jump_fine_ps]
+    """
+    idx   = idx or load_index(dump_path)
+    times = idx.times_ps(dt_fs, t0_ps=t0_ps)
+
+    jumps = jumps.dropna(subset=["t_jump_ps"]).sort_values("t_jump_ps")
+    tj    = jumps["t_jump_ps"].to_numpy(float)
+    jid   = jumps["id"].to_numpy(int)
+    frames = select_frames(times, every=0, dense_centers_ps=tj, dense_half_ps=half_ps)
+
+    t_col  = _pick(idx.columns, TEMP_COLS)
+    ke_col = None if t_col else _pick(idx.columns, KE_COLS)
+    vcols  = [c for c in value_cols if c in idx.columns]
+    vol    = VORO_COL if VORO_COL in idx.columns else v_atom_a3
+    virial = {c: VIRIAL_COLS[c] for c in value_cols
+              if c not in vcols and VIRIAL_COLS.get(c) in idx.columns and vol is not None}
+    if not (t_col or ke_col or vcols or virial):
+        raise ValueError(f"{dump_path}: 没有温度列 ({TEMP_COLS + KE_COLS}) 也没有 {list(value_cols)} "
+                         f"(或 c_MyStress + 体积)，加密无从计算")
+    lost = [c for c in value_cols if c not in vcols and c not in virial]
+    if not (t_col or ke_col):
+        print(f"[WARN] {dump_path}: 无温度列 → T 保留粗扫值")
+    if lost:
+        print(f"[WARN] {dump_path}: 缺 {lost} → 保留粗扫值")
+    want   = (["id", "z"] + [c for c in (t_col, ke_col) if c] + vcols + list(virial.values())
+              + ([VORO_COL] if virial and vol == VORO_COL else []))
+
+    parts = []
+    for i, _, df in iter_dump_frames(dump_path, frames, columns=want, idx=idx):
+        t = times[i]
+        lo, hi = np.searchsorted(tj, t - half_ps, "left"), np.searchsorted(tj, t + half_ps, "right")
+        sub = df[df["id"].isin(jid[lo:hi])]          # 只留窗口覆盖本帧的 id
+        if not sub.empty:
+            parts.append(sub.assign(time_ps=t))
+
+    vcols   += list(virial)
+    out_cols = ["id", "n_frames_fine", "T_fine_K"] + vcols
+    if not parts:
+        return pd.DataFrame(columns=out_cols)
+    w = pd.concat(parts, ignore_index=True)
+    V = w[VORO_COL] if vol == VORO_COL else vol
+    for c, raw in virial.items():
+        w[c] = virial_to_gpa(w[raw], V)
+
+    if t_col:
+        w["T"] = w[t_col]
+    elif ke_col:
+        w["T"] = (2/3) * w[ke_col] / KB_KCAL
+    else:
+        w["T"] = np.nan
+    if t_range is not None:
+        w["T"] = w["T"].mask(~w["T"].between(*t_range))
+
+    g   = w.groupby("id", sort=True)
+    out = g[["T"] + vcols].mean().rename(columns={"T": "T_fine_K"})
+    out.insert(0, "n_frames_fine", g.size())
+
+    # —— 细化 t_jump: 高频帧里首次 z − z0 ≥ z_th ——
+    if z0 is not None and z_th is not None and "z" in w:
+        dz = w["z"] - w["id"].map(z0)
+        out["t_jump_fine_ps"] = w.loc[dz >= z_th].groupby("id")["time_ps"].min()
+
+    return out.reset_index()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------
+# LAMMPS data 文件读写 (建模模块 hopg_builder.py / build_hopg_aa.py 用)
+#   写: 整个 Atoms / Velocities 段一次性 %-格式化 (按行块)，不走 ASE 的逐原子写出
+#   读: mmap 整个文件，正则定位各段，段内交给 pandas C 引擎解析成 numpy 数组
+#       (read_header 只读头部: 原子数 / 盒子)
+#   校验: 原子数 / id 唯一 / 类型范围 / 盒内 / 速度行数 / 最小原子间距 (x,y 周期)
+# 支持 atom_style: atomic / charge / molecular / full (可带 image flags)
+# 用法: python lammps_data.py hopg_with_O_final.data [MIN_DIST]   (读回并校验)
+# -------------------------------------------------------------
+
+import io, mmap, re, sys
+import numpy as np, pandas as pd
+
+STYLE_COLS = {
+    "atomic":    ["id", "type", "x", "y", "z"],
+    "charge":    ["id", "type", "q", "x", "y", "z"],
+    "molecular": ["id", "mol", "type", "x", "y", "z"],
+    "full":      ["id", "mol", "type", "q", "x", "y", "z"],
+}
+SECTIONS = ("Atoms", "Velocities", "Masses", "Bonds", "Angles", "Dihedrals", "Impropers",
+            "Pair Coeffs", "Bond Coeffs", "Angle Coeffs")
+CHUNK_ROWS = 200_000
+
+_RE_SECTION = re.compile(rb"^(" + b"|".join(s.encode() for s in SECTIONS) + rb")[ \t]*(#[^\n]*)?$",
+                         re.M)
+
+
+class LammpsData:
+    """读回的 data 文件。pos (n,3) / ids / types / q / image / vel 均按文件中的行序。"""
+
+    def __init__(self, path, natoms, ntypes, box, tilt, masses, style, atoms, vel):
+        self.path   = str(path)
+        self.natoms = int(natoms)
+        self.ntypes = int(ntypes)
+        self.box    = np.asarray(box, dtype=float)          # (3, 2) lo/hi
+        self.tilt   = tilt                                  # (xy, xz, yz) 或 None
+        self.masses = masses                                # {type: mass}
+        self.style  = style
+        self.ids    = atoms["id"].to_numpy(np.int64)
+        self.types  = atoms["type"].to_numpy(np.int64)
+        self.q      = atoms["q"].to_numpy(float) if "q" in atoms else None
+        self.pos    = atoms[["x", "y", "z"]].to_numpy(float)
+        self.image  = atoms[["ix", "iy", "iz"]].to_numpy(np.int64) if "ix" in atoms else None
+        self.vel    = vel                                   # (n,3) 按 ids 对齐，或 None
+
+    @property
+    def lengths(self):
+        return self.box[:, 1] - self.box[:, 0]
+
+
+# ---------------------------- 写 ----------------------------
+def _write_rows(f, fmt, arr, chunk=CHUNK_ROWS):
+    """二维 float 数组按行块批量 %-格式化写出。"""
+    for s in range(0, len(arr), chunk):
+        blk = arr[s:s + chunk]
+        f.write((fmt * len(blk)) % tuple(blk.ravel().tolist()))
+
+
+def write_data(path, box, pos, types, q=None, vel=None, masses=None, ids=None,
+               mol=None, atom_style="charge", tilt=None, title="LAMMPS data file"):
+    """
+    box = ((xlo,xhi),(ylo,yhi),(zlo,zhi))；types / q / mol 为 (n,) 数组；vel (n,3) Å/fs (real)。
+    masses = {type: mass}，None 时不写 Masses 段 (由 in 文件的 mass 命令给出)。
+    """
+    pos = np.asarray(pos, dtype=float)
+    n = len(pos)
+    ids = np.arange(1, n + 1) if ids is None else np.asarray(ids)
+    types = np.asarray(types)
+    ntypes = int(types.max()) if n else 0
+    if masses:
+        ntypes = max(ntypes, max(masses))
+    cols = {"id": ids, "type": types, "x": pos[:, 0], "y": pos[:, 1], "z": pos[:, 2],
+            "q": np.zeros(n) if q is None else np.asarray(q, dtype=float),
+            "mol": np.ones(n) if mol is None else np.asarray(mol)}
+    names = STYLE_COLS[atom_style]
+    fmt = " ".join({"id": "%d", "type": "%d", "mol": "%d", "q": "%.6f"}.get(c, "%.8f")
+                   for c in names) + "\n"
+
+    with open(path, "w") as f:
+        f.write(f"{title}\n\n{n} atoms\n{ntypes} atom types\n\n")
+        for (lo, hi), ax in zip(box, "xyz"):
+            f.write(f"{lo:.10f} {hi:.10f} {ax}lo {ax}hi\n")
+        if tilt is not None:
+            f.write("{:.10f} {:.10f} {:.10f} xy xz yz\n".format(*tilt))
+        if masses:
+            f.write("\nMasses\n\n" + "".join(f"{t} {m}\n" for t, m in sorted(masses.items())))
+        f.write(f"\nAtoms # {atom_style}\n\n")
+        _write_rows(f, fmt, np.column_stack([np.asarray(cols[c], dtype=float) for c in names]))
+        if vel is not None:
+            f.write("\nVelocities\n\n")
+            _write_rows(f, "%d %.10f %.10f %.10f\n",
+                        np.column_stack([ids.astype(float), np.asarray(vel, dtype=float)]))
+
+
+# ---------------------------- 读 ----------------------------
+def _parse_header(text):
+    natoms = ntypes = 0
+    box = np.zeros((3, 2)); tilt = None
+    for line in text.splitlines()[1:]:                       # 第 1 行是标题
+        tok = line.split("#")[0].split()
+        if not tok:
+            continue
+        if tok[-1] == "atoms" and len(tok) == 2:
+            natoms = int(tok[0])
+        elif tok[-2:] == ["atom", "types"]:
+            ntypes = int(tok[0])
+        elif len(tok) == 4 and tok[2][1:] == "lo" and tok[2][0] in "xyz":
+            box["xyz".index(tok[2][0])] = float(tok[0]), float(tok[1])
+        elif tok[-3:] == ["xy", "xz", "yz"]:
+            tilt = tuple(float(v) for v in tok[:3])
+    return natoms, ntypes, box, tilt
+
+
+def read_header(path):
+    """只解析头部 → (natoms, ntypes, box (3,2), tilt)；大文件也只碰开头几百字节。"""
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        h = _RE_SECTION.search(mm)
+        return _parse_header(mm[:h.start() if h else len(mm)].decode())
+
+
+def _read_block(buf, nrows, names=None):
+    return pd.read_csv(io.BytesIO(buf), sep=r"\s+", header=None, nrows=nrows,
+                       names=names, comment="#", engine="c")
+
+
+def read_data(path, atom_style=None):
+    """data 文件 → LammpsData。atom_style=None 时取 'Atoms # style' 注释，缺省按 charge。"""
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        heads = list(_RE_SECTION.finditer(mm))
+        if not heads:
+            raise ValueError(f"{path}: 找不到任何段 (Atoms / Masses ...)")
+        natoms, ntypes, box, tilt = _parse_header(mm[:heads[0].start()].decode())
+        ends = [h.start() for h in heads[1:]] + [len(mm)]
+        body = {h.group(1).decode(): (h, mm[h.end():end]) for h, end in zip(heads, ends)}
+
+        masses = {}
+        if "Masses" in body:
+            m = _read_block(body["Masses"][1], ntypes)
+            masses = dict(zip(m[0].astype(int), m[1].astype(float)))
+
+        if "Atoms" not in body:
+            raise ValueError(f"{path}: 没有 Atoms 段")
+        h, buf = body["Atoms"]
+        style = atom_style or (h.group(2).decode().lstrip("#").strip() if h.group(2) else "charge")
+        if style not in STYLE_COLS:
+            raise ValueError(f"atom_style '{style}' 不支持 (可选 {list(STYLE_COLS)})")
+        atoms = _read_block(buf, natoms)
+        names = STYLE_COLS[style]
+        if atoms.shape[1] == len(names) + 3:
+            names = names + ["ix", "iy", "iz"]
+        elif atoms.shape[1] != len(names):
+            raise ValueError(f"{path}: Atoms 段 {atoms.shape[1]} 列，与 atom_style '{style}' 不符")
+        atoms.columns = names
+
+        vel = None
+        if "Velocities" in body:
+            v = _read_block(body["Velocities"][1], natoms).to_numpy(float)
+            order = pd.Index(v[:, 0].astype(np.int64)).get_indexer(atoms["id"].to_numpy(np.int64))
+            vel = np.where((order >= 0)[:, None], v[np.maximum(order, 0), 1:4], np.nan)
+    return LammpsData(path, natoms, ntypes, box, tilt, masses, style, atoms, vel)
+
+
+# ---------------------------- 校验 ----------------------------
+def validate(d, min_dist=None, periodic=(True, True, False)):
+    """返回问题列表 (空 = 通过)。min_dist 给定时用 cKDTree 查最近原子间距。"""
+    bad = []
+    if len(d.ids) != d.natoms:
+        bad.append(f"Atoms 段 {len(d.ids)} 行, 头部声明 {d.natoms}")
+    if len(np.unique(d.ids)) != len(d.ids):
+        bad.append("原子 id 有重复")
+    if d.types.size and (d.types.min() < 1 or d.types.max() > d.ntypes):
+        bad.append(f"原子类型超出 1..{d.ntypes}")
+    if d.masses and set(np.unique(d.types)) - set(d.masses):
+        bad.append("有类型没有 Masses")
+    lo, hi = d.box[:, 0], d.box[:, 1]
+    out = ((d.pos < lo) | (d.pos > hi)) & ~np.asarray(periodic)
+    if out.any():
+        bad.append(f"{int(out.any(axis=1).sum())} 个原子在非周期方向超出盒子")
+    if d.vel is not None and not np.isfinite(d.vel).all():
+        bad.append("Velocities 段缺原子或含非有限值")
+    if min_dist is not None and len(d.pos) > 1:
+        from scipy.spatial import cKDTree
+        L = d.lengths
+        size = np.where(periodic, L, L + 2 * min_dist + 1.0)   # 非周期方向加宽 → 不环绕
+        p = np.mod(d.pos - lo, size)
+        dist, _ = cKDTree(p, boxsize=size).query(p, k=2)
+        dmin = dist[:, 1].min()
+        if dmin < min_dist:
+            bad.append(f"最近原子间距 {dmin:.3f} Å < {min_dist} Å "
+                       f"({int((dist[:, 1] < min_dist).sum())} 个原子)")
+    return bad
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("用法: python lammps_data.py DATA [MIN_DIST]")
+    min_dist = float(sys.argv[2]) if len(sys.argv) > 2 else None
+    d = read_data(sys.argv[1])
+    n_by_type = dict(zip(*np.unique(d.types, return_counts=True)))
+    print(f"[OK] {d.path}: {d.natoms} 原子, 类型计数 {n_by_type}, style={d.style}")
+    print(f"     盒子 {d.lengths.round(4).tolist()} Å, z {d.pos[:, 2].min():.3f} – {d.pos[:, 2].max():.3f}"
+          f", 速度段 {'有' if d.vel is not None else '无'}")
+    bad = validate(d, min_dist)
+    for b in bad:
+        print(f"[!] {b}")
+    sys.exit(1 if bad else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------
+# 追踪数组 + 在场位掩码 (帧 × id)
+#   boundary p p f + wall/reflect: 原子会飞出或被删除 → 某些帧里缺席
+#   值数组 values[列] (F, N) 缺席处为 NaN；另带显式在场掩码，按位打包
+#   (np.packbits, 每字节 8 个 id)，缺席与"值本身是 NaN"(如温度被过滤) 区分开
+#   首次 / 末次出现、基线窗口、跳点窗口平均都在 (帧 × id) 数组上向量化完成，
+#   不做逐 id 的字典查找
+#   落盘: .npz (ids / frame / time_ps / bits / 各值列)，02 写、05a 读
+# -------------------------------------------------------------
+
+import numpy as np, pandas as pd
+
+_BITORDER = "little"
+
+
+def scatter_ids(track_ids, frame_ids):
+    """track_ids (已排序) 中的列号；不在追踪集合里的为 -1。"""
+    col = np.searchsorted(track_ids, frame_ids)
+    col = np.clip(col, 0, len(track_ids) - 1)
+    return np.where(track_ids[col] == frame_ids, col, -1)
+
+
+def pack(present):
+    """(F, N) bool → (F, ⌈N/8⌉) uint8。"""
+    return np.packbits(np.asarray(present, dtype=bool), axis=-1, bitorder=_BITORDER)
+
+
+def unpack(bits, n):
+    return np.unpackbits(bits, axis=-1, count=n, bitorder=_BITORDER).astype(bool)
+
+
+def first_true(m):
+    """每列第一个 True 的行号；整列 False → -1。"""
+    return np.where(m.any(axis=0), np.argmax(m, axis=0), -1)
+
+
+def last_true(m):
+    return np.where(m.any(axis=0), len(m) - 1 - np.argmax(m[::-1], axis=0), -1)
+
+
+def take_rows(a, rows):
+    """a (F, N)，rows (N,) 每列取一行 (-1 = 无) → (N,)，无处为 NaN。"""
+    rows = np.asarray(rows)
+    out = a[np.maximum(rows, 0), np.arange(a.shape[1])].astype(float)
+    out[rows < 0] = np.nan
+    return out
+
+
+def masked_mean(a, m):
+    """按列 (axis=0) 在 m 为真且有限处求均值；没有有效值 → NaN。"""
+    ok = m & np.isfinite(a)
+    n = ok.sum(axis=0)
+    s = np.where(ok, a, 0.0).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n > 0, s / n, np.nan)
+
+
+class Track:
+    """(帧 × id) 追踪数组。ids 升序；values[col] (F, N) float，缺席 = NaN；bits 为打包的在场掩码。"""
+
+    def __init__(self, ids, frame, time_ps, cols=(), bits=None, values=None):
+        self.ids     = np.asarray(ids, dtype=np.int64)
+        self.frame   = np.asarray(frame, dtype=np.int64)
+        self.time_ps = np.asarray(time_ps, dtype=float)
+        F, N = len(self.frame), len(self.ids)
+        if np.any(np.diff(self.ids) <= 0):
+            raise ValueError("Track: ids 须严格升序 (np.unique)")
+        self.bits   = np.zeros((F, (N + 7) // 8), dtype=np.uint8) if bits is None else bits
+        self.values = ({c: np.full((F, N), np.nan) for c in cols} if values is None
+                       else dict(values))
+
+    @property
+    def n_frames(self):
+        return len(self.frame)
+
+    @property
+    def n_ids(self):
+        return len(self.ids)
+
+    @property
+    def present(self):
+        return unpack(self.bits, self.n_ids)
+
+    def set_frame(self, r, frame_ids, cols):
+        """第 r 行: frame_ids 为该帧全部 id，cols = {列: 同长度数组}；只写被追踪的 id 并置在场位。"""
+        col = scatter_ids(self.ids, np.asarray(frame_ids, dtype=np.int64))
+        ok  = col >= 0
+        pres = np.zeros(self.n_ids, dtype=bool)
+        pres[col[ok]] = True
+        self.bits[r] = pack(pres)
+        for c, v in cols.items():
+            self.values[c][r, col[ok]] = np.asarray(v, dtype=float)[ok]
+
+    def first_last(self):
+        """每个 id 首次 / 末次在场的行号 (从未出现 = -1)。"""
+        p = self.present
+        return first_true(p), last_true(p)
+
+    def rows(self, sel):
+        """按行 (帧) 取子集，sel 为 bool 掩码或行号。"""
+        p = self.present[sel]
+        return Track(self.ids, self.frame[sel], self.time_ps[sel], bits=pack(p),
+                     values={c: v[sel] for c, v in self.values.items()})
+
+    # ---------------- 长表 / 落盘 ----------------
+    def to_long(self):
+        """只含在场的 (帧, id)，帧优先排序: id, frame, time_ps, <值列>。"""
+        r, c = np.nonzero(self.present)
+        out = pd.DataFrame({"id": self.ids[c], "frame": self.frame[r], "time_ps": self.time_ps[r]})
+        for name, v in self.values.items():
+            out[name] = v[r, c]
+        return out
+
+    @classmethod
+    def from_long(cls, df, cols=None):
+        """长表 (id, time_ps[, frame], 值列) → Track；一行 = 一次在场。"""
+        cols = [c for c in (cols or df.columns) if c in df and c not in ("id", "frame", "time_ps")]
+        ids = np.unique(df["id"].to_numpy(np.int64))
+        t, r = np.unique(df["time_ps"].to_numpy(float), return_inverse=True)
+        frame = (df.groupby(r)["frame"].first().to_numpy(np.int64) if "frame" in df
+                 else np.arange(len(t)))
+        c = np.searchsorted(ids, df["id"].to_numpy(np.int64))
+        trk = cls(ids, frame, t, cols)
+        p = np.zeros((len(t), len(ids)), dtype=bool)
+        p[r, c] = True
+        trk.bits = pack(p)
+        for name in cols:
+            trk.values[name][r, c] = pd.to_numeric(df[name], errors="coerce").to_numpy(float)
+        return trk
+
+    def save(self, path):
+        np.savez_compressed(path, ids=self.ids, frame=self.frame, time_ps=self.time_ps,
+                            bits=self.bits, cols=np.array(list(self.values), dtype=str),
+                            **{f"v_{i}": v for i, v in enumerate(self.values.values())})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as z:
+            cols = z["cols"].tolist()
+            return cls(z["ids"], z["frame"], z["time_ps"], bits=z["bits"],
+                       values={c: z[f"v_{i}"] for i, c in enumerate(cols)})
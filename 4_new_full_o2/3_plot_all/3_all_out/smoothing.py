@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------
+# 平滑滤波 (全部 O(n)，边缘不补零)
+#   running_mean : 累加和求居中滑动平均；边缘处只对窗口内实有的点取平均，忽略 NaN
+#   savgol       : Savitzky–Golay (mode="interp"，边缘用多项式拟合)
+#   ema          : 指数滑动平均 (一阶 IIR)，可带状态分块续算
+#   stream_running_mean : 逐块输入 / 输出，结果与 running_mean 逐点一致，
+#                         内存只占一个块 + 窗口
+#   iter_column_chunks  : 大日志按块读出某一列，配合 stream_* 使用
+# -------------------------------------------------------------
+
+import numpy as np, pandas as pd
+
+
+def _halves(win):
+    win = int(win)
+    h_lo = (win - 1) // 2
+    return h_lo, win - 1 - h_lo
+
+
+def _window_means(y, offset, i0, i1, h_lo, h_hi, total=None):
+    """y 的第 0 个元素对应全局下标 offset；返回全局位置 [i0, i1) 的窗口均值。"""
+    ok = np.isfinite(y)
+    ref = np.nanmean(y) if ok.any() else 0.0           # 减去参考值，降低累加和的舍入误差
+    cs = np.concatenate([[0.0], np.cumsum(np.where(ok, y - ref, 0.0))])
+    cn = np.concatenate([[0], np.cumsum(ok)])
+    i  = np.arange(i0, i1)
+    lo = np.maximum(i - h_lo, 0) - offset
+    hi = i + h_hi + 1
+    if total is not None:
+        hi = np.minimum(hi, total)
+    hi = np.minimum(hi - offset, len(y))
+    n  = cn[hi] - cn[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n > 0, (cs[hi] - cs[lo]) / n + ref, np.nan)
+
+
+def running_mean(y, win):
+    """居中滑动平均；win<2 原样返回；win 超过长度时截到长度。"""
+    y = np.asarray(y, dtype=float)
+    if win is None or win < 2 or y.size == 0:
+        return y.copy()
+    h_lo, h_hi = _halves(min(int(win), y.size))
+    return _window_means(y, 0, 0, y.size, h_lo, h_hi, y.size)
+
+
+def savgol(y, win, polyorder=2):
+    from scipy.signal import savgol_filter
+    y = np.asarray(y, dtype=float)
+    if win is None or win < 2 or y.size == 0:
+        return y.copy()
+    win = min(int(win), y.size)
+    win -= (win % 2 == 0)                               # 需奇数窗口
+    if win <= polyorder:
+        return y.copy()
+    return savgol_filter(y, win, polyorder, mode="interp")
+
+
+def ema(y, alpha=None, span=None, zi=None, return_state=False):
+    """
+    y_s[k] = α·y[k] + (1−α)·y_s[k−1]；给 span 则 α = 2/(span+1)。
+    zi: 上一块末尾的平滑值 (分块续算用)；首块默认从 y[0] 起步，不从 0 起步。
+    """
+    from scipy.signal import lfilter
+    y = np.asarray(y, dtype=float)
+    if alpha is None:
+        alpha = 2.0 / (float(span) + 1.0)
+    if y.size == 0:
+        return (y.copy(), zi) if return_state else y.copy()
+    prev = y[0] if zi is None else zi
+    out, _ = lfilter([alpha], [1.0, alpha - 1.0], y, zi=[(1.0 - alpha) * prev])
+    return (out, out[-1]) if return_state else out
+
+
+def smooth(y, win, method="mean", polyorder=2):
+    """统一入口: method = 'mean' | 'savgol' | 'ema' (ema 时 win 当作 span)。"""
+    if win is None or win < 2:
+        return np.asarray(y, dtype=float).copy()
+    if method == "mean":
+        return running_mean(y, win)
+    if method == "savgol":
+        return savgol(y, win, polyorder)
+    if method == "ema":
+        return ema(y, span=win)
+    raise ValueError(f"未知平滑方法: {method}")
+
+
+def stream_running_mean(chunks, win):
+    """逐块 yield 平滑结果；右侧窗口不足的点延后到下一块 (或结尾) 再输出。"""
+    h_lo, h_hi = _halves(max(int(win), 1))
+    buf, start, emitted = np.empty(0), 0, 0
+    for chunk in chunks:
+        buf = np.concatenate([buf, np.asarray(chunk, dtype=float)])
+        ready = start + len(buf) - h_hi
+        if ready > emitted:
+            yield _window_means(buf, start, emitted, ready, h_lo, h_hi)
+            emitted = ready
+        keep = max(emitted - h_lo, start)              # 只留下一批输出需要的左侧上下文
+        buf, start = buf[keep - start:], keep
+    total = start + len(buf)
+    if total > emitted:
+        yield _window_means(buf, start, emitted, total, h_lo, h_hi, total)
+
+
+def stream_ema(chunks, alpha=None, span=None):
+    zi = None
+    for chunk in chunks:
+        out, zi = ema(chunk, alpha, span, zi=zi, return_state=True)
+        yield out
+
+
+def iter_column_chunks(path, col, chunksize=1_000_000, comment="#", names=None):
+    """按块读取空白分隔日志的某一列 (列名或列号)，不整体载入。"""
+    for df in pd.read_csv(path, sep=r"\s+", comment=comment, header=None,
+                          names=names, chunksize=chunksize, engine="c"):
+        yield df[col].to_numpy(float)
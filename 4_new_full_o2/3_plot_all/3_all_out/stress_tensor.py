@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------
+# 应力张量派生量 (全部向量化，单位同输入 GPa)
+#   唯一的公式来源: 02 (逐帧) / 05a (跳点窗口平均张量) 写列，
+#   08 / 10 只在旧文件缺列时补算，不再各自重写公式
+#
+#   P_hydro_GPa          = (σxx + σyy + σzz) / 3           (LAMMPS 符号: 拉为正)
+#   sigma_dev_GPa        = ½·√[(σxx−σyy)² + (σyy−σzz)² + (σzz−σxx)²]   (只含正应力, 沿用 05a 定义)
+#   sigma_vm_GPa         = √{½[(σxx−σyy)² + (σyy−σzz)² + (σzz−σxx)²] + 3(τxy² + τxz² + τyz²)}
+#   sigma_dev_signed_GPa = sign(P_hydro) · sigma_dev
+#   sigma_vm_signed_GPa  = sign(σzz) · sigma_vm            (原 10 的构造)
+#   sigma_1/2/3_GPa      = 主应力 (降序)，N×3×3 批量 eigvalsh
+#   tau_max_GPa          = (σ1 − σ3) / 2
+#
+# 原始 c_MyStress[1..6] (compute stress/atom, units real: 压强×体积 atm·Å^3) → GPa
+#   唯一换算 virial_to_gpa:  σ = c_MyStress[k] / V × ATM_TO_GPA
+#   与 in.gra_o 的 v_s_*_gpa = c_MyStress[k]/c_MyVoro[1]*v_Atm2GPa 一致；
+#   stress/atom 本身已是 −(压强张量×体积)，不再加负号 (拉为正)
+# -------------------------------------------------------------
+
+import numpy as np
+
+STRESS_COLS  = ["v_s_xx_gpa", "v_s_yy_gpa", "v_s_zz_gpa",
+                "v_s_xy_gpa", "v_s_xz_gpa", "v_s_yz_gpa"]
+DERIVED_COLS = ["P_hydro_GPa", "sigma_dev_GPa", "sigma_vm_GPa",
+                "sigma_dev_signed_GPa", "sigma_vm_signed_GPa",
+                "sigma_1_GPa", "sigma_2_GPa", "sigma_3_GPa", "tau_max_GPa"]
+VIRIAL_COLS  = [f"c_MyStress[{k}]" for k in range(1, 7)]     # 与 STRESS_COLS 一一对应
+ATM_TO_GPA   = 0.000101325                                   # in.gra_o 的 Atm2GPa (units real)
+
+
+def virial_to_gpa(vir, vol):
+    """c_MyStress (atm·Å^3) / 每原子体积 (Å^3) → GPa；vir 为 (N, 6) 时 vol 取 (N,) 逐行。"""
+    vir, vol = np.asarray(vir, dtype=float), np.asarray(vol, dtype=float)
+    if vir.ndim == 2 and vol.ndim == 1:
+        vol = vol[:, None]
+    return vir / vol * ATM_TO_GPA
+
+
+def principal(sxx, syy, szz, sxy, sxz, syz):
+    """(N,) ×6 → (N, 3) 主应力，降序；任一分量非有限的行为 NaN。"""
+    sxx, syy, szz, sxy, sxz, syz = (np.ravel(c) for c in np.broadcast_arrays(
+        *(np.asarray(c, dtype=float) for c in (sxx, syy, szz, sxy, sxz, syz))))
+    S = np.empty((sxx.size, 3, 3))
+    S[:, 0, 0], S[:, 1, 1], S[:, 2, 2] = sxx, syy, szz
+    S[:, 0, 1] = S[:, 1, 0] = sxy
+    S[:, 0, 2] = S[:, 2, 0] = sxz
+    S[:, 1, 2] = S[:, 2, 1] = syz
+    ok  = np.isfinite(S).all(axis=(1, 2))
+    out = np.full((sxx.size, 3), np.nan)
+    if ok.any():
+        out[ok] = np.linalg.eigvalsh(S[ok])[:, ::-1]
+    return out
+
+
+def invariants(sxx, syy, szz, sxy=np.nan, sxz=np.nan, syz=np.nan):
+    """六分量 (标量或数组) → {列名: ndarray}；剪切缺失时 vm / 主应力为 NaN。"""
+    sxx, syy, szz, sxy, sxz, syz = np.broadcast_arrays(
+        *(np.asarray(c, dtype=float) for c in (sxx, syy, szz, sxy, sxz, syz)))
+    d2  = (sxx - syy)**2 + (syy - szz)**2 + (szz - sxx)**2
+    P   = (sxx + syy + szz) / 3.0
+    dev = 0.5 * np.sqrt(d2)
+    vm  = np.sqrt(0.5 * d2 + 3.0 * (sxy**2 + sxz**2 + syz**2))
+    pr  = principal(sxx, syy, szz, sxy, sxz, syz).reshape(sxx.shape + (3,))
+    return {"P_hydro_GPa": P, "sigma_dev_GPa": dev, "sigma_vm_GPa": vm,
+            "sigma_dev_signed_GPa": np.sign(P) * dev,
+            "sigma_vm_signed_GPa":  np.sign(szz) * vm,
+            "sigma_1_GPa": pr[..., 0], "sigma_2_GPa": pr[..., 1], "sigma_3_GPa": pr[..., 2],
+            "tau_max_GPa": 0.5 * (pr[..., 0] - pr[..., 2])}
+
+
+def add_invariants(df, cols=STRESS_COLS, overwrite=True):
+    """
+    在 DataFrame 上追加 DERIVED_COLS。正应力三列缺任一则原样返回；
+    剪切列缺失按 NaN 处理。overwrite=False 只补缺的列 (旧 CSV 兼容)。
+    """
+    if not all(c in df.columns for c in cols[:3]):
+        return df
+    if not overwrite and all(c in df.columns for c in DERIVED_COLS):
+        return df
+    comp = [df[c].to_numpy(float) if c in df.columns else np.full(len(df), np.nan) for c in cols]
+    for k, v in invariants(*comp).items():
+        if overwrite or k not in df.columns:
+            df[k] = v
+    return df
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------
+# temps.out (fix ave/time) 读取 + 窗口统计
+#   - 列名取自文件头 "# TimeStep c_Tmobile c_Tsub c_Tbeam"，不按列号猜
+#     (4_new_full_o2 只写了 c_Tsub c_Tbeam 两列)
+#   - pandas C 引擎解析，结果缓存到 <temps.out>.npz；文件没变就直接读缓存
+#   - 时间窗 + 排除区间的掩码与统计全部在 NumPy 上完成
+#   - find_runs: 在扫描目录 (cp.sh 生成的 *_temp/) 下递归找所有 temps.out
+# -------------------------------------------------------------
+
+import os, re, glob
+import numpy as np, pandas as pd
+
+CACHE_SUFFIX = ".npz"
+REGEX_TEMP   = r'(\d+)_temp'           # 目录名 → 设定温度 (cp.sh 的 ${T}_temp)
+
+
+def _header_columns(path):
+    """最后一行以 # 开头的注释即列名行。"""
+    cols = None
+    with open(path, "r", errors="ignore") as f:
+        for line in f:
+            if not line.startswith("#"):
+                break
+            cols = line.lstrip("#").split()
+    return cols
+
+
+def load_temps(path, cache=True):
+    """返回 {列名: ndarray}；缓存命中时不重新解析文本。"""
+    path  = str(path)
+    cpath = path + CACHE_SUFFIX
+    st    = os.stat(path)
+    stamp = np.array([st.st_size, st.st_mtime_ns], dtype=np.int64)
+    if cache and os.path.exists(cpath):
+        with np.load(cpath, allow_pickle=False) as z:
+            if np.array_equal(z["_stamp"], stamp):
+                return {k: z[k] for k in z.files if k != "_stamp"}
+
+    cols = _header_columns(path)
+    df = pd.read_csv(path, sep=r"\s+", comment="#", header=None, engine="c")
+    if not cols or len(cols) != df.shape[1]:
+        cols = ["TimeStep"] + [f"col{i}" for i in range(1, df.shape[1])]
+    data = {c: df[i].to_numpy(float) for i, c in enumerate(cols)}
+    if cache:
+        try:
+            np.savez(cpath, _stamp=stamp, **data)
+        except OSError:
+            pass
+    return data
+
+
+def window_mask(t, span=None, excludes=()):
+    """span=(a,b) 保留 a≤t≤b (None 端不限)；excludes=[(a,b),...] 剔除 a≤t≤b。"""
+    t = np.asarray(t, dtype=float)
+    mask = np.ones(t.shape, dtype=bool)
+    if span is not None:
+        a, b = span
+        if a is not None: mask &= t >= a
+        if b is not None: mask &= t <= b
+    for a, b in excludes:
+        if a is None or b is None:
+            continue
+        mask &= ~((t >= a) & (t <= b))
+    return mask
+
+
+def window_stats(y, mask=None):
+    """掩码内的 n / mean / std / median / p05 / p95 / min / max。"""
+    y = np.asarray(y, dtype=float)
+    if mask is not None:
+        y = y[mask]
+    y = y[np.isfinite(y)]
+    if y.size == 0:
+        return {"n": 0, "mean": np.nan, "std": np.nan, "median": np.nan,
+                "p05": np.nan, "p95": np.nan, "min": np.nan, "max": np.nan}
+    p05, med, p95 = np.percentile(y, [5, 50, 95])
+    return {"n": int(y.size), "mean": float(y.mean()), "std": float(y.std(ddof=1)) if y.size > 1 else 0.0,
+            "median": float(med), "p05": float(p05), "p95": float(p95),
+            "min": float(y.min()), "max": float(y.max())}
+
+
+def find_runs(root, name="temps.out", regex=REGEX_TEMP):
+    """递归找 root 下所有 temps.out → [(标签, 设定温度或 None, 路径)]，按温度排序。"""
+    runs = []
+    for path in glob.glob(os.path.join(root, "**", name), recursive=True):
+        rel = os.path.relpath(os.path.dirname(path), root)
+        m = re.search(regex, rel)
+        runs.append((rel if rel != "." else os.path.basename(os.path.abspath(root)),
+                     int(m.group(1)) if m else None, path))
+    runs.sort(key=lambda r: (r[1] is None, r[1] or 0, r[0]))
+    return runs
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------
+# 轨迹归档: 逐帧、逐列独立压缩 + 帧索引 (替代 gzip 整文件压缩)
+#   - 每帧 = 帧头块 (原样的 dump 9 行 / extxyz 2 行) + 每列一个压缩块；
+#     文件尾存帧索引 (每块偏移 / timestep / 原子数 / 盒子)，随机读任意帧的任意列
+#   - 块编码 (自描述, 1 字节标签 + 压缩载荷); 整数类编码同时试"差分 / 不差分"取小的
+#     (按 id 排序的晶格原子坐标差分后很小):
+#       i/I: 整数列 (id / type ...)                  → int64 字节重排 (shuffle)
+#       d/D: 文本里只有 ≤ MAX_DECIMALS 位小数的浮点列 → 十进制定点整数 (无损, q / 10^d 精确还原)
+#       f  : 其余浮点列 float64 字节重排 (无损)
+#       q/Q: 定点量化 round(v / 精度) (有损, 精度由 QUANT 按列名通配给出)
+#       s  : 字符串列 (extxyz species) 类别表 + uint16 编码
+#     压缩: zstandard 已安装用 zstd，否则 zlib (同一文件内统一，记在索引里)
+#   - 读: os.pread 按块读取 (线程安全)，多帧用线程池并行解压 (zlib / zstd 释放 GIL)
+#   - traj_index.load_index 直接识别归档文件 → 各分析脚本不改代码即可读归档
+# 用法: python traj_archive.py pack TRAJ [-o OUT] [--lossy | --quant "x y z=1e-4;v_s_*=1e-3"] [--workers N]
+#       python traj_archive.py unpack ARCHIVE [-o TEXT]      (还原为文本 dump / extxyz)
+#       python traj_archive.py info ARCHIVE
+# -------------------------------------------------------------
+
+# ===== USER CONFIG =====
+ARCHIVE_SUFFIX = ".trjz"
+CODEC          = "auto"          # 'auto' (有 zstandard 用 zstd) | 'zstd' | 'zlib'
+LEVEL          = None            # 压缩级别; None = zstd 9 / zlib 6
+WORKERS        = None            # 并行线程数; None = min(8, 可用核)
+MAX_DECIMALS   = 12              # 无损十进制定点检测的最多小数位
+# --lossy 时的定点精度 (键 = 空格分隔的列名通配，值 = 量化步长，单位同该列)
+QUANT_PRESET   = {
+    "x y z xu yu zu pos_*": 1e-4,          # Å
+    "vx vy vz": 1e-6,                      # Å/fs
+    "v_s_* c_MyStress*": 1e-4,             # GPa / virial
+}
+# =======================
+
+import io, os, re, json, zlib, fnmatch, argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np, pandas as pd
+from traj_index import FrameIndex, load_index, resolve_paths, frame_blocks
+
+MAGIC = b"GRATRJZ\x01"
+_TAIL = 16                                    # 文件尾: 索引偏移 (int64) + MAGIC
+
+_RE_PROPS = re.compile(r'Properties=(\S+)')
+_XYZ_NAMES = {"pos": ["x", "y", "z"]}
+
+
+# ---------------------------- 压缩器 ----------------------------
+def _codec(name, level=None):
+    """→ (名字, 压缩函数, 解压函数)。"""
+    if name in ("auto", "zstd"):
+        try:
+            import zstandard
+        except ImportError:
+            if name == "zstd":
+                raise ImportError("CODEC='zstd' 需要 zstandard (pip install zstandard)")
+        else:
+            lv = 9 if level is None else level
+            return ("zstd", lambda b: zstandard.ZstdCompressor(level=lv).compress(b),
+                    lambda b: zstandard.ZstdDecompressor().decompress(b))
+    lv = 6 if level is None else level
+    return "zlib", lambda b: zlib.compress(b, lv), zlib.decompress
+
+
+# ---------------------------- 块编码 ----------------------------
+def _shuffle(a):
+    return np.ascontiguousarray(a).view(np.uint8).reshape(-1, a.itemsize).T.tobytes()
+
+
+def _unshuffle(buf, dtype):
+    dt = np.dtype(dtype)
+    return np.frombuffer(buf, np.uint8).reshape(dt.itemsize, -1).T.copy().view(dt).ravel()
+
+
+_NAN_Q = np.iinfo(np.int64).min
+_PROBE = 1024                                  # 十进制位数先在前若干个值上试
+
+
+def quant_step(col, quant):
+    """列名 → 量化步长 (None = 无损)。quant = {"x y z": 1e-4, ...}。"""
+    for pats, step in (quant or {}).items():
+        if any(fnmatch.fnmatchcase(col, p) for p in pats.split()):
+            return float(step)
+    return None
+
+
+def _decimals(f):
+    """f 的每个值都恰好等于 round(f·10^d) / 10^d 的最小 d (≤ MAX_DECIMALS)；否则 None。"""
+    if not np.isfinite(f).all():
+        return None
+    for d in range(MAX_DECIMALS + 1):
+        s = 10.0 ** d
+        for part in (f[:_PROBE], f):
+            q = np.round(part * s)
+            if not (np.abs(q).max(initial=0) < 2**53 and np.array_equal(q / s, part)):
+                break
+        else:
+            return d
+    return None
+
+
+def encode_column(v, step=None, comp=zlib.compress):
+    """一列 → 标签字节 + 压缩载荷。"""
+    v = np.asarray(v)
+    if v.dtype.kind in "OUS":
+        cats, codes = np.unique(v.astype(str), return_inverse=True)
+        blob = "\n".join(cats).encode()
+        return b"s" + comp(np.uint32(len(blob)).tobytes() + blob + codes.astype("<u2").tobytes())
+    if step is not None:
+        f = v.astype(float)
+        q = np.where(np.isfinite(f), np.round(f / step), 0).astype("<i8")
+        q[~np.isfinite(f)] = _NAN_Q
+        tags, head = b"qQ", np.float64(step).tobytes()
+    elif v.dtype.kind in "iub":
+        q, tags, head = v.astype("<i8"), b"iI", b""
+    else:
+        f = v.astype("<f8")
+        d = _decimals(f)
+        if d is None:
+            return b"f" + comp(_shuffle(f))
+        q, tags, head = np.round(f * 10.0 ** d).astype("<i8"), b"dD", bytes([d])
+    raw = comp(head + _shuffle(q))
+    dlt = comp(head + _shuffle(np.diff(q, prepend=np.int64(0))))   # int64 环绕, cumsum 精确还原
+    return tags[:1] + raw if len(raw) <= len(dlt) else tags[1:] + dlt
+
+
+def decode_column(buf, dec=zlib.decompress):
+    tag, body = buf[:1], dec(buf[1:])
+    if tag == b"f":
+        return _unshuffle(body, "<f8")
+    if tag == b"s":
+        n = int(np.frombuffer(body[:4], "<u4")[0])
+        cats = np.array(body[4:4 + n].decode().split("\n"), dtype=object)
+        return cats[np.frombuffer(body[4 + n:], "<u2")]
+    if tag not in (b"i", b"I", b"d", b"D", b"q", b"Q"):
+        raise ValueError(f"未知块类型 {tag!r}")
+    nh = {b"i": 0, b"d": 1, b"q": 8}[tag.lower()]
+    q = _unshuffle(body[nh:], "<i8")
+    if tag.isupper():
+        q = np.cumsum(q)
+    if tag in b"iI":
+        return q
+    if tag in b"dD":
+        return q / 10.0 ** body[0]
+    return np.where(q == _NAN_Q, np.nan, q * np.frombuffer(body[:8], "<f8")[0])
+
+
+# ---------------------------- 源帧解析 ----------------------------
+def _xyz_columns(comment):
+    """extxyz Properties → (展开后的列名, 每列类型 S/I/R/L)。pos → x y z，多分量 name_k。"""
+    m = _RE_PROPS.search(comment)
+    if not m:
+        return ["species", "x", "y", "z"], ["S", "R", "R", "R"]
+    f = m.group(1).split(":")
+    names, kinds = [], []
+    for name, kind, n in zip(f[0::3], f[1::3], map(int, f[2::3])):
+        sub = _XYZ_NAMES.get(name) if n == 3 else None
+        names += sub or ([name] if n == 1 else [f"{name}_{k}" for k in range(n)])
+        kinds += [kind] * n
+    return names, kinds
+
+
+def _parse_frame(block, fmt, natoms):
+    """文本帧 → (帧头字节, DataFrame)。"""
+    nh = 9 if fmt == "lammps-dump-text" else 2
+    cut = 0
+    for _ in range(nh):
+        cut = block.index(b"\n", cut) + 1
+    head = block[:cut]
+    if fmt == "lammps-dump-text":
+        names = head.splitlines()[8].decode().split()[2:]
+        dtype = None
+    else:
+        names, kinds = _xyz_columns(head.splitlines()[1].decode())
+        dtype = {c: str for c, k in zip(names, kinds) if k in "SL"}
+    df = pd.read_csv(io.BytesIO(block[cut:]), sep=r"\s+", header=None, names=names,
+                     nrows=natoms, dtype=dtype)
+    return head, df
+
+
+# ---------------------------- 写 ----------------------------
+def _workers(n=None):
+    return n or min(8, len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity")
+                    else os.cpu_count() or 1)
+
+
+def pack(src, out=None, quant=None, codec=CODEC, level=LEVEL, workers=WORKERS):
+    """文本轨迹 (可为拼接的多段, 见 traj_index) → 归档文件。返回输出路径。"""
+    idx = load_index(src)
+    if getattr(idx, "archived", False):
+        raise ValueError(f"{src} 已经是归档文件")
+    if idx.n_frames == 0:
+        raise ValueError(f"{src} 没有完整的帧")
+    out = out or idx.path + ARCHIVE_SUFFIX
+    cname, comp, _ = _codec(codec, level)
+    workers = _workers(workers)
+
+    # 列以第一帧为准 (拼接轨迹各段须一致)
+    _, part, j, block = next(frame_blocks(idx, [0]))
+    columns = list(_parse_frame(block, part.fmt, int(part.natoms[j]))[1].columns)
+    steps = {c: quant_step(c, quant) for c in columns}
+
+    def encode(item):
+        i, part, j, block = item
+        head, df = _parse_frame(block, part.fmt, int(part.natoms[j]))
+        if list(df.columns) != columns:
+            raise ValueError(f"第 {i} 帧的列 {list(df.columns)} 与第一帧 {columns} 不同")
+        return [comp(head)] + [encode_column(df[c].to_numpy(), steps[c], comp) for c in columns]
+
+    n = idx.n_frames
+    offs = np.zeros((n, len(columns) + 2), dtype=np.int64)   # 帧头块 + 各列块起点 + 帧终点
+    tmp = out + ".part"
+    with open(tmp, "wb") as f, ThreadPoolExecutor(workers) as ex:
+        f.write(MAGIC)
+        blocks = frame_blocks(idx, range(n))
+        batch = 4 * workers                                    # 有界预读，内存不随帧数增长
+        for s in range(0, n, batch):
+            chunk = [next(blocks) for _ in range(min(batch, n - s))]
+            for k, parts in enumerate(ex.map(encode, chunk)):
+                pos = f.tell()
+                offs[s + k] = np.r_[pos, pos + np.cumsum([len(p) for p in parts])]
+                f.write(b"".join(parts))
+        meta = {"version": 1, "fmt": idx.fmt, "codec": cname, "columns": columns,
+                "quant": {c: v for c, v in steps.items() if v is not None},
+                "source": [p.path for p in idx.parts]}
+        buf = io.BytesIO()
+        np.savez(buf, meta=np.array(json.dumps(meta)), offsets=offs,
+                 timestep=idx.timestep, natoms=idx.natoms, box=idx.box)
+        at = f.tell()
+        f.write(buf.getvalue())
+        f.write(np.int64(at).tobytes() + MAGIC)
+    os.replace(tmp, out)
+    return out
+
+
+# ---------------------------- 读 ----------------------------
+class ArchiveIndex(FrameIndex):
+    """归档文件的帧索引；fmt 保留源格式 (各脚本按源格式分支)，archived = True。"""
+    archived = True
+
+    def __init__(self, path, meta, z):
+        super().__init__(path, meta["fmt"], [], z["timestep"], z["natoms"], z["box"],
+                         meta["columns"])
+        self.meta    = meta
+        self.blocks  = z["offsets"]
+        self.col_pos = {c: k + 1 for k, c in enumerate(meta["columns"])}
+        self._fd     = os.open(path, os.O_RDONLY)
+        self._dec    = _codec(meta["codec"])[2]
+
+    def __del__(self):
+        try:
+            os.close(self._fd)
+        except (AttributeError, OSError):
+            pass
+
+    def _raw(self, i, k):
+        a, b = self.blocks[i, k], self.blocks[i, k + 1]
+        return os.pread(self._fd, int(b - a), int(a))
+
+    def header(self, i):
+        return self._dec(self._raw(i, 0))
+
+    def read(self, i, columns=None):
+        """第 i 帧 → DataFrame，只解压 columns 里的列 (不存在的列忽略)。"""
+        cols = self.columns if columns is None else [c for c in columns if c in self.col_pos]
+        return pd.DataFrame({c: decode_column(self._raw(i, self.col_pos[c]), self._dec)
+                             for c in cols})
+
+    def iter_frames(self, frames=None, columns=None, workers=WORKERS):
+        """按 frames 顺序 yield (i, DataFrame)；线程池并行解压，预读窗口有界。"""
+        frames = list(range(self.n_frames) if frames is None else frames)
+        workers = _workers(workers)
+        with ThreadPoolExecutor(workers) as ex:
+            for s in range(0, len(frames), 4 * workers):
+                sub = frames[s:s + 4 * workers]
+                yield from zip(map(int, sub), ex.map(lambda i: self.read(i, columns), sub))
+
+    def frame_text(self, i):
+        """还原为文本帧 (帧头原样；量化列按其精度的小数位，其余按最短往返表示 repr；
+        数值与源文件逐位相同，文本写法可能不同，如 155 → 155.0)。"""
+        df = self.read(i)
+        fmt = []
+        for c in df.columns:
+            step = self.meta["quant"].get(c)
+            fmt.append(f"%.{max(0, int(np.ceil(-np.log10(step))))}f" if step else "%s")
+        body = io.StringIO()
+        if len(df):
+            np.savetxt(body, df.to_numpy(object), fmt=" ".join(fmt))
+        return self.header(i) + body.getvalue().encode()
+
+
+def is_archive(path):
+    with open(path, "rb") as fh:
+        return fh.read(len(MAGIC)) == MAGIC
+
+
+def open_archive(path):
+    with open(path, "rb") as fh:
+        fh.seek(-_TAIL, os.SEEK_END)
+        tail = fh.read(_TAIL)
+        if tail[8:] != MAGIC:
+            raise ValueError(f"{path}: 归档文件尾损坏 (打包中断?)")
+        fh.seek(int(np.frombuffer(tail[:8], "<i8")[0]))
+        with np.load(io.BytesIO(fh.read()[:-_TAIL]), allow_pickle=False) as z:
+            z = dict(z)
+    return ArchiveIndex(str(path), json.loads(str(z["meta"])), z)
+
+
+def unpack(path, out=None):
+    a = open_archive(path)
+    out = out or (path[:-len(ARCHIVE_SUFFIX)] if path.endswith(ARCHIVE_SUFFIX) else path + ".txt")
+    with open(out, "wb") as f:
+        for i in range(a.n_frames):
+            f.write(a.frame_text(i))
+    return out
+
+
+def parse_quant(spec):
+    """'x y z=1e-4;v_s_*=1e-3' → {"x y z": 1e-4, "v_s_*": 1e-3}。"""
+    out = {}
+    for item in filter(None, (s.strip() for s in spec.split(";"))):
+        pats, _, step = item.rpartition("=")
+        out[pats.replace(",", " ").strip()] = float(step)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="轨迹归档: 逐帧逐列压缩 + 帧索引")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("pack");   p.add_argument("traj"); p.add_argument("-o", "--out")
+    p.add_argument("--lossy", action="store_true", help="按 QUANT_PRESET 定点量化")
+    p.add_argument("--quant", help="自定义量化, 例 'x y z=1e-4;v_s_*=1e-3'")
+    p.add_argument("--codec", default=CODEC); p.add_argument("--level", type=int, default=LEVEL)
+    p.add_argument("--workers", type=int, default=WORKERS)
+    p = sub.add_parser("unpack"); p.add_argument("archive"); p.add_argument("-o", "--out")
+    p = sub.add_parser("info");   p.add_argument("archive")
+    a = ap.parse_args()
+
+    if a.cmd == "pack":
+        quant = parse_quant(a.quant) if a.quant else (QUANT_PRESET if a.lossy else None)
+        out = pack(a.traj, a.out, quant, a.codec, a.level, a.workers)
+        src = sum(os.path.getsize(p) for p in resolve_paths(a.traj))
+        print(f"[OK] {out}: {src / 2**20:.1f} MB → {os.path.getsize(out) / 2**20:.1f} MB "
+              f"(×{src / os.path.getsize(out):.1f})")
+    elif a.cmd == "unpack":
+        print(f"[OK] → {unpack(a.archive, a.out)}")
+    else:
+        z = open_archive(a.archive)
+        print(f"[OK] {a.archive}: {z.fmt}, {z.n_frames} 帧, codec={z.meta['codec']}")
+        print(f"     列: {' '.join(z.columns)}")
+        if z.meta["quant"]:
+            print("     量化: " + ", ".join(f"{c}={s:g}" for c, s in z.meta["quant"].items()))
+        print(f"     来源: {' → '.join(z.meta['source'])}")
+
+
+if __name__ == "__main__":
+    main()
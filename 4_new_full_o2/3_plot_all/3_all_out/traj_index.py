@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------
+# 轨迹帧索引 (frame index)
+#   - 顺序扫描一次，记录每帧字节偏移 / timestep / 原子数 / 盒子
+#   - 索引缓存到 <轨迹>.fidx.npz；轨迹大小或修改时间变化 → 自动重建
+#   - 选帧: every=k 抽稀 | 时间窗 (ps) | 跳点附近加密
+#   - 读帧: 只 seek 到被选中的帧再解析，跳过的帧从不解析
+#   - 重启续算拼接: 多个文件 (列表 / 通配符) 或 timestep 回退的单个文件 (append 续写)
+#     → StitchedIndex，一条逻辑轨迹; 重叠的 timestep 取最新一段，只建索引不拷贝数据
+#     每帧的原子数 / 盒子取自它所在的段 → 段间被删除的原子在之后的帧里自然缺席
+#   - 归档文件 (traj_archive.py 打包的 .trjz) 直接识别: 只解压需要的帧和列，多帧并行
+# 支持: LAMMPS dump (text) / extxyz
+# 用法: python traj_index.py trajectory.lammpstrj   (建索引并打印概况)
+#       python traj_index.py 'trajectory.T_1900_*.lammpstrj'   (引号内通配 → 拼接)
+# -------------------------------------------------------------
+
+import io, os, re, sys, glob
+import numpy as np, pandas as pd
+
+INDEX_SUFFIX = ".fidx.npz"
+DUMP_HEADER_LINES = 9                  # TIMESTEP(2) + NUMBER(2) + BOX(4) + ATOMS(1)
+XYZ_HEADER_LINES  = 2                  # 原子数 + 注释行
+
+_RE_XYZ_STEP  = re.compile(rb'\b(?:Timestep|timestep|Step|step)=(\d+)')
+_RE_XYZ_LAT   = re.compile(rb'Lattice="([^"]+)"')
+_RE_XYZ_PROPS = re.compile(rb'Properties=(\S+)')
+
+
+class FrameIndex:
+    """一条轨迹的帧索引。offsets 末尾多存一个文件长度，第 i 帧 = [offsets[i], offsets[i+1])。"""
+
+    def __init__(self, path, fmt, offsets, timestep, natoms, box, columns):
+        self.path     = str(path)
+        self.fmt      = fmt                                  # "lammps-dump-text" | "extxyz"
+        self.offsets  = np.asarray(offsets,  dtype=np.int64)
+        self.timestep = np.asarray(timestep, dtype=np.int64) # 未知时为 -1
+        self.natoms   = np.asarray(natoms,   dtype=np.int64)
+        self.box      = np.asarray(box,      dtype=float).reshape(-1, 3, 2)   # (lo, hi) × xyz
+        self.columns  = list(columns)
+
+    @property
+    def n_frames(self):
+        return len(self.natoms)
+
+    def __len__(self):
+        return self.n_frames
+
+    @property
+    def parts(self):
+        return [self]
+
+    def locate(self, i):
+        """逻辑帧号 → (段文件序号, 段内帧号)。"""
+        return 0, int(i)
+
+    def has_timestep(self):
+        return self.n_frames > 0 and bool((self.timestep >= 0).all())
+
+    def needs_stitch(self):
+        """timestep 有回退或重复 (重启后 append 到同一文件)。"""
+        return self.has_timestep() and bool((np.diff(self.timestep) <= 0).any())
+
+    def times_ps(self, dt_fs, dump_every=None, t0_ps=0.0):
+        """每帧时间 (ps)。给了 dump_every 就用 帧号×dump_every，否则用帧头 timestep。"""
+        if dump_every is not None:
+            steps = np.arange(self.n_frames, dtype=float) * dump_every
+        elif self.has_timestep():
+            steps = self.timestep.astype(float)
+        else:
+            raise ValueError(f"{self.path} 帧头没有 timestep，需指定 dump_every")
+        return steps * dt_fs / 1000.0 + t0_ps
+
+
+class StitchedIndex(FrameIndex):
+    """
+    多段轨迹 (重启续算) 拼成的一条逻辑轨迹；第 i 帧 = parts[part[i]] 的第 local[i] 帧。
+    段 = 同一文件内 timestep 递增的一段；后面的段从它的起始 timestep 起覆盖前面所有段。
+    列取各段共有的列 (按第一段的顺序)；帧头没有 timestep 时各段按顺序直接首尾相接。
+    """
+
+    def __init__(self, parts):
+        fmts = {p.fmt for p in parts}
+        if len(fmts) != 1:
+            raise ValueError(f"拼接的轨迹格式不一致: {sorted(fmts)}")
+        part  = np.concatenate([np.full(p.n_frames, k, dtype=np.int64) for k, p in enumerate(parts)])
+        local = np.concatenate([np.arange(p.n_frames, dtype=np.int64) for p in parts])
+        steps = np.concatenate([p.timestep for p in parts])
+        if all(p.has_timestep() for p in parts if p.n_frames):
+            keep, seg = stitch_keep(steps, part)
+        else:
+            keep, seg = np.ones(len(steps), dtype=bool), part
+        columns = [c for c in parts[0].columns if all(c in p.columns for p in parts[1:])]
+        super().__init__(parts[0].path, fmts.pop(), [], steps[keep],
+                         np.concatenate([p.natoms for p in parts])[keep],
+                         np.concatenate([p.box for p in parts])[keep], columns)
+        self._parts  = list(parts)
+        self.paths   = [p.path for p in parts]
+        self.part    = part[keep]
+        self.local   = local[keep]
+        self.segment = seg[keep]
+        self.n_dropped = int((~keep).sum())             # 被后续段覆盖的帧数
+
+    @property
+    def parts(self):
+        return self._parts
+
+    def locate(self, i):
+        return int(self.part[i]), int(self.local[i])
+
+
+def stitch_keep(steps, part):
+    """
+    steps: 按读入顺序排列的帧 timestep；part: 每帧所在的文件序号。
+    文件边界或 timestep 不增处开新段；每段只保留小于"之后所有段起点最小值"的帧
+    → (keep 掩码, 段号)。保留下来的 timestep 严格递增。
+    """
+    steps = np.asarray(steps, dtype=np.int64)
+    part  = np.asarray(part)
+    if steps.size == 0:
+        return np.zeros(0, dtype=bool), np.zeros(0, dtype=np.int64)
+    new = np.r_[True, (part[1:] != part[:-1]) | (steps[1:] <= steps[:-1])]
+    seg = np.cumsum(new) - 1
+    start = steps[new]
+    cut = np.r_[np.minimum.accumulate(start[::-1])[::-1][1:], np.iinfo(np.int64).max]
+    return steps < cut[seg], seg
+
+
+# ─────────────────────────── 扫描 ───────────────────────────
+def _scan_lammps(fh):
+    offsets, steps, natoms, boxes, columns = [], [], [], [], None
+    while True:
+        pos  = fh.tell()
+        line = fh.readline()
+        if not line:
+            break
+        if not line.startswith(b"ITEM: TIMESTEP"):
+            continue                                   # 容错: 杂行
+        step = int(fh.readline())
+        fh.readline()                                  # ITEM: NUMBER OF ATOMS
+        n = int(fh.readline())
+        fh.readline()                                  # ITEM: BOX BOUNDS ...
+        box = [[float(v) for v in fh.readline().split()[:2]] for _ in range(3)]
+        head = fh.readline()                           # ITEM: ATOMS id type x y z ...
+        if columns is None:
+            columns = head.decode().split()[2:]
+        if sum(1 for _ in zip(range(n), fh)) < n:
+            break                                      # 末帧被截断 (作业中断) → 丢弃
+        offsets.append(pos); steps.append(step); natoms.append(n); boxes.append(box)
+    offsets.append(fh.tell())
+    return offsets, steps, natoms, boxes, columns or []
+
+
+def _scan_extxyz(fh):
+    offsets, steps, natoms, boxes, columns = [], [], [], [], None
+    while True:
+        pos  = fh.tell()
+        line = fh.readline()
+        if not line:
+            break
+        if not line.strip():
+            continue
+        n = int(line)
+        comment = fh.readline()
+        m = _RE_XYZ_STEP.search(comment)
+        step = int(m.group(1)) if m else -1
+        m = _RE_XYZ_LAT.search(comment)
+        if m:
+            lat = np.array(m.group(1).split(), dtype=float).reshape(3, 3)
+            box = [[0.0, lat[k, k]] for k in range(3)]
+        else:
+            box = [[np.nan, np.nan]] * 3
+        if columns is None:
+            m = _RE_XYZ_PROPS.search(comment)
+            columns = m.group(1).decode().split(":")[0::3] if m else []
+        if sum(1 for _ in zip(range(n), fh)) < n:
+            break
+        offsets.append(pos); steps.append(step); natoms.append(n); boxes.append(box)
+    offsets.append(fh.tell())
+    return offsets, steps, natoms, boxes, columns or []
+
+
+def detect_format(path):
+    if str(path).endswith((".xyz", ".extxyz")):
+        return "extxyz"
+    with open(path, "rb") as fh:
+        first = fh.readline()
+    if first.startswith(b"ITEM:"):
+        return "lammps-dump-text"
+    if first.strip().isdigit():
+        return "extxyz"
+    raise ValueError(f"无法识别轨迹格式: {path}")
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return np.array([st.st_size, st.st_mtime_ns], dtype=np.int64)
+
+
+_FIRST_STEP = {}                                    # (路径, 大小, mtime) → 首个 timestep
+
+
+def _natural_key(path):
+    return [int(t) if t.isdigit() else t for t in re.split(r"(\d+)", path)]
+
+
+def _first_timestep(path):
+    """段文件的首个 timestep: 轨迹 / 归档取帧索引，species.out 类文本取 '# Timestep' 表头下第一行；
+    没有 → None。"""
+    key = (path, *_stamp(path).tolist())
+    if key not in _FIRST_STEP:
+        step = None
+        try:
+            idx = _load_one(path, rebuild=False, cache=True)
+            if idx.has_timestep():
+                step = int(idx.timestep[0])
+        except ValueError:                          # 不是轨迹: 试 species.out 格式
+            col = None
+            with open(path, "r", errors="ignore") as f:
+                for line in f:
+                    tok = line.lstrip("#").split()
+                    if line.startswith("#"):
+                        col = next((k for k, t in enumerate(tok) if t.lower() == "timestep"), None)
+                    elif col is not None and len(tok) > col and tok[col].lstrip("-").isdigit():
+                        step = int(tok[col])
+                        break
+        _FIRST_STEP[key] = step
+    return _FIRST_STEP[key]
+
+
+def resolve_paths(spec):
+    """
+    轨迹说明 → 文件列表。列表 / 元组按给定顺序 (越靠后越新)；
+    含通配符的字符串按各段首个 timestep 排序 (续算段从更晚的步数开始)，同步数按文件名自然序；
+    任一段读不出 timestep 时整体按文件名自然序 (seg2 < seg10)。不用 mtime: cp / rsync /
+    git checkout / 解压之后修改时间顺序是任意的。*.npz 缓存文件不算。
+    """
+    if isinstance(spec, (list, tuple)):
+        paths = [str(p) for p in spec]
+    elif any(c in str(spec) for c in "*?["):
+        paths = sorted((p for p in glob.glob(str(spec)) if not p.endswith(".npz")),
+                       key=_natural_key)
+        first = [_first_timestep(p) for p in paths]
+        if None not in first:
+            paths = [p for _, p in sorted(zip(first, paths), key=lambda x: x[0])]   # 稳定: 同步数保持自然序
+    else:
+        paths = [str(spec)]
+    if not paths:
+        raise FileNotFoundError(f"没有匹配的轨迹: {spec}")
+    return paths
+
+
+def traj_stamp(spec):
+    """所有段文件的 (大小, mtime) → 下游缓存的失效判据。"""
+    return np.concatenate([_stamp(p) for p in resolve_paths(spec)])
+
+
+def cache_path(spec, suffix):
+    """下游缓存文件名: 单文件 = <轨迹><suffix>；多段 = <第一段>.stitch<N><suffix>。"""
+    paths = resolve_paths(spec)
+    return paths[0] + suffix if len(paths) == 1 else f"{paths[0]}.stitch{len(paths)}{suffix}"
+
+
+def build_index(path):
+    fmt  = detect_format(path)
+    scan = _scan_lammps if fmt == "lammps-dump-text" else _scan_extxyz
+    with open(path, "rb") as fh:
+        offsets, steps, natoms, boxes, columns = scan(fh)
+    return FrameIndex(path, fmt, offsets, steps, natoms,
+                      np.reshape(boxes, (-1, 3, 2)), columns)
+
+
+def load_index(path, rebuild=False, cache=True):
+    """
+    读取 (必要时重建) 帧索引；cache=False 则不落盘。
+    path 为多个文件 (列表 / 通配符) 或 timestep 回退的单个文件 → StitchedIndex。
+    """
+    parts = [_load_one(p, rebuild, cache) for p in resolve_paths(path)]
+    if len(parts) == 1 and not parts[0].needs_stitch():
+        return parts[0]
+    return StitchedIndex(parts)
+
+
+def _load_one(path, rebuild, cache):
+    from traj_archive import is_archive, open_archive
+    if is_archive(path):
+        return open_archive(path)                     # 帧索引在归档文件尾部
+    cpath = path + INDEX_SUFFIX
+    stamp = _stamp(path)
+    if cache and not rebuild and os.path.exists(cpath):
+        with np.load(cpath, allow_pickle=False) as z:
+            if np.array_equal(z["stamp"], stamp):
+                return FrameIndex(path, str(z["fmt"]), z["offsets"], z["timestep"],
+                                  z["natoms"], z["box"], z["columns"].tolist())
+    idx = build_index(path)
+    if cache:
+        try:
+            np.savez(cpath, stamp=stamp, fmt=np.array(idx.fmt), offsets=idx.offsets,
+                     timestep=idx.timestep, natoms=idx.natoms, box=idx.box,
+                     columns=np.array(idx.columns, dtype=str))
+        except OSError:
+            pass                                       # 只读目录: 不缓存也能用
+    return idx
+
+
+# ─────────────────────────── 选帧 ───────────────────────────
+def select_frames(times_ps, start=0, stop=None, every=1,
+                  t_window_ps=None, dense_centers_ps=None, dense_half_ps=0.0):
+    """
+    返回被选中的帧号 (升序)。
+      every            : 粗扫步长，[start, stop) 内每 k 帧取 1 帧; 0 = 不取粗扫帧
+      t_window_ps      : (t_min, t_max)，任一端为 None 表示不限
+      dense_centers_ps : 这些时刻 ±dense_half_ps 内保留全部帧 (跳点附近加密)
+    """
+    times_ps = np.asarray(times_ps, dtype=float)
+    stop   = len(times_ps) if stop is None else min(stop, len(times_ps))
+    frames = np.arange(start, stop)
+    t      = times_ps[frames]
+    if every and every > 0:
+        keep = (frames - start) % int(every) == 0
+    else:
+        keep = np.zeros(len(frames), dtype=bool)
+
+    if dense_centers_ps is not None and len(dense_centers_ps):
+        c = np.sort(np.asarray(dense_centers_ps, dtype=float))
+        j = np.searchsorted(c, t)
+        d = np.minimum(np.abs(t - c[np.clip(j - 1, 0, len(c) - 1)]),
+                       np.abs(c[np.clip(j, 0, len(c) - 1)] - t))
+        keep |= d <= dense_half_ps
+
+    if t_window_ps is not None:
+        t_lo, t_hi = t_window_ps
+        if t_lo is not None: keep &= t >= t_lo
+        if t_hi is not None: keep &= t <= t_hi
+    return frames[keep]
+
+
+# ─────────────────────────── 读帧 ───────────────────────────
+def read_frame_bytes(fh, idx, i):
+    fh.seek(idx.offsets[i])
+    return fh.read(idx.offsets[i + 1] - idx.offsets[i])
+
+
+def frame_blocks(idx, frames):
+    """yield (逻辑帧号, 段索引, 段内帧号, 字节块)；各段文件按需打开 (归档段的字节块为 None)。"""
+    parts, fhs = idx.parts, {}
+    try:
+        for i in frames:
+            p, j = idx.locate(i)
+            if getattr(parts[p], "archived", False):
+                yield int(i), parts[p], j, None
+                continue
+            if p not in fhs:
+                fhs[p] = open(parts[p].path, "rb")
+            yield int(i), parts[p], j, read_frame_bytes(fhs[p], parts[p], j)
+    finally:
+        for fh in fhs.values():
+            fh.close()
+
+
+def parse_dump_block(block, idx, i, columns=None):
+    """把一帧 LAMMPS dump 的字节块解析成 DataFrame；columns 只取需要的列。"""
+    usecols = None if columns is None else [c for c in columns if c in idx.columns]
+    return pd.read_csv(io.BytesIO(block), sep=r"\s+", header=None,
+                       skiprows=DUMP_HEADER_LINES, nrows=int(idx.natoms[i]),
+                       names=idx.columns, usecols=usecols)
+
+
+def iter_dump_frames(path, frames=None, columns=None, idx=None):
+    """LAMMPS dump: 逐帧 yield (frame, timestep, DataFrame)，只解析 frames 里的帧。"""
+    idx = idx or load_index(path)
+    frames = range(idx.n_frames) if frames is None else frames
+    if getattr(idx, "archived", False):                # 单个归档: 多帧并行解压
+        for i, df in idx.iter_frames(frames, columns):
+            yield i, int(idx.timestep[i]), df
+        return
+    for i, part, j, block in frame_blocks(idx, frames):
+        df = part.read(j, columns) if block is None else parse_dump_block(block, part, j, columns)
+        yield i, int(idx.timestep[i]), df
+
+
+def iter_xyz_frames(path, frames=None, idx=None):
+    """extxyz: 逐帧 yield (frame, ase.Atoms)，只解析 frames 里的帧。"""
+    import ase.io
+    idx = idx or load_index(path)
+    frames = range(idx.n_frames) if frames is None else frames
+    for i, part, j, block in frame_blocks(idx, frames):
+        block = part.frame_text(j) if block is None else block
+        yield i, ase.io.read(io.StringIO(block.decode()), format="extxyz")
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("用法: python traj_index.py TRAJ [TRAJ ...]")
+    for path in sys.argv[1:]:
+        idx = load_index(path, rebuild=True)
+        print(f"[OK] {path}: {idx.fmt}, {idx.n_frames} 帧 → "
+              + " ".join(p.path + ("" if getattr(p, "archived", False) else INDEX_SUFFIX)
+                         for p in idx.parts))
+        if isinstance(idx, StitchedIndex):
+            print(f"     拼接 {len(idx.paths)} 个文件 / {int(idx.segment.max()) + 1 if idx.n_frames else 0} 段，"
+                  f"重叠丢弃 {idx.n_dropped} 帧: {' → '.join(idx.paths)}")
+        if idx.has_timestep() and idx.n_frames > 1:
+            d = np.unique(np.diff(idx.timestep))
+            print(f"     timestep {idx.timestep[0]} – {idx.timestep[-1]},  dump 间隔 {d.tolist()[:5]}")
+        if idx.columns:
+            print(f"     列: {' '.join(idx.columns)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------
+# 周期边界展开 + 位移追踪 (boundary p p f: 只展开 x/y)
+#   一次扫描: 经帧索引读被追踪 id 的 x/y/z，用每帧帧头的盒长做最小镜像
+#             展开 x/y，累计位移写入 <轨迹>.track.npz (二进制缓存)
+#   之后 MSD / 横向速度都在 (帧 × id) 数组上向量化计算，不再逐脚本重读轨迹
+# 输出: escape_kinematics.csv (每 id: 净横向位移 / 平均横向速率 / D_xy)
+#       escape_msd.csv        (lag_ps × 平均 MSD_xy / MSD_z)
+# -------------------------------------------------------------
+
+# ===== USER CONFIG =====
+TRAJ_PATH    = "trajectory.T_1000_v7.8.lammpstrj"   # LAMMPS dump 或 extxyz (续算多段: 通配符 / 列表)
+IDS_CSV      = "escaped_ids.csv"                    # 要追踪的 id (01 生成)
+DT_FS        = 0.1          # fs per MD step
+DUMP_EVERY   = None         # 帧头无 timestep 时 (extxyz) 填每帧 MD 步数
+EVERY        = 1            # 每 EVERY 帧取 1 帧; 展开要求相邻帧位移 < 半个盒长
+MAX_LAG_PS   = 5.0          # MSD 最大时间间隔
+OUT_KIN_CSV  = "escape_kinematics.csv"
+OUT_MSD_CSV  = "escape_msd.csv"
+# =======================
+
+import os, sys
+import numpy as np, pandas as pd
+from traj_index import (load_index, select_frames, iter_dump_frames, iter_xyz_frames,
+                        traj_stamp, cache_path)
+from presence import scatter_ids
+
+CACHE_SUFFIX = ".track.npz"
+_NONE        = -1                   # 缓存里 dump_every=None 的占位
+
+
+def _frame_arrays(path, idx, frames):
+    """统一 dump / extxyz: yield (frame, ids, xyz)。"""
+    if idx.fmt == "lammps-dump-text":
+        for k, _, df in iter_dump_frames(path, frames, ["id", "x", "y", "z"], idx):
+            yield k, df["id"].to_numpy(np.int64), df[["x", "y", "z"]].to_numpy(float)
+    else:
+        for k, at in iter_xyz_frames(path, frames, idx):
+            yield k, at.arrays["id"].astype(np.int64), at.positions
+
+
+def unwrap_xy(raw, box_len):
+    """
+    raw (F, N, 3) 原始坐标 (缺失 = NaN)；box_len (F, 3) 每帧盒长。
+    x/y 按相邻帧最小镜像累加 → 展开坐标；z 非周期原样保留。
+    缺帧的原子从上一次出现的位置继续累加；缺失处仍为 NaN。
+    """
+    F, N = raw.shape[:2]
+    cols = np.arange(N)
+    seen = ~np.isnan(raw[..., 0])
+    # 每个 (帧, id) 最近一次出现的帧号 (前向填充)
+    last = np.where(seen, np.arange(F)[:, None], 0)
+    np.maximum.accumulate(last, axis=0, out=last)
+    filled = np.take_along_axis(raw[..., :2], last[..., None], axis=0)
+
+    d = np.diff(filled, axis=0)
+    L = box_len[1:, None, :2]
+    d = np.nan_to_num(d - L * np.round(d / L))           # 首次出现之前/当帧无位移
+    xy = np.concatenate([np.zeros((1, N, 2)), np.cumsum(d, axis=0)])
+
+    first = np.argmax(seen, axis=0)
+    xy += (raw[first, cols, :2] - xy[first, cols])[None]  # 起点 = 首次出现的坐标
+    out = raw.copy()
+    out[..., :2] = np.where(seen[..., None], xy, np.nan)
+    return out
+
+
+def build_track_cache(path, track_ids, dt_fs, every=1, dump_every=None, rebuild=False):
+    """一次扫描生成 / 读取 <轨迹>.track.npz: ids, frame, time_ps, box_len, raw, unwrapped, disp。"""
+    track_ids = np.unique(np.asarray(track_ids, dtype=np.int64))
+    cpath = cache_path(path, CACHE_SUFFIX)
+    stamp = traj_stamp(path)
+    if not rebuild and os.path.exists(cpath):
+        with np.load(cpath, allow_pickle=False) as f:
+            z = dict(f)
+        if (np.array_equal(z["ids"], track_ids) and int(z["every"]) == every
+                and np.array_equal(z.get("stamp"), stamp)
+                and np.array_equal(z.get("dt_fs"), dt_fs)                   # time_ps 依赖两者
+                and np.array_equal(z.get("dump_every"), _NONE if dump_every is None else dump_every)):
+            return z
+
+    idx    = load_index(path)
+    times  = idx.times_ps(dt_fs, dump_every)
+    frames = select_frames(times, every=every)
+    F, N   = len(frames), len(track_ids)
+    raw    = np.full((F, N, 3), np.nan)
+    for r, (k, ids, xyz) in enumerate(_frame_arrays(path, idx, frames)):
+        col = scatter_ids(track_ids, ids)
+        ok  = col >= 0
+        raw[r, col[ok]] = xyz[ok]
+
+    box_len = (idx.box[frames, :, 1] - idx.box[frames, :, 0])
+    unwrapped = unwrap_xy(raw, box_len)
+    first = np.argmax(~np.isnan(raw[..., 0]), axis=0)
+    disp = unwrapped - unwrapped[first, np.arange(N)][None]     # 相对首次出现的累计位移 (缺失 = NaN)
+
+    cache = dict(ids=track_ids, frame=frames, time_ps=times[frames], box_len=box_len,
+                 raw=raw, unwrapped=unwrapped, disp=disp,
+                 every=np.int64(every), stamp=stamp, dt_fs=np.float64(dt_fs),
+                 dump_every=np.int64(_NONE if dump_every is None else dump_every))
+    try:
+        np.savez(cpath, **cache)
+    except OSError:
+        pass
+    return cache
+
+
+def msd(pos, lags):
+    """pos (F, N, D) 展开坐标 → (len(lags), N) 逐 id、对时间原点平均的 MSD (忽略缺失)。"""
+    out = np.full((len(lags), pos.shape[1]), np.nan)
+    for a, lag in enumerate(lags):
+        if lag <= 0 or lag >= pos.shape[0]:
+            continue
+        d2 = ((pos[lag:] - pos[:-lag])**2).sum(-1)
+        with np.errstate(invalid="ignore"):
+            out[a] = np.nanmean(d2, axis=0)
+    return out
+
+
+def lateral_velocity(cache):
+    """(F, N) 横向速率 |v_xy| (Å/ps)，由展开坐标对时间求导。"""
+    t  = cache["time_ps"]
+    xy = cache["unwrapped"][..., :2]
+    v  = np.gradient(xy, t, axis=0) if len(t) >= 2 else np.zeros_like(xy)
+    return np.sqrt((v**2).sum(-1))
+
+
+def main():
+    try:
+        ids = np.loadtxt(IDS_CSV, comments="#", dtype=int, skiprows=1, ndmin=1)
+    except ValueError as e:
+        sys.exit(f"读取 {IDS_CSV} 失败: {e}")
+    if ids.size == 0:
+        sys.exit(f"{IDS_CSV} 中没有任何 id")
+
+    c  = build_track_cache(TRAJ_PATH, ids, DT_FS, EVERY, DUMP_EVERY)
+    t  = c["time_ps"]
+    dt = np.median(np.diff(t)) if len(t) > 1 else np.nan
+    lags = np.arange(1, max(int(MAX_LAG_PS / dt), 1) + 1) if np.isfinite(dt) else np.array([1])
+
+    msd_xy = msd(c["unwrapped"][..., :2], lags)
+    msd_z  = msd(c["unwrapped"][..., 2:], lags)
+    with np.errstate(invalid="ignore"):
+        pd.DataFrame({"lag_ps": lags * dt,
+                      "msd_xy_A2": np.nanmean(msd_xy, axis=1),
+                      "msd_z_A2":  np.nanmean(msd_z,  axis=1)}).to_csv(OUT_MSD_CSV, index=False)
+
+        # —— 每 id: 净横向位移、平均横向速率、D_xy (MSD_xy = 4 D t 的最小二乘斜率) ——
+        v_xy  = lateral_velocity(c)
+        lag_t = lags * dt
+        ok    = np.isfinite(msd_xy)
+        D_xy  = (np.where(ok, msd_xy * lag_t[:, None], 0).sum(0) /
+                 np.where(ok, lag_t[:, None]**2, 0).sum(0)) / 4.0
+        seen  = ~np.isnan(c["raw"][..., 0])
+        lastk = len(t) - 1 - np.argmax(seen[::-1], axis=0)          # 末次出现帧
+        net   = np.sqrt((c["disp"][lastk, np.arange(len(c["ids"])), :2]**2).sum(-1))
+        kin = pd.DataFrame({"id": c["ids"],
+                            "n_frames": seen.sum(0),
+                            "net_dxy_A": net,
+                            "mean_vxy_A_per_ps": np.nanmean(v_xy, axis=0),
+                            "D_xy_A2_per_ps": D_xy})
+    kin.to_csv(OUT_KIN_CSV, index=False)
+    print(f"[OK] {OUT_KIN_CSV} (n={len(kin)}), {OUT_MSD_CSV} (lags={len(lags)})  "
+          f"cache → {cache_path(TRAJ_PATH, CACHE_SUFFIX)}")
+
+
+if __name__ == "__main__":
+    main()
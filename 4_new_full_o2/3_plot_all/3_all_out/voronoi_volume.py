@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------
+# 局部 Voronoi 体积 (替代 compute voronoi/atom 没有写进 dump 的情况)
+#   每帧只在"被查询原子 + 其 r_pad 内邻居"上做一次 scipy.spatial.Voronoi:
+#     - x/y 周期: 靠近盒边的邻居补 ±Lx / ±Ly 镜像
+#     - z 非周期 (boundary p p f): 全部点对 z_lo / z_hi 平面做镜像，
+#       平分面正好落在盒面上 → 胞被盒子截断，与 voro++ 的做法一致
+#   胞无界 (邻居不足, 如已飞入真空的孤立原子) → NaN，由调用方退回常数体积
+#   结果按 (帧, id) 缓存到 <轨迹>.voro.npz，只补算缺的
+# -------------------------------------------------------------
+
+import os
+import numpy as np
+from scipy.spatial import cKDTree, Voronoi, ConvexHull
+
+CACHE_SUFFIX = ".voro.npz"
+R_PAD_A      = 6.0          # 邻居半径: 须大于最远 Voronoi 邻居距离 (石墨 ~3.4 Å 层间距)
+
+
+def frame_volumes(pos, box, query, r_pad=R_PAD_A):
+    """
+    pos (n,3) / box (3,2) 单帧；query: 要求体积的原子下标 → (len(query),) Å^3。
+    """
+    query = np.asarray(query, dtype=int)
+    if query.size == 0:
+        return np.empty(0)
+    lo, hi = box[:, 0], box[:, 1]
+    L  = hi - lo
+    Lz = np.ptp(pos[:, 2]) + 2*r_pad + 1.0                # z 不环绕 (同 escape_classify.bonded_pairs)
+    size = np.array([L[0], L[1], Lz])
+    p = np.mod(pos - [lo[0], lo[1], pos[:, 2].min()], size)
+    p = np.where(p >= size, p - size, p)
+
+    # —— 邻居并集 (周期 x/y) ——
+    tree  = cKDTree(p, boxsize=size)
+    neigh = np.unique(np.concatenate(tree.query_ball_point(p[query], r_pad)).astype(int))
+    local = np.union1d(neigh, query)
+    pts   = p[local]
+
+    # —— x/y 周期镜像: 只补靠近盒边的点 ——
+    imgs = [pts]
+    for sx in (-1, 0, 1):
+        for sy in (-1, 0, 1):
+            if sx == sy == 0:
+                continue
+            sh = pts + [sx * L[0], sy * L[1], 0.0]
+            near = ((sh[:, 0] > -r_pad) & (sh[:, 0] < L[0] + r_pad) &
+                    (sh[:, 1] > -r_pad) & (sh[:, 1] < L[1] + r_pad))
+            imgs.append(sh[near])
+    allp = np.concatenate(imgs)
+
+    # —— z 盒面镜像 ——
+    zlo = lo[2] - pos[:, 2].min()
+    zhi = hi[2] - pos[:, 2].min()
+    mlo, mhi = allp.copy(), allp.copy()
+    mlo[:, 2] = 2*zlo - allp[:, 2]
+    mhi[:, 2] = 2*zhi - allp[:, 2]
+    allp = np.concatenate([allp, mlo, mhi])
+
+    vor = Voronoi(allp)
+    out = np.full(query.size, np.nan)
+    row = np.searchsorted(local, query)                  # query 在 local (即 allp 前段) 中的行号
+    for k, r in enumerate(row):
+        reg = vor.regions[vor.point_region[r]]
+        if not reg or -1 in reg:
+            continue
+        out[k] = ConvexHull(vor.vertices[reg]).volume
+    return out
+
+
+def cached_volumes(traj_path, requests, r_pad=R_PAD_A, rebuild=False):
+    """
+    requests: {帧号: id 数组} → {(帧号, id): 体积}。
+    轨迹经帧索引随机读取，只解析用到的帧；缓存键 = 各段轨迹 (大小, mtime) + r_pad。
+    """
+    from traj_index import load_index, iter_dump_frames, traj_stamp, cache_path
+
+    cpath = cache_path(traj_path, CACHE_SUFFIX)
+    stamp = np.r_[traj_stamp(traj_path), int(r_pad * 1000)].astype(np.int64)
+    have = {}
+    if not rebuild and os.path.exists(cpath):
+        with np.load(cpath, allow_pickle=False) as z:
+            if np.array_equal(z["stamp"], stamp):
+                have = dict(zip(zip(z["frame"].tolist(), z["id"].tolist()), z["vol"].tolist()))
+
+    todo = {}
+    for k, ids in requests.items():
+        miss = [int(a) for a in np.unique(ids) if (int(k), int(a)) not in have]
+        if miss:
+            todo[int(k)] = np.array(miss, dtype=np.int64)
+
+    if todo:
+        idx = load_index(traj_path)
+        for k, _, df in iter_dump_frames(traj_path, sorted(todo), ["id", "x", "y", "z"], idx):
+            fid = df["id"].to_numpy(np.int64)
+            order = np.argsort(fid)
+            want = todo[k]
+            j = np.searchsorted(fid[order], want)
+            ok = (j < len(fid)) & (fid[order][np.minimum(j, len(fid) - 1)] == want)
+            vol = np.full(len(want), np.nan)
+            vol[ok] = frame_volumes(df[["x", "y", "z"]].to_numpy(float), idx.box[k],
+                                    order[j[ok]], r_pad)
+            have.update({(k, int(a)): float(v) for a, v in zip(want, vol)})
+        keys = np.array(list(have), dtype=np.int64).reshape(-1, 2)
+        try:
+            np.savez(cpath, stamp=stamp, frame=keys[:, 0], id=keys[:, 1],
+                     vol=np.array(list(have.values()), dtype=float))
+        except OSError:
+            pass
+    return have
@@ -1,8 +1,21 @@
 #!/usr/bin/env bash
+# 逐目录 sbatch sub.sh
+#   默认: 先由 sweep.py 按扫描矩阵重新生成运行目录 ({T}_temp_v.._s.._{box}，已是最新时不重写)，
+#         再只提交 sweep_manifest.csv 里的这些目录 —— 旧的 *_temp 目录 (如 500_temp) 不会被提交
+#   --dirs [DIR ...]: 不生成，直接提交已有目录 (不给 DIR 时 = 旧行为: 当前目录下所有 *_temp)
+# 用法: ./run_all.sh [sweep.py 参数]      或      ./run_all.sh --dirs [DIR ...]
 set -euo pipefail
+cd "$(dirname "$0")"
+
+if [[ "${1:-}" != "--dirs" ]]; then
+  exec python3 sweep.py --submit "$@"
+fi
+shift
 shopt -s nullglob
+dirs=("$@")
+(( ${#dirs[@]} )) || dirs=(*_temp)
 
-for dir in *_temp; do
+for dir in "${dirs[@]}"; do
   [[ -d "$dir" ]] || continue
   echo ">>> 进入 $dir 并启动 sub.sh"
   (
@@ -17,4 +30,3 @@ for dir in *_temp; do
 done
 
 echo "全部目录已处理完毕。"
- 
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------
+# 单节点本地调度器: 把很多小 LAMMPS / 分析任务按核数预算打包并发
+#   任务 = 运行目录 (含 in 文件) 或 "目录 :: 命令" (分析脚本等, 固定 1 核)
+#   代价估计: 原子数 (read_data 指向的 data 文件头) × 总步数 (in 文件里所有 run N)
+#     核数 = clamp(原子数 / ATOMS_PER_CORE, 1, MAX_CORES_PER_JOB)
+#     预计时长 ∝ 原子数 × 步数 / 核数 → 长任务优先 (LPT)
+#   放不下队首任务时只回填"预计在队首能开跑之前结束"的任务 (EASY backfill)，大任务不会饿死
+#   每个任务绑定到一组具体核: sched_setaffinity (子进程继承) + 命令模板里的 {cores}
+#     (mpirun 自己的 rank 绑定会覆盖继承的掩码，须显式 --cpu-set)，OMP_NUM_THREADS=1
+#   启动失败 (找不到程序等) 与非零退出同样走重试 / 失败；Ctrl-C 时终止所有运行中的任务
+#   日志: <目录>/run_local.log；状态: STATE_FILE (失败重试 MAX_RETRY 次，重启后跳过已完成)
+#   没有 SLURM / LAMMPS 的机器上用 --cmd 换成替身程序即可测试, 例:
+#     python run_local.py --cores 8 --cmd "python3 -c 'import time; time.sleep(1)'" 500_temp*/
+# 用法: python run_local.py [--cores N] [--cmd TEMPLATE] [--rerun] [--dry-run] DIR|MANIFEST.csv ...
+# -------------------------------------------------------------
+
+# ===== USER CONFIG =====
+CORES             = None       # 核数预算 (None = 本机全部可用核)
+CMD               = "mpirun --cpu-set {cores} --bind-to core -np {np} lmp_mpi -in {input}"
+                               # {np} 核数, {cores} 分到的核 (逗号分隔), {input} in 文件名
+IN_GLOB           = "in.*"     # 目录里的 LAMMPS 输入
+ATOMS_PER_CORE    = 500        # ReaxFF 每核 ~数百原子仍有效率
+MAX_CORES_PER_JOB = 64
+ATOMS_DEFAULT     = 10_000     # 找不到 data 文件时的原子数
+MAX_RETRY         = 2          # 非零退出后的重试次数
+POLL_S            = 1.0
+STATE_FILE        = "run_local_state.json"
+LOG_NAME          = "run_local.log"
+# =======================
+
+import os, re, sys, glob, json, time, shlex, argparse, subprocess
+from pathlib import Path
+import pandas as pd
+from lammps_data import read_header
+
+_RE_RUN  = re.compile(r"^\s*run\s+(\d+)", re.M)
+_RE_DATA = re.compile(r"^\s*read_data\s+(\S+)", re.M)
+
+
+class Job:
+    def __init__(self, d, cmd=None):
+        self.dir = Path(d).resolve()
+        self.cmd = cmd                              # None → LAMMPS (CMD 模板)
+        self.key = f"{self.dir}::{cmd}" if cmd else str(self.dir)   # 同目录多条命令各记各的
+        self.input = None
+        self.atoms, self.steps = 1, 1
+        self.cores, self.cost = 1, 1.0
+        self.proc = self.log = None
+        self.pinned, self.t0, self.attempt = [], 0.0, 0
+
+
+def estimate(job, cores_budget):
+    """原子数 × 步数 → 核数与预计时长 (相对单位)。"""
+    if job.cmd is None:
+        ins = sorted(glob.glob(str(job.dir / IN_GLOB)))
+        if not ins:
+            raise FileNotFoundError(f"{job.dir}: 没有 {IN_GLOB}")
+        job.input = os.path.basename(ins[0])
+        text = Path(ins[0]).read_text(errors="replace")
+        text = "\n".join(l.split("#")[0] for l in text.splitlines())
+        job.steps = sum(int(n) for n in _RE_RUN.findall(text)) or 1
+        m = _RE_DATA.search(text)
+        data = job.dir / m.group(1) if m else None
+        job.atoms = read_header(data)[0] if data is not None and data.exists() else ATOMS_DEFAULT
+        job.cores = int(min(max(1, round(job.atoms / ATOMS_PER_CORE)),
+                            MAX_CORES_PER_JOB, cores_budget))
+    job.cost = job.atoms * job.steps / job.cores
+    return job
+
+
+def load_jobs(args):
+    """目录 / 'dir :: cmd' 行的文本文件 / sweep_manifest.csv (run_dir 列)。"""
+    jobs = []
+    for a in args:
+        if a.endswith(".csv"):
+            root = Path(a).resolve().parent
+            jobs += [Job(root / d) for d in pd.read_csv(a)["run_dir"]]
+        elif os.path.isfile(a):
+            for line in Path(a).read_text().splitlines():
+                line = line.split("#")[0].strip()
+                if line:
+                    d, _, c = (s.strip() for s in line.partition("::"))
+                    jobs.append(Job(d, c or None))
+        else:
+            jobs.append(Job(a))
+    return jobs
+
+
+def load_state(path):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, path)
+
+
+def launch(job, cores, cmd_tpl):
+    """启动任务；Popen 失败 (OSError) 时写日志、关日志并返回 False。"""
+    job.attempt += 1
+    job.pinned = cores
+    cset = ",".join(map(str, cores))
+    cmd = job.cmd or cmd_tpl.format(np=job.cores, input=job.input, cores=cset)
+    job.t0 = time.time()
+    job.log = open(job.dir / LOG_NAME, "a")
+    job.log.write(f"\n===== attempt {job.attempt}  cores {cores}  {time.ctime()}\n$ {cmd}\n")
+    job.log.flush()
+    env = dict(os.environ, OMP_NUM_THREADS="1", RUN_LOCAL_CORES=cset)
+    pin = (lambda: os.sched_setaffinity(0, cores)) if hasattr(os, "sched_setaffinity") else None
+    try:
+        job.proc = subprocess.Popen(shlex.split(cmd), cwd=job.dir, stdout=job.log,
+                                    stderr=subprocess.STDOUT, env=env, preexec_fn=pin)
+    except (OSError, subprocess.SubprocessError) as e:
+        job.log.write(f"===== launch failed: {e}\n")
+        job.log.close()
+        job.proc = None
+        return False
+    return True
+
+
+def stop_all(running, grace=10.0):
+    """终止运行中的任务: SIGTERM，grace 秒后仍在的 SIGKILL。"""
+    for j in running:
+        j.proc.terminate()
+    t_end = time.time() + grace
+    for j in running:
+        try:
+            j.proc.wait(max(0.0, t_end - time.time()))
+        except subprocess.TimeoutExpired:
+            j.proc.kill()
+            j.proc.wait()
+        j.log.write(f"===== interrupted  {time.ctime()}\n"); j.log.close()
+
+
+def schedule(jobs, budget, cmd_tpl, state, state_path, dry=False):
+    """EASY backfill 主循环。返回失败任务列表。"""
+    avail = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count()))
+    free = avail[:budget]
+    queue = sorted(jobs, key=lambda j: -j.cost)          # LPT
+    running, failed = [], []
+    clock0 = time.time()
+    rate = None                                          # 实测 秒 / cost, 用于回填判断
+
+    def mark(job, status, rc=None):
+        state[job.key] = {"status": status, "attempts": job.attempt, "rc": rc,
+                          "cores": job.cores, "atoms": job.atoms, "steps": job.steps,
+                          "elapsed_s": round(time.time() - job.t0, 1) if job.t0 else None}
+        save_state(state_path, state)
+
+    def retry_or_fail(j, rc, why):
+        if j.attempt <= MAX_RETRY:
+            print(f"[!] {j.dir.name} {why} → 重试 ({j.attempt}/{MAX_RETRY})")
+            mark(j, "retry", rc)
+            queue.insert(0, j)
+        else:
+            print(f"[✗] {j.dir.name} {why}，放弃 (日志 {j.dir / LOG_NAME})")
+            mark(j, "failed", rc)
+            failed.append(j)
+
+    def start(j, tag=""):
+        nonlocal free
+        cores, free = free[:j.cores], free[j.cores:]
+        if not launch(j, cores, cmd_tpl):
+            free = sorted(free + cores)
+            retry_or_fail(j, None, "启动失败")
+            return
+        running.append(j); mark(j, "running")
+        print(f"[>] {j.dir.name}  np={j.cores}  cores {cores[0]}–{cores[-1]}{tag}")
+
+    if dry:
+        for j in queue:
+            print(f"  {j.dir.name:40s} atoms={j.atoms:<9d} steps={j.steps:<9d} "
+                  f"np={j.cores:<3d} cost={j.cost:.3g}")
+        return []
+
+    try:
+        while queue or running:
+            # —— 收尾 ——
+            for j in [j for j in running if j.proc.poll() is not None]:
+                running.remove(j)
+                free = sorted(free + j.pinned)
+                rc = j.proc.returncode
+                j.log.write(f"===== exit {rc}  {time.time() - j.t0:.1f} s\n"); j.log.close()
+                if rc == 0:
+                    rate = (time.time() - j.t0) / j.cost if rate is None else \
+                           0.5 * rate + 0.5 * (time.time() - j.t0) / j.cost
+                    mark(j, "done", rc)
+                    print(f"[✓] {j.dir.name}  ({time.time() - j.t0:.1f} s)")
+                else:
+                    retry_or_fail(j, rc, f"退出码 {rc}")
+
+            # —— 开跑: 队首能放就放；放不下时 EASY 回填 ——
+            while queue:
+                head = queue[0]
+                if head.cores <= len(free):
+                    start(queue.pop(0))
+                    continue
+                # 队首最早可开跑时刻 (按运行中任务的预计结束顺序累加释放的核)；
+                # 还没有完成过任务 (无实测速率) 时退化为在 cost 单位里比较、忽略已运行时间
+                eta = (lambda r: r.t0 + rate * r.cost) if rate else (lambda r: r.cost)
+                now = (lambda j: time.time() + rate * j.cost) if rate else (lambda j: j.cost)
+                t_head, n = float("inf"), len(free)
+                for r in sorted(running, key=eta):
+                    n += r.cores
+                    if n >= head.cores:
+                        t_head = eta(r)
+                        break
+                fill = next((j for j in queue[1:] if j.cores <= len(free) and now(j) <= t_head), None)
+                if fill is None:
+                    break
+                queue.remove(fill)
+                start(fill, "  (回填)")
+            time.sleep(POLL_S)
+    except KeyboardInterrupt:
+        print(f"\n[!] 中断: 终止 {len(running)} 个运行中的任务")
+        stop_all(running)
+        for j in running:
+            mark(j, "interrupted")
+        raise
+
+    print(f"[✓] 全部结束 {time.time() - clock0:.1f} s，失败 {len(failed)}")
+    return failed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="本地打包调度 LAMMPS / 分析任务")
+    ap.add_argument("targets", nargs="+", help="运行目录 / 任务清单 / sweep_manifest.csv")
+    ap.add_argument("--cores", type=int, default=CORES)
+    ap.add_argument("--cmd", default=CMD, help="命令模板, 可用 {np} {cores} {input}")
+    ap.add_argument("--state", default=STATE_FILE)
+    ap.add_argument("--rerun", action="store_true", help="忽略状态文件里已完成的任务")
+    ap.add_argument("--dry-run", action="store_true", help="只打印估计的核数 / 代价")
+    a = ap.parse_args()
+
+    n_avail = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    budget = min(a.cores or n_avail, n_avail)
+    state = {} if a.rerun else load_state(a.state)
+    jobs = [estimate(j, budget) for j in load_jobs(a.targets)]
+    todo = [j for j in jobs if state.get(j.key, {}).get("status") != "done"]
+    print(f"[INFO] {len(jobs)} 个任务, 已完成 {len(jobs) - len(todo)}, 核预算 {budget}")
+    try:
+        failed = schedule(todo, budget, a.cmd, state, a.state, dry=a.dry_run)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
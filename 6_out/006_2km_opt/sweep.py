@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -------------------------------------------------------------
+# 参数扫描生成器 (替代 cp.sh / run_all.sh)
+#   T × vin_kms × seed × 盒子 展开成运行目录:
+#     - in 文件按 SUBS 规则逐行正则替换 (同 cp.sh 的 sed)，每个目录写一份渲染后的 in.*
+#     - 力场 / param.qeq / 结构 data 等大文件只做链接 (symlink / hardlink)，不复制
+#     - 盒子键 → 结构文件; 模拟盒 (region box block) 的 x/y/z 范围与按 id 划分的固定层 / 热汇
+#       自动改成该结构的盒子 / 每层原子数 (rinj 等子区域不动)
+#   输出 <OUT_ROOT>/sweep_manifest.csv (每行一个运行: 目录 + 参数 + 原子数)，
+#   供 06_collect_all_jumps.py 按路径补参数列 (RUN_MANIFEST)
+#   已存在且内容相同的目录跳过; --force 重写; --submit 逐目录 sbatch (= run_all.sh)
+# 用法: python sweep.py [--dry-run] [--force] [--submit]
+# -------------------------------------------------------------
+
+# ===== USER CONFIG =====
+TEMPLATE_IN  = "in.gra_o"                      # 模板 in 文件 (本目录)
+SHARED_FILES = ["ffield.reax.cho", "param.qeq"]   # 所有运行共用 → 链接
+COPY_FILES   = ["sub.sh"]                      # 小文件 → 复制 (可能按目录改)
+BOXES        = {"base": "hopg_with_O_final.data"}  # 盒子键 → 结构文件 (full_o2.py 生成)
+DATA_NAME    = "hopg_with_O_final.data"        # in 文件里 read_data 的文件名
+MATRIX = {                                     # 扫描矩阵 (笛卡尔积)
+    "T":       [500, 700, 900, 1100, 1300, 1500],
+    "vin_kms": [2.0],
+    "seed":    [12345],
+    "box":     ["base"],
+}
+RUN_NAME   = "{T:g}_temp_v{vin_kms:g}_s{seed}_{box}"   # 目录名模板
+OUT_ROOT   = "."
+LINK_MODE  = "symlink"                         # 'symlink' | 'hardlink' | 'copy'
+LAYER_TOL_A = 0.5                              # 底层判定: z < z_min + LAYER_TOL_A (仅 C)
+BATH_LAYERS = 2                                # 热汇层数 (固定层之上)
+SEED2_OFFSET = 480408                          # langevin 种子 = seed + 偏移 (seed=12345 即原来的 492753)
+
+# in 文件逐行替换: (正则, 替换模板)；模板可用 {T} {vin_kms} {seed} {seed2} {box}
+#   以及盒子量 {xlo} {xhi} {ylo} {yhi} {zlo} {zhi} {n_layer} {bath_lo} {bath_hi}
+SUBS = [
+    (r"^(\s*variable\s+T\s+equal\s+)[-0-9.eE+]+",       r"\g<1>{T:.1f}"),
+    (r"^(\s*variable\s+vin_kms\s+equal\s+)[-0-9.eE+]+", r"\g<1>{vin_kms}"),
+    (r"^(\s*velocity\s+\S+\s+create\s+\S+\s+)\d+",      r"\g<1>{seed}"),
+    (r"^(\s*fix\s+\S+\s+\S+\s+langevin(?:\s+\S+){3}\s+)\d+", r"\g<1>{seed2}"),
+    (r"^(\s*region\s+box\s+block\s+)(?:\S+\s+){5}\S+", r"\g<1>{xlo} {xhi} {ylo} {yhi} {zlo} {zhi}"),
+    (r"^(\s*group\s+fixed_layer\s+id\s+<=\s+)\d+",      r"\g<1>{n_layer}"),
+    (r"^(\s*group\s+bath_ge\s+id\s+>=\s+)\d+",          r"\g<1>{bath_lo}"),
+    (r"^(\s*group\s+bath_le\s+id\s+<=\s+)\d+",          r"\g<1>{bath_hi}"),
+]
+# =======================
+
+import os, re, sys, shutil, hashlib, itertools, subprocess
+from pathlib import Path
+import numpy as np, pandas as pd
+from lammps_data import read_data
+
+HERE = Path(__file__).resolve().parent
+MANIFEST = "sweep_manifest.csv"
+
+
+def box_info(data_path):
+    """盒子键 → 替换用的盒子量。每层原子数需读 Atoms 段，每个结构只读一次。"""
+    d = read_data(data_path)
+    box = d.box
+    c = d.types == 1
+    zc = d.pos[c, 2]
+    n_layer = int(np.sum(zc < zc.min() + LAYER_TOL_A)) if zc.size else 0
+    return {"xlo": repr(float(box[0, 0])), "xhi": repr(float(box[0, 1])),
+            "ylo": repr(float(box[1, 0])), "yhi": repr(float(box[1, 1])),
+            "zlo": repr(float(box[2, 0])), "zhi": repr(float(box[2, 1])),
+            "n_layer": n_layer, "bath_lo": n_layer + 1,
+            "bath_hi": n_layer * (1 + BATH_LAYERS), "n_atoms": d.natoms}
+
+
+def render(template, params):
+    rules = [(re.compile(p, re.M), r.format(**params)) for p, r in SUBS]
+    out = template
+    for rx, rep in rules:
+        out = rx.sub(rep, out)
+    return out
+
+
+def link(src, dst, mode):
+    if dst.is_symlink() or dst.exists():
+        dst.unlink()
+    if mode == "symlink":
+        dst.symlink_to(os.path.relpath(src, dst.parent))
+    elif mode == "hardlink":
+        os.link(src, dst)
+    else:
+        shutil.copy2(src, dst)
+
+
+def expand(matrix):
+    keys = list(matrix)
+    for vals in itertools.product(*(matrix[k] for k in keys)):
+        yield dict(zip(keys, vals))
+
+
+def main():
+    dry, force, submit = (f in sys.argv[1:] for f in ("--dry-run", "--force", "--submit"))
+    missing = [f for f in [TEMPLATE_IN, *SHARED_FILES, *COPY_FILES, *BOXES.values()]
+               if not (HERE / f).exists()]
+    if missing:
+        sys.exit(f"缺少文件：{missing}")
+
+    template = (HERE / TEMPLATE_IN).read_text()
+    boxes = {k: box_info(HERE / v) for k, v in BOXES.items() if k in MATRIX["box"]}
+    root = (HERE / OUT_ROOT).resolve()
+    rows, n_new = [], 0
+
+    for p in expand(MATRIX):
+        params = {**p, **boxes[p["box"]], "seed2": int(p["seed"]) + SEED2_OFFSET}
+        run = root / RUN_NAME.format(**params)
+        text = render(template, params)
+        digest = hashlib.sha1(text.encode()).hexdigest()[:12]
+        rows.append({"run_dir": os.path.relpath(run, root), "T_K": p["T"], "vin_kms": p["vin_kms"],
+                     "seed": p["seed"], "box": p["box"], "data_file": BOXES[p["box"]],
+                     "n_atoms": params["n_atoms"], "in_file": TEMPLATE_IN, "in_sha1": digest})
+        in_path = run / TEMPLATE_IN
+        if in_path.exists() and not force and in_path.read_text() == text:
+            continue
+        n_new += 1
+        print(f"创建并更新：{run.name}")
+        if dry:
+            continue
+        run.mkdir(parents=True, exist_ok=True)
+        in_path.write_text(text)
+        for f in SHARED_FILES:
+            link(HERE / f, run / f, LINK_MODE)
+        link(HERE / BOXES[p["box"]], run / DATA_NAME, LINK_MODE)
+        for f in COPY_FILES:
+            shutil.copy2(HERE / f, run / f)
+
+    man = pd.DataFrame(rows)
+    if not dry:
+        man.to_csv(root / MANIFEST, index=False)
+    print(f"[✓] {len(rows)} 个运行 (新建/更新 {n_new})  → {root / MANIFEST}")
+
+    if submit and not dry:
+        for r in rows:
+            d = root / r["run_dir"]
+            print(f">>> 进入 {d.name} 并启动 sub.sh")
+            subprocess.run(["sbatch", "sub.sh"], cwd=d, check=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,28 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Plot & poly-fit:
-  - Time series: stress(unit-selectable), virial(kcal/mol), rate(1/ps)
-  - Scatter & polynomial fits: rate vs stress(unit-selectable), and rate vs virial
+Plot & fit:
+  - Time series: stress(unit-selectable), virial(atm·Å^3), rate(1/ps)
+  - Scatter & fits: rate vs stress(unit-selectable), and rate vs virial
+    (weighted; poly degree by leave-one-bin-out CV; Arrhenius / power-law forms — see rate_fit.py)
+  - main(df) takes the binned table in memory (stress.py MAKE_PLOTS); standalone it reads CSV_MAIN
 """
 
 # ============================ PARAMS (EDIT HERE) ============================
 CSV_MAIN    = "stress_rate_binned.csv"
-CSV_SIGMA   = "stress_rate_binned_sorted_by_sigma.csv"
-CSV_VIRIAL  = "stress_rate_binned_sorted_by_virial.csv"
 
 # columns in CSV
 X_SIGMA_GPA_COL = "sigma_vm_mean_gpa"      # 原始是 GPa
-X_VIR_COL       = "vm_virial_mean_kcalmol" # kcal/mol
+X_VIR_COL       = "vm_virial_mean_atmA3"   # c_MyStress, atm·Å^3
 Y_COL           = "rate_mean_per_ps"       # 1/ps
 
 # 选择要显示/拟合的“应力单位”：'GPa' | 'MPa' | 'kPa'
 STRESS_UNIT = "MPa"
 
-# 多项式阶数
-POLY_DEGREE = 4
+# 拟合: 多项式候选阶数 (留一 bin 交叉验证选 Q² 最高者) + 其它模型形式
+POLY_DEGREES = [1, 2, 3, 4]
+FIT_FORMS    = ["poly", "arrhenius", "power"]   # 'poly' | 'arrhenius' (A·e^{bx}) | 'power' (A·x^n)
+WEIGHTS      = "std"     # 'none' | 'count' (√n_escaped) | 'std' (√n_rate_samples / rate_std)
 
 # 可选：仅绘制/拟合这个时间窗口（单位 ps）
 T_MIN_PS = None     # 例如 55.0
@@ -32,7 +34,7 @@ X_SIGMA_MAX = None  # 例如 2.0e9  # (kPa)
 
 # 输出文件（会自动带上单位后缀）
 OUT_STRESS_TIME = None  # 若为 None，自动命名
-OUT_VIR_TIME    = "virial_vs_time_kcalmol.png"
+OUT_VIR_TIME    = "virial_vs_time_atmA3.png"
 OUT_RATE_TIME   = "rate_vs_time.png"
 OUT_FIT_SIGMA_PNG  = None  # 若为 None，自动命名
 OUT_FIT_VIR_PNG    = "stress_rate_fit_virial.png"
@@ -43,6 +45,7 @@ OUT_CURVE_VIR_CSV   = "stress_rate_fit_curve_virial.csv"
 
 import json, numpy as np, pandas as pd, matplotlib.pyplot as plt
 from pathlib import Path
+import rate_fit
 
 _SCALE = {"GPa": 1.0, "MPa": 1e3, "kPa": 1e6}  # 从 GPa → 目标单位 的倍率
 _LABEL = {"GPa": "GPa", "MPa": "MPa", "kPa": "kPa"}
@@ -51,18 +54,6 @@ def _load_csv(p):
     p = Path(p)
     return pd.read_csv(p) if p.exists() else None
 
-def r2_score(y_true, y_pred):
-    y_true = np.asarray(y_true, float); y_pred = np.asarray(y_pred, float)
-    ss_res = np.sum((y_true - y_pred)**2)
-    ss_tot = np.sum((y_true - np.mean(y_true))**2)
-    return 1.0 - ss_res/ss_tot if ss_tot > 0 else np.nan
-
-def poly_fit(x, y, deg):
-    coefs = np.polyfit(x, y, deg=deg)
-    poly  = np.poly1d(coefs)
-    yhat  = poly(x)
-    return coefs, poly, float(r2_score(y, yhat))
-
 def _apply_time_crop(df, tmin, tmax):
     if df is None or df.empty:
         return df
@@ -71,7 +62,32 @@ def _apply_time_crop(df, tmin, tmax):
     if tmax is not None: out = out[out['t_center_ps'] <= tmax]
     return out
 
-def main():
+def _fit_panel(d, xcol, xlabel, title, out_png, out_curve, xname, xlim=None):
+    """Scatter + all FIT_FORMS on one panel; curve CSV with one column per form. -> {form: fit}"""
+    d = d.dropna(subset=[xcol, Y_COL]).sort_values(xcol)
+    x = d[xcol].to_numpy(float); y = d[Y_COL].to_numpy(float)
+    w = rate_fit.bin_weights(d, WEIGHTS)
+    fits, cand = rate_fit.fit_all(x, y, POLY_DEGREES, FIT_FORMS, w)
+    for f in cand:
+        print(f"  {xname:12s} poly deg={f['deg']}  R²={f['r2']:.3f}  Q²(LOO)={f['q2']:.3f}")
+
+    x_plot = np.linspace(np.min(x), np.max(x), 400)
+    curves = {xname: x_plot}
+    plt.figure()
+    plt.scatter(x, y, s=8 + 40*w/np.max(w), label=f'Binned points (weights: {WEIGHTS})')
+    for form, f in fits.items():
+        curves["y_" + form] = f["predict"](x_plot)
+        plt.plot(x_plot, curves["y_" + form], label=rate_fit.describe(f))
+    plt.xlabel(xlabel); plt.ylabel('Formation rate (CO+CO2) [1/ps]')
+    plt.title(title); plt.grid(True, alpha=0.3); plt.legend(fontsize=8)
+    if xlim is not None:
+        plt.xlim(*xlim)
+    plt.tight_layout(); plt.savefig(out_png, dpi=300); plt.close()
+
+    pd.DataFrame(curves).to_csv(out_curve, index=False)
+    return fits
+
+def main(df=None):
     if STRESS_UNIT not in _SCALE:
         raise SystemExit(f"STRESS_UNIT must be one of {_SCALE.keys()}")
 
@@ -82,8 +98,9 @@ def main():
     out_fit_sigma   = OUT_FIT_SIGMA_PNG or f"stress_rate_fit_sigma_{unit_tag}.png"
     out_curve_sigma = OUT_CURVE_SIGMA_CSV or f"stress_rate_fit_curve_sigma_{unit_tag}.csv"
 
-    # 载入主表并裁剪时间
-    df = _load_csv(CSV_MAIN)
+    # 载入主表 (或直接用传入的内存表) 并裁剪时间
+    if df is None:
+        df = _load_csv(CSV_MAIN)
     if df is None or df.empty:
         raise SystemExit(f"CSV not found or empty: {CSV_MAIN}")
     df = _apply_time_crop(df, T_MIN_PS, T_MAX_PS)
@@ -100,10 +117,10 @@ def main():
     plt.title('Mean escape stress vs time'); plt.grid(True, alpha=0.3)
     plt.tight_layout(); plt.savefig(out_stress_time, dpi=300); plt.close()
 
-    # virial vs time（kcal/mol）
+    # virial vs time（atm·Å^3）
     plt.figure()
     plt.plot(df['t_center_ps'], df[X_VIR_COL], marker='o', lw=1)
-    plt.xlabel('Time (ps)'); plt.ylabel('Mean escape “von Mises” virial (kcal/mol)')
+    plt.xlabel('Time (ps)'); plt.ylabel('Mean escape “von Mises” virial (atm·Å^3)')
     plt.title('Mean escape virial vs time'); plt.grid(True, alpha=0.3)
     plt.tight_layout(); plt.savefig(OUT_VIR_TIME, dpi=300); plt.close()
 
@@ -114,63 +131,29 @@ def main():
     plt.title('Formation rate vs time'); plt.grid(True, alpha=0.3)
     plt.tight_layout(); plt.savefig(OUT_RATE_TIME, dpi=300); plt.close()
 
-    # ---------- scatter & poly-fit: rate vs stress(目标单位) ----------
-    ds = _load_csv(CSV_SIGMA)
-    if ds is None or ds.empty:
-        ds = df.dropna(subset=[X_SIGMA_GPA_COL, Y_COL]).copy().sort_values(X_SIGMA_GPA_COL)
-    ds = _apply_time_crop(ds, T_MIN_PS, T_MAX_PS)
-    ds['sigma_plot'] = ds[X_SIGMA_GPA_COL].to_numpy(float) * sigma_scale
-
+    # ---------- scatter & fits: rate vs stress(目标单位) ----------
+    ds = df
     if X_SIGMA_MIN is not None: ds = ds[ds['sigma_plot'] >= X_SIGMA_MIN]
     if X_SIGMA_MAX is not None: ds = ds[ds['sigma_plot'] <= X_SIGMA_MAX]
-
-    xs = ds['sigma_plot'].to_numpy(float)
-    ys = ds[Y_COL].to_numpy(float)
-
-    coefs_s, poly_s, r2_s = poly_fit(xs, ys, POLY_DEGREE)
-    xs_plot = np.linspace(np.min(xs), np.max(xs), 400)
-    ys_plot = poly_s(xs_plot)
-
-    plt.figure()
-    plt.scatter(xs, ys, s=26, label='Binned points')
-    plt.plot(xs_plot, ys_plot, label=f'Poly deg={POLY_DEGREE}, R²={r2_s:.3f}')
-    plt.xlabel(stress_label); plt.ylabel('Formation rate (CO+CO2) [1/ps]')
-    plt.title(f'Rate vs stress ({_LABEL[STRESS_UNIT]})'); plt.grid(True, alpha=0.3); plt.legend()
+    xlim = None
     if (X_SIGMA_MIN is not None) or (X_SIGMA_MAX is not None):
-        xmin = X_SIGMA_MIN if X_SIGMA_MIN is not None else np.min(xs)
-        xmax = X_SIGMA_MAX if X_SIGMA_MAX is not None else np.max(xs)
-        plt.xlim(xmin, xmax)
-    plt.tight_layout(); plt.savefig(out_fit_sigma, dpi=300); plt.close()
-
-    pd.DataFrame({"sigma_"+unit_tag: xs_plot, "y_poly": ys_plot}).to_csv(out_curve_sigma, index=False)
-
-    # ---------- scatter & poly-fit: rate vs virial(kcal/mol) ----------
-    dv = _load_csv(CSV_VIRIAL)
-    if dv is None or dv.empty:
-        dv = df.dropna(subset=[X_VIR_COL, Y_COL]).copy().sort_values(X_VIR_COL)
-    dv = _apply_time_crop(dv, T_MIN_PS, T_MAX_PS)
-    xv = dv[X_VIR_COL].to_numpy(float); yv = dv[Y_COL].to_numpy(float)
-    coefs_v, poly_v, r2_v = poly_fit(xv, yv, POLY_DEGREE)
-    xv_plot = np.linspace(np.min(xv), np.max(xv), 400)
-    yv_plot = poly_v(xv_plot)
-
-    plt.figure()
-    plt.scatter(xv, yv, s=26, label='Binned points')
-    plt.plot(xv_plot, yv_plot, label=f'Poly deg={POLY_DEGREE}, R²={r2_v:.3f}')
-    plt.xlabel('Mean escape “von Mises” virial (kcal/mol)')
-    plt.ylabel('Formation rate (CO+CO2) [1/ps]')
-    plt.title('Rate vs virial (kcal/mol)'); plt.grid(True, alpha=0.3); plt.legend()
-    plt.tight_layout(); plt.savefig(OUT_FIT_VIR_PNG, dpi=300); plt.close()
+        xlim = (X_SIGMA_MIN if X_SIGMA_MIN is not None else ds['sigma_plot'].min(),
+                X_SIGMA_MAX if X_SIGMA_MAX is not None else ds['sigma_plot'].max())
+    fits_s = _fit_panel(ds, 'sigma_plot', stress_label, f'Rate vs stress ({_LABEL[STRESS_UNIT]})',
+                        out_fit_sigma, out_curve_sigma, "sigma_"+unit_tag, xlim)
 
-    pd.DataFrame({X_VIR_COL: xv_plot, "y_poly": yv_plot}).to_csv(OUT_CURVE_VIR_CSV, index=False)
+    # ---------- scatter & fits: rate vs virial(atm·Å^3) ----------
+    fits_v = _fit_panel(df, X_VIR_COL, 'Mean escape “von Mises” virial (atm·Å^3)',
+                        'Rate vs virial (atm·Å^3)', OUT_FIT_VIR_PNG, OUT_CURVE_VIR_CSV, X_VIR_COL)
 
     # 存储拟合系数
     Path(OUT_FITS_JSON).write_text(json.dumps({
         "y_unit": "1/ps",
         "stress_unit": _LABEL[STRESS_UNIT],
-        "poly_degree": POLY_DEGREE,
-        "sigma_fit": {"coeffs_high_to_low": list(map(float, coefs_s)), "R2": r2_s},
-        "virial_fit": {"coeffs_high_to_low": list(map(float, coefs_v)), "R2": r2_v},
+        "weights": WEIGHTS,
+        "poly_degrees_tried": list(POLY_DEGREES),
+        "sigma_fit": {k: rate_fit.to_json(f) for k, f in fits_s.items()},
+        "virial_fit": {k: rate_fit.to_json(f) for k, f in fits_v.items()},
     }, indent=2), encoding='utf-8')
 
     print(f"[OK] wrote images & fits: {out_stress_time}, {OUT_VIR_TIME}, {OUT_RATE_TIME}, "
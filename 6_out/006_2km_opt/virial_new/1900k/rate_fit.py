@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fits of binned formation rate vs stress (works on the in-memory binned table).
+- Weights per bin (WEIGHTS):
+    'none'  : unweighted
+    'count' : w ∝ sqrt(n_escaped)                       (more escapes → better-defined stress)
+    'std'   : w = 1/SE(rate) = sqrt(n_rate_samples) / rate_std_per_ps
+  Bins with missing std take the median weight; near-zero SE is floored (SE_FLOOR).
+- Model forms:
+    'poly'      : rate = Σ c_k x^k                       (degree chosen by leave-one-bin-out CV)
+    'arrhenius' : rate = A · exp(b·x)                    (stress-assisted Arrhenius, ln-linear fit)
+    'power'     : rate = A · x^n                         (ln-ln fit, needs x > 0)
+- R² is in-sample; Q² = 1 − PRESS/SS_tot from leave-one-bin-out predictions.
+"""
+
+import numpy as np
+
+MODELS = ("poly", "arrhenius", "power")
+SE_FLOOR = 0.05      # 'std' weights: SE(rate) floored at this fraction of the median SE
+
+
+def bin_weights(df, mode="none", n_col="n_escaped", std_col="rate_std_per_ps",
+                ns_col="n_rate_samples"):
+    """Per-bin weights (1/sigma convention of np.polyfit), normalised to mean 1."""
+    n = len(df)
+    if mode in (None, "none"):
+        return np.ones(n)
+    if mode == "count":
+        w = np.sqrt(df[n_col].to_numpy(float))
+    elif mode == "std":
+        se = df[std_col].to_numpy(float) / np.sqrt(df[ns_col].to_numpy(float))
+        pos = np.isfinite(se) & (se > 0)
+        if pos.any():                        # flat (smoothed) bins: std ~ 0 would dominate the fit
+            se = np.maximum(se, SE_FLOOR * np.median(se[pos]))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            w = 1.0 / se
+    else:
+        raise ValueError("weights must be 'none', 'count' or 'std'")
+    bad = ~np.isfinite(w) | (w <= 0)
+    if bad.all():
+        return np.ones(n)
+    w[bad] = np.median(w[~bad])
+    return w / w.mean()
+
+
+def r2_score(y_true, y_pred, w=None):
+    y_true = np.asarray(y_true, float); y_pred = np.asarray(y_pred, float)
+    w = np.ones_like(y_true) if w is None else np.asarray(w, float)**2
+    ss_res = np.sum(w * (y_true - y_pred)**2)
+    ss_tot = np.sum(w * (y_true - np.average(y_true, weights=w))**2)
+    return 1.0 - ss_res/ss_tot if ss_tot > 0 else np.nan
+
+
+def _design(x, model):
+    """Transformed (u, ok) for the linearised fit: poly on x, arrhenius on x, power on ln x."""
+    if model == "power":
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.log(x), x > 0
+    return x, np.ones(len(x), bool)
+
+
+def _fit_coefs(x, y, model, deg, w):
+    u, ok = _design(x, model)
+    if model == "poly":
+        return np.polyfit(u, y, deg, w=w)
+    ok &= y > 0
+    if ok.sum() < 2:
+        return None
+    # d(ln y) = dy / y  →  1/sigma on ln y is w·y
+    return np.polyfit(u[ok], np.log(y[ok]), 1, w=w[ok] * y[ok])
+
+
+def _predict(coefs, x, model):
+    x = np.asarray(x, float)
+    if coefs is None:
+        return np.full(x.shape, np.nan)
+    if model == "poly":
+        return np.polyval(coefs, x)
+    u, ok = _design(x, model)
+    out = np.full(x.shape, np.nan)
+    out[ok] = np.exp(np.polyval(coefs, u[ok]))
+    return out
+
+
+def _n_params(model, deg):
+    return deg + 1 if model == "poly" else 2
+
+
+def fit(x, y, model="poly", deg=1, w=None):
+    """
+    Fit one model form; all residuals and R² are in rate space.
+    Returns dict(model, deg, coefs (high→low, in the linearised variable), r2, q2, predict).
+    """
+    if model not in MODELS:
+        raise ValueError(f"model must be one of {MODELS}")
+    x = np.asarray(x, float); y = np.asarray(y, float)
+    w = np.ones_like(x) if w is None else np.asarray(w, float)
+    ok = np.isfinite(x) & np.isfinite(y) & np.isfinite(w)
+    x, y, w = x[ok], y[ok], w[ok]
+    deg = deg if model == "poly" else 1
+    res = {"model": model, "deg": deg, "n": int(len(x)), "coefs": None,
+           "r2": np.nan, "q2": np.nan, "predict": lambda xx: _predict(None, xx, model)}
+    if len(x) <= _n_params(model, deg):
+        return res
+    coefs = _fit_coefs(x, y, model, deg, w)
+    if coefs is None:
+        return res
+    res["coefs"] = coefs
+    res["predict"] = lambda xx, c=coefs: _predict(c, xx, model)
+    res["r2"] = float(r2_score(y, res["predict"](x), w))
+    res["q2"] = loo_q2(x, y, model, deg, w)
+    return res
+
+
+def loo_q2(x, y, model="poly", deg=1, w=None):
+    """Leave-one-bin-out predictive R² (weighted PRESS); NaN if too few bins."""
+    x = np.asarray(x, float); y = np.asarray(y, float)
+    w = np.ones_like(x) if w is None else np.asarray(w, float)
+    n = len(x)
+    if n - 1 <= _n_params(model, deg):
+        return np.nan
+    keep = ~np.eye(n, dtype=bool)
+    pred = np.array([_predict(_fit_coefs(x[k], y[k], model, deg, w[k]), x[i:i+1], model)[0]
+                     for i, k in enumerate(keep)])
+    if not np.isfinite(pred).all():
+        return np.nan
+    return float(r2_score(y, pred, w))
+
+
+def select_degree(x, y, degrees, w=None):
+    """Poly degree with the best leave-one-bin-out Q² (ties → lower degree). -> (best fit, all fits)"""
+    fits = [fit(x, y, "poly", d, w) for d in sorted(degrees)]
+    scored = [f for f in fits if np.isfinite(f["q2"])]
+    best = max(scored, key=lambda f: f["q2"]) if scored else fits[0]
+    return best, fits
+
+
+def fit_all(x, y, degrees, forms=MODELS, w=None):
+    """CV-selected polynomial plus the Arrhenius / power-law forms. -> (dict form → fit, poly candidates)"""
+    out, cand = {}, []
+    for form in forms:
+        if form == "poly":
+            out["poly"], cand = select_degree(x, y, degrees, w)
+        else:
+            out[form] = fit(x, y, form, 1, w)
+    return out, cand
+
+
+def describe(f):
+    """One-line legend label."""
+    name = {"poly": f"Poly deg={f['deg']}", "arrhenius": "A·exp(b·x)", "power": "A·x^n"}[f["model"]]
+    return f"{name}, R²={f['r2']:.3f}, Q²={f['q2']:.3f}"
+
+
+def to_json(f):
+    return {"model": f["model"], "deg": f["deg"], "n": f["n"],
+            "coeffs_high_to_low": None if f["coefs"] is None else list(map(float, f["coefs"])),
+            "R2": f["r2"], "Q2_loo": f["q2"]}
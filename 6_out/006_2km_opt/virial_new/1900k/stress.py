@@ -2,15 +2,35 @@
 # -*- coding: utf-8 -*-
 """
 Extract binned (stress, rate) pairs from LAMMPS outputs.
-- Keeps BOTH raw per-atom virial (kcal/mol) and converted stress (GPa).
-- Fixed volume per atom: V_atom = (Lx*Ly/N_layer_atoms) * t_eff, all in Å units (box fixed, no change_box).
+- Keeps BOTH raw per-atom virial (c_MyStress, atm·Å^3 in units real) and converted stress (GPa);
+  the conversion is stress_tensor.virial_to_gpa (sigma = c_MyStress / V * Atm2GPa, as in.gra_o).
+- Per-atom volume for the GPa conversion (VOLUME_MODEL):
+    'dump'     : Voronoi volume column written by in.gra_o (c_MyVoro[1]) in ablate.lammpstrj
+    'voronoi'  : local scipy Voronoi tessellation of TRAJ_PATH frames around each escape (cached)
+    'constant' : V_atom = (Lx*Ly/N_layer_atoms) * t_eff, all in Å units (box fixed, no change_box)
+    'auto'     : dump column if present, else constant (voronoi is never picked implicitly)
+  Default is 'constant' (in.gra_o ships with c_MyVoro commented out); the chosen model is printed
+  and recorded in the meta json.
+  Atoms whose volume is unavailable (unbounded cell, missing frame) fall back to the constant.
+- Restart continuations: every input path may be a glob or a list of files (traj_index stitching);
+  overlapping timesteps keep the latest segment, atoms deleted in between simply stop appearing.
+- Sweep mode (SWEEP / --sweep): inputs parsed once, R^2 / LOO Q^2 of the rate-vs-stress poly fit
+  tabulated over BIN_PS x ESCAPE_DELTAT_PS x SMOOTH_RATE_POINTS x POLY_DEGREE grids.
+- Shared modules (traj_index, smoothing, fragment_track, voronoi_volume, stress_tensor) live in
+  4_new_full_o2/3_plot_all/3_all_out: `pip install -e` that directory once (or add it to PYTHONPATH).
 """
 
 # ============================ PARAMS (EDIT HERE) ============================
-# Inputs
+# Inputs (glob / list = restart segments, e.g. "species*.out")
 SPECIES_PATH      = "species.out"
 ABLATEDUMP_PATH   = "ablate.lammpstrj"
 
+# CO/CO2 counts: 'species' = species.out (needs fix reaxff/species)
+#                'trajectory' = fragment tracker on TRAJ_PATH (cluster labeling from positions)
+SPECIES_SOURCE    = "species"
+TRAJ_PATH         = "trajectory.T_1900_v7.8.lammpstrj"
+TRAJ_EVERY        = 1          # process every k-th frame of TRAJ_PATH
+
 # LAMMPS time step (fs) and analysis knobs
 DT_FS             = 0.1        # LAMMPS 'timestep' in fs
 BIN_PS            = 2.0        # time-bin width for pairing stress & rate [ps]
@@ -24,27 +44,51 @@ N_LAYER_ATOMS     = 1500        # atoms per single C layer
 T_EFF_A           = 3.35         # nominal single-layer thickness (Å)
 V_ATOM_A3         = (LX_A * LY_A / N_LAYER_ATOMS) * T_EFF_A   # constant Å^3 per atom
 
-# Conversion: (kcal/mol) / Å^3  ->  GPa
-KCALMOL_A3_TO_GPA = 6.947695
+# Per-atom volume source: 'auto' | 'dump' | 'voronoi' | 'constant'
+VOLUME_MODEL      = "constant"
+VORO_COL          = "c_MyVoro[1]"   # per-atom Voronoi volume column in ABLATEDUMP_PATH (Å^3)
+VORO_PAD_A        = 6.0             # neighbour radius for the local tessellation fallback (Å)
+
+# Conversion c_MyStress (atm·Å^3) / Å^3 -> GPa: stress_tensor.ATM_TO_GPA (in.gra_o's v_Atm2GPa)
 
-# Smoothing of rate (points of moving average; 1 = no smooth)
+# Smoothing of rate (window in points; 1 = no smooth)
 SMOOTH_RATE_POINTS = 1
+SMOOTH_RATE_METHOD = "mean"    # 'mean' (edge-correct running mean) | 'savgol' | 'ema'
 
 # Optional time filter for final table (use None to disable)
 T_MIN_PS = None
 T_MAX_PS = None
 
+# Sweep mode (SWEEP = True or `python stress.py --sweep`): parse once, evaluate the grid
+# bin width x escape window x rate smoothing x poly degree, write one R^2 table
+SWEEP               = False
+SWEEP_BIN_PS        = [0.5, 1.0, 2.0, 4.0]
+SWEEP_DELTAT_PS     = [0.02, 0.05, 0.1, 0.2]
+SWEEP_SMOOTH_POINTS = [1, 3, 5]
+SWEEP_POLY_DEGREES  = [1, 2, 3, 4]
+SWEEP_WEIGHTS       = "none"   # bin weights for the fits (see rate_fit.bin_weights)
+SWEEP_WORKERS       = None     # process pool size (None = all cores)
+OUT_SWEEP_CSV       = "stress_rate_sweep.csv"
+
 # Outputs
 OUT_CHRONO_CSV           = "stress_rate_binned.csv"
-OUT_SORTED_SIGMA_CSV     = "stress_rate_binned_sorted_by_sigma.csv"
-OUT_SORTED_VIRIAL_CSV    = "stress_rate_binned_sorted_by_virial.csv"
 OUT_META_JSON            = "stress_rate_meta.json"
+MAKE_PLOTS               = False   # True = run plot.main() on the binned table (no CSV round trip)
 # ===========================================================================
 
-import re, json, numpy as np, pandas as pd
+import re, sys, json, numpy as np, pandas as pd
 from pathlib import Path
 
 
+def _have(spec) -> bool:
+    """True if every file of a (possibly multi-segment) input exists."""
+    from traj_index import resolve_paths
+    try:
+        return all(Path(f).exists() for f in resolve_paths(spec))
+    except FileNotFoundError:
+        return False
+
+
 def _safe_num(x):
     try:
         return float(x)
@@ -55,22 +99,52 @@ def _safe_num(x):
             return x
 
 
-def parse_species(species_path: str, dt_fs: float) -> pd.DataFrame:
-    rows, cols = [], None
-    with open(species_path, 'r', errors='ignore') as f:
-        for line in f:
-            s = line.strip()
-            if not s:
-                continue
-            if s.startswith('#'):
-                cols = re.sub(r'^#+\s*', '', s).split()
-                continue
-            if cols is None:
-                continue
-            vals = s.split()
-            if len(vals) < len(cols):
-                continue
-            rows.append({c: _safe_num(v) for c, v in zip(cols, vals)})
+_RE_ELEM = re.compile(r'([A-Z][a-z]?)(\d*)')
+
+
+def _formula_counts(name: str) -> dict:
+    """'CO2' / 'C1O2' -> {'C':1,'O':2}; returns {} for non-formula columns like 'No_Moles'."""
+    if not re.fullmatch(r'(?:[A-Z][a-z]?\d*)+', name):
+        return {}
+    counts = {}
+    for el, n in _RE_ELEM.findall(name):
+        counts[el] = counts.get(el, 0) + (int(n) if n else 1)
+    return counts
+
+
+def _rate_per_ps(t: np.ndarray, y: np.ndarray, points=None, method=None) -> np.ndarray:
+    """rate = dN/dt (per ps), optionally smoothed (O(n), no zero-padded edges)."""
+    points = SMOOTH_RATE_POINTS if points is None else points
+    method = SMOOTH_RATE_METHOD if method is None else method
+    if len(t) >= 3 and np.ptp(t) > 0:
+        rate = np.gradient(y, t)
+    else:
+        rate = np.zeros_like(y)
+    if points and points > 1:
+        from smoothing import smooth
+        rate = smooth(rate, int(points), method)
+    return rate
+
+
+def parse_species(species_path, dt_fs: float) -> pd.DataFrame:
+    from traj_index import resolve_paths, stitch_keep
+    rows = []
+    for part, path in enumerate(resolve_paths(species_path)):
+        cols = None
+        with open(path, 'r', errors='ignore') as f:
+            for line in f:
+                s = line.strip()
+                if not s:
+                    continue
+                if s.startswith('#'):
+                    cols = re.sub(r'^#+\s*', '', s).split()
+                    continue
+                if cols is None:
+                    continue
+                vals = s.split()
+                if len(vals) < len(cols):
+                    continue
+                rows.append({'_part': part, **{c: _safe_num(v) for c, v in zip(cols, vals)}})
     if not rows:
         raise RuntimeError(f"No data parsed from {species_path}")
 
@@ -81,77 +155,89 @@ def parse_species(species_path: str, dt_fs: float) -> pd.DataFrame:
             raise RuntimeError("No 'Timestep' column in species file")
         df = df.rename(columns={ts: 'Timestep'})
 
-    # identify CO & CO2 columns robustly
-    lowers = {c: c.lower() for c in df.columns}
-    co_cols  = [c for c, l in lowers.items() if ('co' in l and 'co2' not in l)]
-    co2_cols = [c for c, l in lowers.items() if 'co2' in l]
-    if not co_cols and 'CO' in df.columns:   co_cols = ['CO']
-    if not co2_cols and 'CO2' in df.columns: co2_cols = ['CO2']
+    # identify CO & CO2 columns by parsed formula (exact composition, not substring)
+    comp = {c: _formula_counts(str(c)) for c in df.columns}
+    co_cols  = [c for c, f in comp.items() if f == {'C': 1, 'O': 1}]
+    co2_cols = [c for c, f in comp.items() if f == {'C': 1, 'O': 2}]
 
     df['CO_CO2_total'] = 0.0
     if co_cols:  df['CO_CO2_total'] += df[co_cols].astype(float).sum(axis=1)
     if co2_cols: df['CO_CO2_total'] += df[co2_cols].astype(float).sum(axis=1)
 
+    # restart segments: later segment wins from its first timestep on (file order, then rollbacks)
+    keep, _ = stitch_keep(df['Timestep'].to_numpy(np.int64), df['_part'].to_numpy())
+    df = df[keep].reset_index(drop=True)
+
     dt_ps = dt_fs * 1e-3
     df['time_ps'] = df['Timestep'].astype(float) * dt_ps
-    df = df.sort_values('time_ps').drop_duplicates('time_ps', keep='last').reset_index(drop=True)
 
-    # rate = dN/dt (per ps)
-    t = df['time_ps'].to_numpy()
-    y = df['CO_CO2_total'].to_numpy()
-    if len(t) >= 3 and np.ptp(t) > 0:
-        rate = np.gradient(y, t)
-    else:
-        rate = np.zeros_like(y)
-    if SMOOTH_RATE_POINTS and SMOOTH_RATE_POINTS > 1:
-        k = int(SMOOTH_RATE_POINTS)
-        rate = np.convolve(rate, np.ones(k)/k, mode='same')
+    df['rate_per_ps'] = _rate_per_ps(df['time_ps'].to_numpy(), df['CO_CO2_total'].to_numpy(float))
+    return df[['time_ps','Timestep','CO_CO2_total','rate_per_ps']]
+
 
-    df['rate_per_ps'] = rate
+def track_species(traj_path: str, dt_fs: float, every: int = 1) -> pd.DataFrame:
+    """
+    CO/CO2 counts from trajectory positions (fragment tracker, no species.out needed).
+    Same columns as parse_species, so the result feeds time_bin_aggregate directly.
+    """
+    from fragment_track import track_dump
+    df = track_dump(traj_path, dt_fs, every).species_counts()   # stitched index: already monotonic
+    if df.empty:
+        raise RuntimeError(f"No frames tracked from {traj_path}")
+    df['rate_per_ps'] = _rate_per_ps(df['time_ps'].to_numpy(), df['CO_CO2_total'].to_numpy(float))
     return df[['time_ps','Timestep','CO_CO2_total','rate_per_ps']]
 
 
 def parse_ablate_dump(ablate_path: str, dt_fs: float):
     """
     Read ablate.lammpstrj with columns:
-      id ... c_MyStress[1..6]
-    Returns dict[atom_id] -> DataFrame(['time_ps','vxx','vyy','vzz','vxy','vxz','vyz'])
-    NOTE: 'v' prefixes denote virial components (kcal/mol).
+      id ... c_MyStress[1..6] [c_MyVoro[1]]
+    Returns dict[atom_id] -> DataFrame(['time_ps','vxx','vyy','vzz','vxy','vxz','vyz','vol'])
+    NOTE: 'v' prefixes denote virial components (atm·Å^3); 'vol' is NaN without VORO_COL.
+    Restart segments are stitched like traj_index: frames superseded by a later segment are dropped.
     """
-    atom = {}
-    with open(ablate_path, 'r', errors='ignore') as fh:
-        tps, cols, reading_atoms = None, None, False
-        while True:
-            line = fh.readline()
-            if not line:
-                break
-            s = line.strip()
-            if s.startswith('ITEM:'):
-                reading_atoms = False
-                if 'TIMESTEP' in s:
-                    ts = fh.readline().strip()
-                    tps = int(ts) * dt_fs * 1e-3
-                elif 'ATOMS' in s:
-                    cols = s.replace('ITEM: ATOMS', '').strip().split()
-                    reading_atoms = True
-                continue
-            if reading_atoms and cols is not None:
-                toks = s.split()
-                if not toks:
-                    continue
-                rec = dict(zip(cols, toks))
-                try:
-                    aid = int(rec.get('id', toks[0]))
-                    vxx = float(rec['c_MyStress[1]']); vyy = float(rec['c_MyStress[2]']); vzz = float(rec['c_MyStress[3]'])
-                    vxy = float(rec['c_MyStress[4]']); vxz = float(rec['c_MyStress[5]']); vyz = float(rec['c_MyStress[6]'])
-                except Exception:
+    from traj_index import resolve_paths, stitch_keep
+    atom, steps, parts = {}, [], []
+    for part, path in enumerate(resolve_paths(ablate_path)):
+        with open(path, 'r', errors='ignore') as fh:
+            tps, cols, reading_atoms = None, None, False
+            while True:
+                line = fh.readline()
+                if not line:
+                    break
+                s = line.strip()
+                if s.startswith('ITEM:'):
+                    reading_atoms = False
+                    if 'TIMESTEP' in s:
+                        ts = int(fh.readline().strip())
+                        tps = ts * dt_fs * 1e-3
+                        steps.append(ts); parts.append(part)
+                    elif 'ATOMS' in s:
+                        cols = s.replace('ITEM: ATOMS', '').strip().split()
+                        reading_atoms = True
                     continue
-                atom.setdefault(aid, []).append((tps, vxx, vyy, vzz, vxy, vxz, vyz))
-
+                if reading_atoms and cols is not None:
+                    toks = s.split()
+                    if not toks:
+                        continue
+                    rec = dict(zip(cols, toks))
+                    try:
+                        aid = int(rec.get('id', toks[0]))
+                        vxx = float(rec['c_MyStress[1]']); vyy = float(rec['c_MyStress[2]']); vzz = float(rec['c_MyStress[3]'])
+                        vxy = float(rec['c_MyStress[4]']); vxz = float(rec['c_MyStress[5]']); vyz = float(rec['c_MyStress[6]'])
+                        vol = float(rec[VORO_COL]) if VORO_COL in rec else np.nan
+                    except Exception:
+                        continue
+                    atom.setdefault(aid, []).append((len(steps) - 1, tps, vxx, vyy, vzz, vxy, vxz, vyz, vol))
+
+    keep, _ = stitch_keep(steps, parts)
     out = {}
     for aid, lst in atom.items():
         arr = np.array(lst, dtype=float)
-        df = pd.DataFrame(arr, columns=['time_ps','vxx','vyy','vzz','vxy','vxz','vyz']).sort_values('time_ps')
+        arr = arr[keep[arr[:, 0].astype(int)], 1:]
+        if not len(arr):
+            continue
+        df = pd.DataFrame(arr, columns=['time_ps','vxx','vyy','vzz','vxy','vxz','vyz','vol']).sort_values('time_ps')
         out[aid] = df.reset_index(drop=True)
     return out
 
@@ -162,19 +248,61 @@ def von_mises(a11, a22, a33, a12, a13, a23):
     return np.sqrt(np.maximum(term1 + term2, 0.0))
 
 
+def voronoi_volumes(atom_traj: dict, traj_path: str, dt_fs: float,
+                    escape_deltat_ps: float, r_pad: float) -> dict:
+    """
+    {atom_id: volume} from a local Voronoi tessellation of traj_path (cached per frame/id).
+    Each atom gets the mean volume over trajectory frames inside its escape window
+    (nearest frame if the window holds none); atoms without a finite volume are left out.
+    """
+    from traj_index import load_index
+    from voronoi_volume import cached_volumes
+    t_traj = load_index(traj_path).times_ps(dt_fs)
+
+    need = {}                                    # atom_id -> trajectory frames
+    for aid, df in atom_traj.items():
+        if df.empty:
+            continue
+        te = float(df['time_ps'].max())
+        k = np.flatnonzero(np.abs(t_traj - te) <= escape_deltat_ps)
+        need[aid] = k if k.size else np.array([int(np.argmin(np.abs(t_traj - te)))])
+    req = {}
+    for aid, ks in need.items():
+        for k in ks:
+            req.setdefault(int(k), []).append(aid)
+    vols = cached_volumes(traj_path, req, r_pad)
+
+    out = {}
+    for aid, ks in need.items():
+        v = np.nanmean([vols.get((int(k), aid), np.nan) for k in ks]) if len(ks) else np.nan
+        if np.isfinite(v):
+            out[aid] = float(v)
+    return out
+
+
+def voronoi_fill(atom_traj: dict, traj_path: str, dt_fs: float,
+                 escape_deltat_ps: float, r_pad: float) -> int:
+    """Fill 'vol' in place with voronoi_volumes(); returns the number of atoms filled."""
+    vols = voronoi_volumes(atom_traj, traj_path, dt_fs, escape_deltat_ps, r_pad)
+    for aid, v in vols.items():
+        atom_traj[aid]['vol'] = v
+    return len(vols)
+
+
 def compute_escape_metrics(atom_traj: dict,
                            escape_deltat_ps: float,
-                           v_atom_a3: float,
-                           kconv: float):
+                           v_atom_a3: float):
     """
-    For each atom, window-average virial components (kcal/mol) around its last time,
-    and also convert to stress (GPa) using constant per-atom volume.
+    For each atom, window-average virial components (atm·Å^3) around its last time,
+    and also convert to stress (GPa) with the per-frame atom volume ('vol', Å^3);
+    frames without a volume use the constant v_atom_a3.
     Returns DataFrame:
       ['atom_id','escape_time_ps',
-       'vm_virial_kcalmol', 'sigma_vm_gpa',
-       'n_frames_used',
-       'vxx','vyy','vzz','vxy','vxz','vyz']  # window mean per component (kcal/mol)
+       'vm_virial_atmA3', 'sigma_vm_gpa',
+       'n_frames_used', 'vol_a3', 'vol_from_model',
+       'vxx','vyy','vzz','vxy','vxz','vyz']  # window mean per component (atm·Å^3)
     """
+    from stress_tensor import virial_to_gpa
     rows = []
     for aid, df in atom_traj.items():
         if df.empty:
@@ -184,128 +312,314 @@ def compute_escape_metrics(atom_traj: dict,
         if win.empty:
             win = df.iloc[[-1]]
 
-        # window means of virial components (kcal/mol)
-        vxx = win['vxx'].mean(); vyy = win['vyy'].mean(); vzz = win['vzz'].mean()
-        vxy = win['vxy'].mean(); vxz = win['vxz'].mean(); vyz = win['vyz'].mean()
+        # window means of virial components (atm·Å^3)
+        vir = win[['vxx','vyy','vzz','vxy','vxz','vyz']].to_numpy(float)
+        vxx, vyy, vzz, vxy, vxz, vyz = vir.mean(axis=0)
 
-        # virial "von Mises" (same algebra, still kcal/mol)
-        vm_v_kcal = float(von_mises(vxx, vyy, vzz, vxy, vxz, vyz))
+        # virial "von Mises" (same algebra, still atm·Å^3)
+        vm_v_raw = float(von_mises(vxx, vyy, vzz, vxy, vxz, vyz))
 
-        # convert to stresses: sigma = -(virial / V) * factor
-        sxx = -(vxx / v_atom_a3) * kconv
-        syy = -(vyy / v_atom_a3) * kconv
-        szz = -(vzz / v_atom_a3) * kconv
-        sxy = -(vxy / v_atom_a3) * kconv
-        sxz = -(vxz / v_atom_a3) * kconv
-        syz = -(vyz / v_atom_a3) * kconv
+        # convert to stresses frame by frame (virial_to_gpa), then window mean
+        vol = win['vol'].to_numpy(float) if 'vol' in win else np.full(len(win), np.nan)
+        has = np.isfinite(vol) & (vol > 0)
+        vol = np.where(has, vol, v_atom_a3)
+        sxx, syy, szz, sxy, sxz, syz = virial_to_gpa(vir, vol).mean(axis=0)
 
         vm_sig_gpa = float(von_mises(sxx, syy, szz, sxy, sxz, syz))
 
         rows.append({
             'atom_id': aid,
             'escape_time_ps': te,
-            'vm_virial_kcalmol': vm_v_kcal,
+            'vm_virial_atmA3': vm_v_raw,
             'sigma_vm_gpa': vm_sig_gpa,
             'n_frames_used': int(len(win)),
+            'vol_a3': float(vol.mean()),
+            'vol_from_model': bool(has.any()),
             'vxx': vxx, 'vyy': vyy, 'vzz': vzz, 'vxy': vxy, 'vxz': vxz, 'vyz': vyz
         })
     return pd.DataFrame(rows)
 
 
-def time_bin_aggregate(esc_df: pd.DataFrame, sp_df: pd.DataFrame,
-                       bin_ps: float, min_escapes: int = 1) -> pd.DataFrame:
-    # time span
+class _Sorted:
+    """Values sorted once (time order + per-column value order), reused for every bin width."""
+
+    def __init__(self, t: np.ndarray, cols: dict):
+        self.t = np.asarray(t, dtype=float)
+        self.cols = {}
+        for name, v in cols.items():
+            v = np.asarray(v, dtype=float)
+            ok = np.isfinite(v)
+            idx = np.flatnonzero(ok)
+            self.cols[name] = (v, ok, idx[np.argsort(v[ok], kind='stable')])
+
+    def bin_index(self, edges: np.ndarray) -> np.ndarray:
+        # [a, b) bins like pd.cut(right=False); outside -> -1
+        b = np.searchsorted(edges, self.t, side='right') - 1
+        return np.where((b >= 0) & (b < len(edges) - 1), b, -1)
+
+    def stats(self, name: str, b: np.ndarray, nb: int):
+        """count / mean / median / std(ddof=1) per bin, NaN-skipping like pandas."""
+        v, ok, vorder = self.cols[name]
+        m = ok & (b >= 0)
+        bb, vv = b[m], v[m]
+        n = np.bincount(bb, minlength=nb)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.bincount(bb, weights=vv, minlength=nb) / n
+            ss = np.bincount(bb, weights=(vv - mean[bb])**2, minlength=nb)
+            std = np.where(n > 1, np.sqrt(ss / (n - 1)), np.nan)
+
+        # median: value-sorted once, stable regroup by bin -> contiguous sorted segments
+        vo = vorder[b[vorder] >= 0]
+        vo = vo[np.argsort(b[vo], kind='stable')]
+        sv = v[vo]
+        start = np.concatenate([[0], np.cumsum(n)[:-1]])
+        lo = start + (n - 1) // 2
+        hi = start + n // 2
+        med = np.full(nb, np.nan)
+        has = n > 0
+        med[has] = 0.5 * (sv[lo[has]] + sv[hi[has]])
+        return n, mean, med, std
+
+
+def _bin_edges(tmin: float, tmax: float, bin_ps: float) -> np.ndarray:
+    edges = np.arange(tmin, tmax + bin_ps*0.5, bin_ps)
+    if len(edges) < 2:
+        edges = np.array([tmin, tmax])
+    return edges
+
+
+def time_bin_aggregate_multi(esc_df: pd.DataFrame, sp_df: pd.DataFrame,
+                             bin_list, min_escapes: int = 1) -> dict:
+    """
+    Same table as time_bin_aggregate for every width in bin_list, sharing one sort.
+    Returns {bin_ps: DataFrame}.
+    """
     tmin = min(esc_df['escape_time_ps'].min() if not esc_df.empty else np.inf,
                sp_df['time_ps'].min() if not sp_df.empty else np.inf)
     tmax = max(esc_df['escape_time_ps'].max() if not esc_df.empty else -np.inf,
                sp_df['time_ps'].max() if not sp_df.empty else -np.inf)
     if not np.isfinite(tmin) or not np.isfinite(tmax) or tmax <= tmin:
-        return pd.DataFrame()
+        return {bp: pd.DataFrame() for bp in bin_list}
 
-    edges = np.arange(tmin, tmax + bin_ps*0.5, bin_ps)
-    if len(edges) < 2:
-        edges = np.array([tmin, tmax])
+    e = _Sorted(esc_df['escape_time_ps'].to_numpy(float) if not esc_df.empty else np.empty(0),
+                {c: esc_df[c].to_numpy(float) if not esc_df.empty else np.empty(0)
+                 for c in ('atom_id', 'sigma_vm_gpa', 'vm_virial_atmA3')})
+    r = _Sorted(sp_df['time_ps'].to_numpy(float) if not sp_df.empty else np.empty(0),
+                {'rate_per_ps': sp_df['rate_per_ps'].to_numpy(float) if not sp_df.empty else np.empty(0)})
 
-    # bin & stats for escape virial/stress
-    e2 = esc_df.copy()
-    e2['bin'] = pd.cut(e2['escape_time_ps'], bins=edges, right=False, include_lowest=True)
-    g_e = e2.groupby('bin', observed=False).agg(
-        n_escaped=('atom_id','count'),
-        sigma_vm_mean_gpa=('sigma_vm_gpa','mean'),
-        sigma_vm_median_gpa=('sigma_vm_gpa','median'),
-        sigma_vm_std_gpa=('sigma_vm_gpa','std'),
-        vm_virial_mean_kcalmol=('vm_virial_kcalmol','mean'),
-        vm_virial_median_kcalmol=('vm_virial_kcalmol','median'),
-        vm_virial_std_kcalmol=('vm_virial_kcalmol','std')
-    )
-
-    # bin & stats for rate
-    s2 = sp_df.copy()
-    s2['bin'] = pd.cut(s2['time_ps'], bins=edges, right=False, include_lowest=True)
-    g_r = s2.groupby('bin', observed=False)['rate_per_ps'].agg(
-        n_rate_samples='count',
-        rate_mean_per_ps='mean',
-        rate_median_per_ps='median',
-        rate_std_per_ps='std'
-    )
-
-    merged = g_e.join(g_r, how='outer').reset_index()
-
-    # extract left/right safely
-    b = merged['bin'].astype('object')
-    merged['bin_start_ps'] = b.apply(lambda iv: float(iv.left) if isinstance(iv, pd.Interval) else np.nan)
-    merged['bin_end_ps']   = b.apply(lambda iv: float(iv.right) if isinstance(iv, pd.Interval) else np.nan)
-    merged.drop(columns=['bin'], inplace=True)
-    merged['t_center_ps']  = 0.5*(merged['bin_start_ps'] + merged['bin_end_ps'])
-
-    merged = merged.fillna({'n_escaped':0,'n_rate_samples':0})
-    merged = merged[(merged['n_escaped'] >= min_escapes) & (merged['n_rate_samples'] > 0)]
-    merged = merged.sort_values('t_center_ps').reset_index(drop=True)
-
-    # optional time crop for final output
-    if T_MIN_PS is not None:
-        merged = merged[merged['t_center_ps'] >= T_MIN_PS]
-    if T_MAX_PS is not None:
-        merged = merged[merged['t_center_ps'] <= T_MAX_PS]
-
-    return merged
+    out = {}
+    for bin_ps in bin_list:
+        edges = _bin_edges(tmin, tmax, bin_ps)
+        nb = len(edges) - 1
+        be, br = e.bin_index(edges), r.bin_index(edges)
+        n_esc = np.bincount(be[(be >= 0) & np.isfinite(e.cols['atom_id'][0])], minlength=nb)
+        _, s_mean, s_med, s_std = e.stats('sigma_vm_gpa', be, nb)
+        _, v_mean, v_med, v_std = e.stats('vm_virial_atmA3', be, nb)
+        n_r, r_mean, r_med, r_std = r.stats('rate_per_ps', br, nb)
+
+        merged = pd.DataFrame({
+            'n_escaped': n_esc,
+            'sigma_vm_mean_gpa': s_mean, 'sigma_vm_median_gpa': s_med, 'sigma_vm_std_gpa': s_std,
+            'vm_virial_mean_atmA3': v_mean, 'vm_virial_median_atmA3': v_med,
+            'vm_virial_std_atmA3': v_std,
+            'n_rate_samples': n_r,
+            'rate_mean_per_ps': r_mean, 'rate_median_per_ps': r_med, 'rate_std_per_ps': r_std,
+            'bin_start_ps': edges[:-1], 'bin_end_ps': edges[1:],
+        })
+        merged['t_center_ps'] = 0.5*(merged['bin_start_ps'] + merged['bin_end_ps'])
+        merged = merged[(merged['n_escaped'] >= min_escapes) & (merged['n_rate_samples'] > 0)]
+        merged = merged.sort_values('t_center_ps').reset_index(drop=True)
+
+        # optional time crop for final output
+        if T_MIN_PS is not None:
+            merged = merged[merged['t_center_ps'] >= T_MIN_PS]
+        if T_MAX_PS is not None:
+            merged = merged[merged['t_center_ps'] <= T_MAX_PS]
+        out[bin_ps] = merged
+    return out
 
 
-def main():
-    spec_p = Path(SPECIES_PATH); abl_p = Path(ABLATEDUMP_PATH)
-    if not spec_p.exists(): raise FileNotFoundError(spec_p)
-    if not abl_p.exists():  raise FileNotFoundError(abl_p)
+def time_bin_aggregate(esc_df: pd.DataFrame, sp_df: pd.DataFrame,
+                       bin_ps: float, min_escapes: int = 1) -> pd.DataFrame:
+    return time_bin_aggregate_multi(esc_df, sp_df, [bin_ps], min_escapes)[bin_ps]
 
-    sp_df = parse_species(str(spec_p), DT_FS)
-    atom_traj = parse_ablate_dump(str(abl_p), DT_FS)
 
+def load_inputs(voro_window_ps: float):
+    """Parse species/trajectory + ablate dump once; attach per-atom volumes. -> (sp_df, atom_traj, vol_model, paths)"""
+    spec_p = SPECIES_PATH if SPECIES_SOURCE == 'species' else TRAJ_PATH
+    abl_p  = ABLATEDUMP_PATH
+    if not _have(spec_p): raise FileNotFoundError(spec_p)
+    if not _have(abl_p):  raise FileNotFoundError(abl_p)
+
+    if SPECIES_SOURCE == 'species':
+        sp_df = parse_species(spec_p, DT_FS)
+    elif SPECIES_SOURCE == 'trajectory':
+        sp_df = track_species(spec_p, DT_FS, TRAJ_EVERY)
+    else:
+        raise ValueError("SPECIES_SOURCE must be 'species' or 'trajectory'")
+    atom_traj = parse_ablate_dump(abl_p, DT_FS)
+    if not atom_traj:
+        return sp_df, atom_traj, None, (spec_p, abl_p)
+
+    # per-atom volumes: dump column, local Voronoi fallback, or constant
+    has_col = any(np.isfinite(df['vol']).any() for df in atom_traj.values())
+    vol_model = VOLUME_MODEL
+    if vol_model == 'auto':
+        vol_model = 'dump' if has_col else 'constant'
+    if vol_model == 'dump' and not has_col:
+        raise RuntimeError(f"VOLUME_MODEL='dump' but {VORO_COL} not in {abl_p}")
+    if vol_model == 'voronoi':
+        for df in atom_traj.values():
+            df['vol'] = np.nan
+        n_vor = voronoi_fill(atom_traj, TRAJ_PATH, DT_FS, voro_window_ps, VORO_PAD_A)
+        print(f"[INFO] Voronoi volumes from {TRAJ_PATH}: {n_vor}/{len(atom_traj)} atoms")
+    elif vol_model == 'constant':
+        for df in atom_traj.values():
+            df['vol'] = np.nan
+    elif vol_model != 'dump':
+        raise ValueError("VOLUME_MODEL must be 'auto', 'dump', 'voronoi' or 'constant'")
+    print(f"[INFO] Volume model: {vol_model}"
+          + (f" (V_atom = {V_ATOM_A3:.4f} Å^3)" if vol_model == 'constant' else ""))
+    return sp_df, atom_traj, vol_model, (spec_p, abl_p)
+
+
+# ------------------------------- sweep mode -------------------------------
+def compact_traj(atom_traj: dict) -> dict:
+    """dict of per-atom frames -> flat arrays sorted by (atom, time), plus each atom's last time."""
+    aids = np.array(sorted(atom_traj), dtype=np.int64)
+    frames = [atom_traj[a] for a in aids]
+    n = np.array([len(f) for f in frames])
+    cat = pd.concat(frames, ignore_index=True)
+    owner = np.repeat(np.arange(len(aids)), n)
+    t = cat['time_ps'].to_numpy(float)
+    te = np.full(len(aids), -np.inf)
+    np.maximum.at(te, owner, t)
+    return {'aid': aids, 'owner': owner, 't': t, 'te': te,
+            'vir': cat[['vxx','vyy','vzz','vxy','vxz','vyz']].to_numpy(float),
+            'vol': cat['vol'].to_numpy(float) if 'vol' in cat else np.full(len(cat), np.nan)}
+
+
+def escape_metrics_compact(ct: dict, escape_deltat_ps: float,
+                           v_atom_a3: float) -> pd.DataFrame:
+    """Vectorized compute_escape_metrics on compact_traj arrays (same columns used by binning)."""
+    from stress_tensor import virial_to_gpa
+    te = ct['te'][ct['owner']]
+    m = (ct['t'] >= te - escape_deltat_ps) & (ct['t'] <= te + escape_deltat_ps)
+    own, nA = ct['owner'][m], len(ct['aid'])
+    cnt = np.bincount(own, minlength=nA)
+    vol = ct['vol'][m]
+    vol = np.where(np.isfinite(vol) & (vol > 0), vol, v_atom_a3)
+    vir = ct['vir'][m]
+    sig = virial_to_gpa(vir, vol)
+    vbar = np.stack([np.bincount(own, weights=vir[:, k], minlength=nA) for k in range(6)], 1) / cnt[:, None]
+    sbar = np.stack([np.bincount(own, weights=sig[:, k], minlength=nA) for k in range(6)], 1) / cnt[:, None]
+    return pd.DataFrame({'atom_id': ct['aid'], 'escape_time_ps': ct['te'],
+                         'vm_virial_atmA3': von_mises(*vbar.T),
+                         'sigma_vm_gpa': von_mises(*sbar.T),
+                         'n_frames_used': cnt})
+
+
+def _fit_scores(tab, xcol, deg):
+    """(R², leave-one-bin-out Q²) of the poly fit rate ~ xcol; NaN when too few bins."""
+    if tab.empty:
+        return np.nan, np.nan
+    from rate_fit import fit, bin_weights
+    f = fit(tab[xcol].to_numpy(float), tab['rate_mean_per_ps'].to_numpy(float), 'poly', deg,
+            bin_weights(tab, SWEEP_WEIGHTS))
+    return f['r2'], f['q2']
+
+
+_SW = {}
+
+
+def _sweep_init(ct, sp_base, vol_by_dt):
+    _SW['ct'], _SW['sp'], _SW['vol'] = ct, sp_base, vol_by_dt
+
+
+def _sweep_task(dt_ps, smooth_pts):
+    ct, sp = _SW['ct'], _SW['sp'].copy()
+    if dt_ps in _SW['vol']:                      # voronoi: volumes averaged over this Δt's window
+        ct = dict(ct, vol=_SW['vol'][dt_ps])
+    sp['rate_per_ps'] = _rate_per_ps(sp['time_ps'].to_numpy(), sp['CO_CO2_total'].to_numpy(float),
+                                     smooth_pts, SMOOTH_RATE_METHOD)
+    esc = escape_metrics_compact(ct, dt_ps, V_ATOM_A3)
+    rows = []
+    for bin_ps, tab in time_bin_aggregate_multi(esc, sp, SWEEP_BIN_PS, MIN_ESCAPES_PER_BIN).items():
+        for deg in SWEEP_POLY_DEGREES:
+            r2_s, q2_s = _fit_scores(tab, 'sigma_vm_mean_gpa', deg)
+            r2_v, q2_v = _fit_scores(tab, 'vm_virial_mean_atmA3', deg)
+            rows.append({'bin_ps': bin_ps, 'escape_deltat_ps': dt_ps, 'smooth_points': smooth_pts,
+                         'poly_degree': deg, 'n_bins': len(tab),
+                         'n_escaped': int(tab['n_escaped'].sum()) if not tab.empty else 0,
+                         'r2_sigma': r2_s, 'q2_sigma': q2_s, 'r2_virial': r2_v, 'q2_virial': q2_v})
+    return rows
+
+
+def sweep():
+    """One parse, grid of (bin, Δt, smoothing, degree) in worker processes -> OUT_SWEEP_CSV."""
+    from concurrent.futures import ProcessPoolExecutor
+    import itertools
+    sp_df, atom_traj, vol_model, _ = load_inputs(max(SWEEP_DELTAT_PS))
+    if not atom_traj:
+        print("[WARN] No atoms found in ablate.lammpstrj"); return
+    ct = compact_traj(atom_traj)
+    sp_base = sp_df[['time_ps', 'Timestep', 'CO_CO2_total']]
+    # voronoi volumes depend on the escape window: recompute per Δt, as main() would
+    # (load_inputs already tessellated the widest window, so these hit the frame cache)
+    vol_by_dt = {}
+    if vol_model == 'voronoi':
+        for dt in SWEEP_DELTAT_PS:
+            v = voronoi_volumes(atom_traj, TRAJ_PATH, DT_FS, dt, VORO_PAD_A)
+            vol_by_dt[dt] = np.array([v.get(a, np.nan) for a in ct['aid'].tolist()])[ct['owner']]
+    grid = list(itertools.product(SWEEP_DELTAT_PS, SWEEP_SMOOTH_POINTS))
+    with ProcessPoolExecutor(SWEEP_WORKERS, initializer=_sweep_init,
+                             initargs=(ct, sp_base, vol_by_dt)) as ex:
+        parts = list(ex.map(_sweep_task, *zip(*grid)))
+    res = pd.DataFrame([r for part in parts for r in part])
+    res = res.sort_values(['bin_ps', 'escape_deltat_ps', 'smooth_points', 'poly_degree']).reset_index(drop=True)
+    res['volume_model'] = vol_model
+    res.to_csv(OUT_SWEEP_CSV, index=False)
+    best = res.dropna(subset=['q2_sigma']).sort_values('q2_sigma', ascending=False).head(1)
+    print(f"[OK] wrote {OUT_SWEEP_CSV}  combos={len(res)}")
+    if not best.empty:
+        b = best.iloc[0]
+        print(f"     best q2_sigma={b.q2_sigma:.3f} (r2={b.r2_sigma:.3f})  BIN_PS={b.bin_ps}  ESCAPE_DELTAT_PS={b.escape_deltat_ps}  "
+              f"SMOOTH_RATE_POINTS={b.smooth_points}  POLY_DEGREE={b.poly_degree}")
+
+
+def main():
+    from stress_tensor import ATM_TO_GPA
+    sp_df, atom_traj, vol_model, (spec_p, abl_p) = load_inputs(ESCAPE_DELTAT_PS)
     if not atom_traj:
         pd.DataFrame().to_csv(OUT_CHRONO_CSV, index=False)
-        pd.DataFrame().to_csv(OUT_SORTED_SIGMA_CSV, index=False)
-        pd.DataFrame().to_csv(OUT_SORTED_VIRIAL_CSV, index=False)
         Path(OUT_META_JSON).write_text(json.dumps({"warn":"no atoms"}, indent=2))
         print("[WARN] No atoms found in ablate.lammpstrj")
         return
 
-    esc_df = compute_escape_metrics(atom_traj, ESCAPE_DELTAT_PS, V_ATOM_A3, KCALMOL_A3_TO_GPA)
+    esc_df = compute_escape_metrics(atom_traj, ESCAPE_DELTAT_PS, V_ATOM_A3)
     out_df = time_bin_aggregate(esc_df, sp_df, BIN_PS, MIN_ESCAPES_PER_BIN)
 
     out_df.to_csv(OUT_CHRONO_CSV, index=False)
     print(f"[OK] wrote {OUT_CHRONO_CSV}  rows={len(out_df)}")
 
-    # sorted versions (for plotting/fits)
-    if not out_df.empty:
-        out_df.sort_values('sigma_vm_mean_gpa').to_csv(OUT_SORTED_SIGMA_CSV, index=False)
-        out_df.sort_values('vm_virial_mean_kcalmol').to_csv(OUT_SORTED_VIRIAL_CSV, index=False)
+    # plots & fits straight from the in-memory table (plot.py sorts what it needs)
+    if MAKE_PLOTS and not out_df.empty:
+        from plot import main as plot_main
+        plot_main(out_df)
 
     meta = {
         "params":{
             "DT_FS":DT_FS, "BIN_PS":BIN_PS, "ESCAPE_DELTAT_PS":ESCAPE_DELTAT_PS,
-            "MIN_ESCAPES_PER_BIN":MIN_ESCAPES_PER_BIN, "SMOOTH_RATE_POINTS":SMOOTH_RATE_POINTS
+            "MIN_ESCAPES_PER_BIN":MIN_ESCAPES_PER_BIN, "SMOOTH_RATE_POINTS":SMOOTH_RATE_POINTS,
+            "SMOOTH_RATE_METHOD":SMOOTH_RATE_METHOD,
+            "SPECIES_SOURCE":SPECIES_SOURCE
         },
         "volume_model":{
             "LX_A":LX_A, "LY_A":LY_A, "N_LAYER_ATOMS":N_LAYER_ATOMS, "T_EFF_A":T_EFF_A,
-            "V_ATOM_A3":V_ATOM_A3, "KCALMOL_A3_TO_GPA":KCALMOL_A3_TO_GPA
+            "V_ATOM_A3":V_ATOM_A3, "ATM_TO_GPA":ATM_TO_GPA,
+            "VOLUME_MODEL":vol_model, "VORO_COL":VORO_COL, "VORO_PAD_A":VORO_PAD_A,
+            "atoms_with_model_volume":int(esc_df['vol_from_model'].sum()) if not esc_df.empty else 0,
+            "atoms_constant_volume":int((~esc_df['vol_from_model']).sum()) if not esc_df.empty else 0
         },
         "input":{"species":str(spec_p), "ablate":str(abl_p)},
         "rows": int(len(out_df))
@@ -315,4 +629,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    if SWEEP or "--sweep" in sys.argv[1:]:
+        sweep()
+    else:
+        main()